@@ -1,8 +1,35 @@
 from .top_level import AnimeSama
-from .catalogue import Catalogue
+from .catalogue import Catalogue, CatalogueDetails, fill_details
 from .season import Season
 from .episode import Episode, Languages, Players
+from .compact import (
+    CompactSeason,
+    PlayerTable,
+    default_player_table,
+    load_seasons,
+    save_seasons,
+)
+from .catalogue_index import CatalogueIndex, CatalogueRecord
+from .search_engine import CatalogueSearchEngine
+from .crawler import (
+    Crawler,
+    CrawlJournal,
+    CrawlRecord,
+    CrawlStats,
+    JsonLinesSink,
+    SQLiteSink,
+    crawl,
+)
+from .distributed import DistributedCrawler, WorkItem, WorkQueue
 from .langs import Lang, LangId, lang2ids, id2lang, flags
+from .session import SessionConfig, SessionManager, default_session
+from .parse_pool import ParsePool, default_parse_pool
+from .season_cache import (
+    EpisodesJsCache,
+    MissingPagesCache,
+    default_episodes_js_cache,
+    default_missing_pages,
+)
 
 try:
     from .cli.__main__ import main
@@ -26,15 +53,44 @@ except ImportError:
 __all__ = [
     "AnimeSama",
     "Catalogue",
+    "CatalogueDetails",
+    "fill_details",
+    "CatalogueIndex",
+    "CatalogueRecord",
+    "CatalogueSearchEngine",
+    "Crawler",
+    "CrawlJournal",
+    "CrawlRecord",
+    "CrawlStats",
+    "JsonLinesSink",
+    "SQLiteSink",
+    "crawl",
+    "DistributedCrawler",
+    "WorkItem",
+    "WorkQueue",
     "Season",
     "Players",
     "Languages",
     "Episode",
+    "CompactSeason",
+    "PlayerTable",
+    "default_player_table",
+    "save_seasons",
+    "load_seasons",
     "Lang",
     "LangId",
     "lang2ids",
     "id2lang",
     "flags",
+    "SessionConfig",
+    "SessionManager",
+    "default_session",
+    "ParsePool",
+    "default_parse_pool",
+    "EpisodesJsCache",
+    "default_episodes_js_cache",
+    "MissingPagesCache",
+    "default_missing_pages",
     "download",
     "multi_download",
     "main",
@@ -1,14 +1,25 @@
-from collections.abc import Sequence
+import asyncio
+from collections.abc import AsyncGenerator, Iterable, Sequence
+from dataclasses import dataclass, replace
+import logging
 import re
 from typing import Any, Literal, cast
 
 from httpx import AsyncClient
 
+from .parsers import has_mature_warning, synopsis_of, text_after_label
 from .utils import remove_some_js_comments
+from .session import get_default_client
+from .singleflight import coalesced_get
+from .parse_pool import ParsePool, default_parse_pool
+from .episode import Episode
 from .season import Season
 from .langs import flags, Lang
 
 
+logger = logging.getLogger(__name__)
+
+
 # Oversight from anime-sama that we should handle
 # 'Animes' instead of 'Anime' seen in Cyberpunk: Edgerunners and Valkyrie Apocalypse
 # 'Autre' instead of 'Autres' seen in Hazbin Hotel
@@ -16,6 +27,20 @@ from .langs import flags, Lang
 Category = Literal["Anime", "Scans", "Film", "Autres"]
 
 
+@dataclass(frozen=True)
+class CatalogueDetails:
+    """Everything read from the page of a catalogue."""
+
+    advancement: str = ""
+    correspondence: str = ""
+    synopsis: str = ""
+    is_mature: bool = False
+    seasons: tuple[Season, ...] = ()
+    # False if the page could not be downloaded (not a 404), the details are
+    # then empty and not kept so the next call try again
+    fetched: bool = True
+
+
 class Catalogue:
     def __init__(
         self,
@@ -27,6 +52,7 @@ class Catalogue:
         languages: set[Lang] | None = None,
         image_url: str = "",
         client: AsyncClient | None = None,
+        parse_pool: ParsePool | None = None,
     ) -> None:
         if alternative_names is None:
             alternative_names = []
@@ -39,80 +65,134 @@ class Catalogue:
 
         self.url = url + "/" if url[-1] != "/" else url
         self.site_url = "/".join(url.split("/")[:3]) + "/"
-        self.client = client or AsyncClient()
+        self.client = client or get_default_client()
+        self.parse_pool = parse_pool or default_parse_pool
 
         self.name = name or url.split("/")[-2]
 
         self._page: str | None = None
+        self._details: CatalogueDetails | None = None
         self.alternative_names = alternative_names
         self.genres = genres
         self.categories = categories
         self.languages = languages
         self.image_url = image_url
 
+    def __getstate__(self) -> dict[str, Any]:
+        # The client and the pool cannot be pickled and the page is not needed
+        # anymore once parsed
+        state = self.__dict__.copy()
+        del state["client"], state["parse_pool"]
+        state["_page"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.client = get_default_client()
+        self.parse_pool = default_parse_pool
+
     async def page(self) -> str:
         if self._page is not None:
             return self._page
 
-        response = await self.client.get(self.url)
+        response = await coalesced_get(self.client, self.url)
 
-        if not response.is_success:
+        if response.status_code == 404:
             self._page = ""
+        elif not response.is_success:
+            # Do not remember transient errors, the next call will try again
+            logger.warning("Cannot get %s (status %s)", self.url, response.status_code)
+            return ""
         else:
             self._page = response.text
 
         return self._page
 
-    async def seasons(self) -> list[Season]:
-        page_without_comments = remove_some_js_comments(string=await self.page())
-
+    def _seasons_from(self, page_without_comments: str) -> tuple[Season, ...]:
         seasons = re.findall(
             r'panneauAnime\("(.+?)", *"(.+?)(?:vostfr|vf)"\);', page_without_comments
         )
 
-        seasons = [
+        return tuple(
             Season(
                 url=self.url + link,
                 name=name,
                 serie_name=self.name,
                 client=self.client,
+                languages=self.languages,
+                parse_pool=self.parse_pool,
             )
             for name, link in seasons
-        ]
+        )
 
-        return seasons
+    async def details(self) -> CatalogueDetails:
+        """Parse the page once, the result is kept."""
+        if self._details is not None:
+            return self._details
+
+        page = await self.page()
+        details = await self.parse_pool.run(len(page), self._parse_details, page)
+        for season in details.seasons:
+            # Seasons parsed in another process come back with the defaults
+            season.client = self.client
+            season.parse_pool = self.parse_pool
+
+        if self._page is None:
+            return replace(details, fetched=False)
+        self._details = details
+        return details
+
+    def _parse_details(self, page: str) -> CatalogueDetails:
+        return CatalogueDetails(
+            advancement=text_after_label(page, "Avancement"),
+            correspondence=text_after_label(page, "Correspondance"),
+            synopsis=synopsis_of(page),
+            is_mature=has_mature_warning(page),
+            seasons=self._seasons_from(remove_some_js_comments(page)),
+        )
 
-    async def advancement(self) -> str:
-        search = cast(list[str], re.findall(r"Avancement.+?>(.+?)<", await self.page()))
+    async def seasons(self) -> list[Season]:
+        return list((await self.details()).seasons)
 
-        if not search:
-            return ""
+    async def all_episodes(
+        self,
+        seasons: Sequence[Season] | None = None,
+        concurrency: int = 4,
+        full_probe: bool = False,
+    ) -> AsyncGenerator[tuple[Season, list[Episode]]]:
+        """
+        Yield each season with its episodes as soon as they are known, with at
+        most concurrency seasons resolved at the same time.
+        seasons can be a selection of the seasons of the catalogue, all by default.
+        """
+        if seasons is None:
+            seasons = await self.seasons()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def resolve(season: Season) -> tuple[Season, list[Episode]]:
+            async with semaphore:
+                return season, await season.episodes(full_probe)
+
+        tasks = [asyncio.ensure_future(resolve(season)) for season in seasons]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
 
-        return search[0]
+    async def advancement(self) -> str:
+        return (await self.details()).advancement
 
     async def correspondence(self) -> str:
-        search = cast(
-            list[str], re.findall(r"Correspondance.+?>(.+?)<", await self.page())
-        )
-
-        if not search:
-            return ""
-
-        return search[0]
+        return (await self.details()).correspondence
 
     async def synopsis(self) -> str:
-        search = cast(
-            list[str], re.findall(r"Synopsis[\W\w]+?>(.+)<", await self.page())
-        )
-
-        if not search:
-            return ""
+        return (await self.details()).synopsis
 
-        return search[0]
-    
     async def is_mature(self) -> bool:
         """Return True if the catalogue contain a warning about adult content"""
-        return re.search(r'<div class=".*?yellow.*?">[\W\w]+?public averti', await self.page()) is not None
+        return (await self.details()).is_mature
 
     @property
     def is_anime(self) -> bool:
@@ -148,3 +228,22 @@ class Catalogue:
 
     def __hash__(self) -> int:
         return hash(self.url + self.name + "".join(self.alternative_names))
+
+
+async def fill_details(
+    catalogues: Iterable[Catalogue], concurrency: int = 16
+) -> list[CatalogueDetails]:
+    """
+    Get the details of many catalogues with at most concurrency pages
+    downloaded at the same time. They are returned in the same order.
+    """
+    catalogues = list(catalogues)
+    details: list[CatalogueDetails | None] = [None] * len(catalogues)
+    indexes = iter(range(len(catalogues)))
+
+    async def worker() -> None:
+        for index in indexes:
+            details[index] = await catalogues[index].details()
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(catalogues)))))
+    return cast(list[CatalogueDetails], details)
@@ -0,0 +1,206 @@
+from collections.abc import Iterator
+from contextlib import aclosing
+from dataclasses import asdict, dataclass
+import json
+import logging
+from pathlib import Path
+import time
+from typing import Any, cast
+
+from httpx import AsyncClient
+
+from .catalogue import Catalogue, Category
+from .langs import Lang
+from .top_level import AnimeSama
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+
+@dataclass(frozen=True)
+class CatalogueRecord:
+    url: str
+    name: str
+    alternative_names: tuple[str, ...] = ()
+    genres: tuple[str, ...] = ()
+    categories: tuple[Category, ...] = ()
+    languages: tuple[Lang, ...] = ()
+    image_url: str = ""
+
+    @classmethod
+    def from_catalogue(cls, catalogue: Catalogue) -> "CatalogueRecord":
+        return cls(
+            url=catalogue.url,
+            name=catalogue.name,
+            alternative_names=tuple(catalogue.alternative_names),
+            genres=tuple(catalogue.genres),
+            categories=tuple(sorted(catalogue.categories)),
+            languages=tuple(sorted(catalogue.languages)),
+            image_url=catalogue.image_url,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CatalogueRecord":
+        return cls(
+            url=data["url"],
+            name=data["name"],
+            alternative_names=tuple(data.get("alternative_names", ())),
+            genres=tuple(data.get("genres", ())),
+            categories=cast(tuple[Category, ...], tuple(data.get("categories", ()))),
+            languages=cast(tuple[Lang, ...], tuple(data.get("languages", ()))),
+            image_url=data.get("image_url", ""),
+        )
+
+    def to_catalogue(self, client: AsyncClient | None = None) -> Catalogue:
+        return Catalogue(
+            url=self.url,
+            name=self.name,
+            alternative_names=list(self.alternative_names),
+            genres=list(self.genres),
+            categories=set(self.categories),
+            languages=set(self.languages),
+            image_url=self.image_url,
+            client=client,
+        )
+
+
+class CatalogueIndex:
+    """
+    A local snapshot of every catalogue of the site, stored as a JSON file.
+    Records are kept in the site order.
+    """
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path).expanduser() if path is not None else None
+        self.updated_at = 0.0
+        self.fully_refreshed_at = 0.0
+        self._records: dict[str, CatalogueRecord] = {}
+
+        if self.path is not None and self.path.is_file():
+            self.load()
+
+    def load(self) -> None:
+        assert self.path is not None
+        data = json.loads(self.path.read_text("utf-8"))
+        if data.get("version") != INDEX_VERSION:
+            logger.warning("Ignoring %s, unsupported version", self.path)
+            return
+
+        self.updated_at = data["updated_at"]
+        self.fully_refreshed_at = data.get("fully_refreshed_at", 0.0)
+        self._records = {
+            record["url"]: CatalogueRecord.from_dict(record)
+            for record in data["catalogues"]
+        }
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(self.path.suffix + ".tmp")
+        temporary.write_text(
+            json.dumps(
+                {
+                    "version": INDEX_VERSION,
+                    "updated_at": self.updated_at,
+                    "fully_refreshed_at": self.fully_refreshed_at,
+                    "catalogues": [asdict(record) for record in self._records.values()],
+                },
+                ensure_ascii=False,
+            ),
+            "utf-8",
+        )
+        temporary.replace(self.path)
+
+    async def refresh(
+        self,
+        anime_sama: AnimeSama,
+        full: bool = False,
+        prefetch: int = 4,
+        stable_pages: int = 1,
+    ) -> int:
+        """
+        Crawl the results pages and update the snapshot. The crawl stop after
+        stable_pages consecutive pages without new or changed entries unless full
+        is True, in which case catalogues that disappeared are also removed.
+        If a results page cannot be downloaded, no catalogue is removed and the
+        refresh is not counted as a full one.
+        Return the number of new or changed catalogues.
+        """
+        changed = 0
+        unchanged_pages = 0
+        failed_pages = 0
+        seen: dict[str, CatalogueRecord] = {}
+
+        async with aclosing(anime_sama.search_pages_iter("", prefetch)) as pages:
+            async for catalogues in pages:
+                if catalogues is None:
+                    failed_pages += 1
+                    continue
+                page_changed = 0
+                for catalogue in catalogues:
+                    record = CatalogueRecord.from_catalogue(catalogue)
+                    seen[record.url] = record
+                    if self._records.get(record.url) != record:
+                        page_changed += 1
+
+                changed += page_changed
+                unchanged_pages = 0 if page_changed else unchanged_pages + 1
+                if not full and self._records and unchanged_pages >= stable_pages:
+                    break
+
+        if full and not failed_pages:
+            self._records = seen
+            self.fully_refreshed_at = time.time()
+        else:
+            # Crawled entries take the site order, the others keep their place after
+            self._records = seen | {
+                url: record for url, record in self._records.items() if url not in seen
+            }
+
+        self.updated_at = time.time()
+        self.save()
+        if failed_pages:
+            logger.warning(
+                "Catalogue index partially refreshed, %s pages could not be fetched",
+                failed_pages,
+            )
+        logger.info("Catalogue index refreshed: %s new or changed entries", changed)
+        return changed
+
+    async def refresh_if_stale(
+        self,
+        anime_sama: AnimeSama,
+        max_age: float = 3600.0,
+        full_max_age: float = 7 * 24 * 3600.0,
+        prefetch: int = 4,
+    ) -> int:
+        """
+        Refresh the index if it was updated more than max_age seconds ago, fully
+        if it is empty or was fully refreshed more than full_max_age seconds ago.
+        Return the number of new or changed catalogues.
+        """
+        now = time.time()
+        if not self._records or now - self.fully_refreshed_at >= full_max_age:
+            return await self.refresh(anime_sama, full=True, prefetch=prefetch)
+        if now - self.updated_at >= max_age:
+            return await self.refresh(anime_sama, prefetch=prefetch)
+        return 0
+
+    def get(self, url: str) -> CatalogueRecord | None:
+        return self._records.get(url)
+
+    def catalogues(self, client: AsyncClient | None = None) -> list[Catalogue]:
+        return [record.to_catalogue(client) for record in self._records.values()]
+
+    def __iter__(self) -> Iterator[CatalogueRecord]:
+        return iter(self._records.values())
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, url: object) -> bool:
+        return url in self._records
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from pathlib import Path
 
 from rich import get_console
 from rich.logging import RichHandler
@@ -10,6 +11,9 @@ from .config import config
 from .episode_extra_info import convert_with_extra_info
 from .utils import safe_input, select_one, select_range
 
+from ..catalogue import Catalogue
+from ..catalogue_index import CatalogueIndex
+from ..search_engine import CatalogueSearchEngine
 from ..top_level import AnimeSama
 
 console = get_console()
@@ -21,21 +25,46 @@ def spinner(text: str) -> Status:
     return console.status(text, spinner_style="cyan")
 
 
+async def search(query: str) -> list[Catalogue]:
+    anime_sama = AnimeSama(config.url)
+    if not config.catalogue_index:
+        return await anime_sama.search(query)
+
+    # Search in the local snapshot, crawled again only when it is outdated
+    index = CatalogueIndex(Path(config.catalogue_index).expanduser())
+    await index.refresh_if_stale(anime_sama)
+    return CatalogueSearchEngine(index).search(query)
+
+
 async def async_main() -> None:
     query = safe_input("Anime name: \033[0;34m", str)
 
     with spinner(f"Searching for [blue]{query}"):
-        catalogues = await AnimeSama(config.url).search(query)
+        catalogues = await search(query)
     catalogue = select_one(catalogues)
 
     with spinner(f"Getting season list for [blue]{catalogue.name}"):
         seasons = await catalogue.seasons()
-    season = select_one(seasons)
-
-    with spinner(f"Getting episode list for [blue]{season.name}"):
-        episodes = await season.episodes()
+    # select_range can return seasons itself, which cannot be sorted in place
+    selected_seasons = sorted(
+        select_range(seasons, msg="Choose season(s)"), key=seasons.index
+    )
 
-    console.print(f"\n[cyan bold underline]{season.serie_name} - {season.name}")
+    with spinner(
+        f"Getting episode list for [blue]{', '.join(map(str, selected_seasons))}"
+    ):
+        episodes_of = {
+            season.url: episodes
+            async for season, episodes in catalogue.all_episodes(selected_seasons)
+        }
+    episodes = [
+        episode for season in selected_seasons for episode in episodes_of[season.url]
+    ]
+
+    console.print(
+        f"\n[cyan bold underline]{catalogue.name} - "
+        f"{', '.join(season.name for season in selected_seasons)}"
+    )
     selected_episodes = select_range(
         episodes, msg="Choose episode(s)", print_choices=True
     )
@@ -37,6 +37,7 @@ class Config:
     url: str
     players_config: PlayersConfig
     concurrent_downloads: dict[str, int]
+    catalogue_index: str
 
 
 # Load default config
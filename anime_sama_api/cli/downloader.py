@@ -1,6 +1,7 @@
 import random
 import time
 import logging
+from collections.abc import Iterable
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import cast
@@ -27,6 +28,7 @@ from rich.progress import (
 
 from .episode_extra_info import EpisodeWithExtraInfo
 from .error_handeling import YDL_log_filter, reaction_to
+from ..episode import plan_players
 from ..langs import Lang
 from .config import PlayersConfig, config
 
@@ -118,7 +120,9 @@ def download(
     max_retry_time: int = 1024,
     format: str = "",
     format_sort: str = "",
+    players: Iterable[str] | None = None,
 ) -> None:
+    """players are the players to try in order, computed if not given."""
     if not any(episode.warpped.languages.values()):
         logger.error("No player available")
         return
@@ -199,9 +203,12 @@ def download(
         "format_sort": format_sort.split(","),
     }
 
-    for player in episode.warpped.consume_player(
-        prefer_languages, players_config.prefers, players_config.bans
-    ):
+    if players is None:
+        players = episode.warpped.consume_player(
+            prefer_languages, players_config.prefers, players_config.bans
+        )
+
+    for player in players:
         retry_time = 1
         sucess = False
         download_progress.update(me, site=urlparse(player).hostname)
@@ -287,12 +294,22 @@ def multi_download(
     """
     Not sure if you can use this function multiple times
     """
+    plans = plan_players(
+        (
+            episode.warpped if isinstance(episode, EpisodeWithExtraInfo) else episode
+            for episode in episodes
+        ),
+        prefer_languages,
+        players_config.prefers,
+        players_config.bans,
+    )
+
     total_progress.add_task("Downloaded", total=len(episodes))
     with Live(progress, console=console):
         with ThreadPoolExecutor(
             max_workers=concurrent_downloads.get("video", 1)
         ) as executor:
-            for episode in episodes:
+            for episode, players in zip(episodes, plans):
                 executor.submit(
                     download,
                     episode,
@@ -304,4 +321,5 @@ def multi_download(
                     max_retry_time,
                     format,
                     format_sort,
+                    players,
                 )
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""
+A memory-lean storage for the episodes of many seasons.
+Episodes are kept as slotted records of tuples, the player lists identical
+between languages (ie: vj and vostfr) are stored once and Episode objects are
+only built when accessed.
+"""
+
+from collections.abc import Iterable, Iterator, Sequence
+import gc
+import json
+import logging
+from pathlib import Path
+import sys
+from typing import Any, cast, overload
+from urllib.parse import urlsplit
+
+from .episode import Episode, Languages, PlayerPreferences, Players, plan_languages
+from .langs import Lang, LangId
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class PlayerTable:
+    """
+    Canonical instances shared by the seasons: the interned hostnames of the
+    players and the tuples of languages.
+    URLs are not deduplicated across episodes: they rarely repeat and the
+    index would cost more than it saves.
+    """
+
+    __slots__ = ("_lang_ids", "_hostnames")
+
+    def __init__(self) -> None:
+        self._lang_ids: dict[tuple[LangId, ...], tuple[LangId, ...]] = {}
+        self._hostnames: dict[str, str | None] = {}
+
+    def lang_ids(self, lang_ids: Iterable[LangId]) -> tuple[LangId, ...]:
+        lang_ids = tuple(lang_ids)
+        return self._lang_ids.setdefault(lang_ids, lang_ids)
+
+    def hostname(self, url: str) -> str | None:
+        """The interned hostname of url, parsed once for each netloc."""
+        # Keyed by netloc so the table grows with the hosts, not with the URLs
+        netloc = url.partition("//")[2].partition("/")[0]
+        if netloc not in self._hostnames:
+            hostname = urlsplit("//" + netloc).hostname if netloc else None
+            self._hostnames[netloc] = sys.intern(hostname) if hostname else None
+        return self._hostnames[netloc]
+
+
+default_player_table = PlayerTable()
+
+
+class EpisodeRecord:
+    """An episode without its season, the players of languages[i] are players[i]."""
+
+    __slots__ = ("name", "lang_ids", "players")
+
+    def __init__(
+        self,
+        name: str,
+        lang_ids: tuple[LangId, ...],
+        players: tuple[tuple[str, ...], ...],
+    ) -> None:
+        self.name = name
+        self.lang_ids = lang_ids
+        self.players = players
+
+
+class CompactSeason(Sequence[Episode]):
+    """The episodes of a season, stored in a PlayerTable."""
+
+    __slots__ = ("serie_name", "season_name", "table", "records", "url", "filevers")
+
+    def __init__(
+        self,
+        serie_name: str = "",
+        season_name: str = "",
+        records: Iterable[EpisodeRecord] = (),
+        table: PlayerTable | None = None,
+        url: str = "",
+        filevers: dict[LangId, int] | None = None,
+    ) -> None:
+        self.serie_name = serie_name
+        self.season_name = season_name
+        self.table = table or default_player_table
+        self.records = list(records)
+        self.url = url
+        # The filever of the episodes.js the players come from
+        self.filevers = filevers or {}
+
+    @classmethod
+    def from_episodes(
+        cls,
+        episodes: Iterable[Episode],
+        serie_name: str = "",
+        season_name: str = "",
+        table: PlayerTable | None = None,
+    ) -> "CompactSeason":
+        compact = cls(serie_name, season_name, table=table)
+        for episode in episodes:
+            compact.serie_name = compact.serie_name or episode.serie_name
+            compact.season_name = compact.season_name or episode.season_name
+            compact.append(episode)
+        return compact
+
+    def append(self, episode: Episode) -> None:
+        # Identical lists (ie: vj and vostfr) are only stored once
+        shared: dict[tuple[str, ...], tuple[str, ...]] = {}
+        self.records.append(
+            EpisodeRecord(
+                episode._name,
+                self.table.lang_ids(episode.languages),
+                tuple(
+                    shared.setdefault(tuple(players), tuple(players))
+                    for players in episode.languages.values()
+                ),
+            )
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        A JSON-able snapshot. The index of an episode is its position and each
+        distinct list of players is written once.
+        """
+        lang_ids: dict[tuple[LangId, ...], int] = {}
+        players: dict[tuple[str, ...], int] = {}
+        episodes = []
+        for record in self.records:
+            episodes.append(
+                [
+                    record.name,
+                    lang_ids.setdefault(record.lang_ids, len(lang_ids)),
+                    [players.setdefault(urls, len(players)) for urls in record.players],
+                ]
+            )
+
+        return {
+            "version": SNAPSHOT_VERSION,
+            "url": self.url,
+            "serie_name": self.serie_name,
+            "season_name": self.season_name,
+            "filevers": self.filevers,
+            "lang_ids": list(lang_ids),
+            "players": list(players),
+            "episodes": episodes,
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any], table: PlayerTable | None = None
+    ) -> "CompactSeason":
+        """Read back to_dict, the players are used as they were stored."""
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Unsupported season snapshot version {data.get('version')}"
+            )
+
+        compact = cls(
+            data["serie_name"],
+            data["season_name"],
+            table=table,
+            url=data["url"],
+            filevers=data["filevers"],
+        )
+        lang_ids = [
+            compact.table.lang_ids(cast(list[LangId], ids)) for ids in data["lang_ids"]
+        ]
+        players = [tuple(urls) for urls in data["players"]]
+        compact.records = [
+            EpisodeRecord(
+                name,
+                lang_ids[lang_ids_index],
+                tuple(map(players.__getitem__, players_indexes)),
+            )
+            for name, lang_ids_index, players_indexes in data["episodes"]
+        ]
+        return compact
+
+    def _episode(self, index: int) -> Episode:
+        record = self.records[index]
+        return Episode(
+            Languages(
+                [
+                    (lang_id, Players._from_parsed(players))
+                    for lang_id, players in zip(record.lang_ids, record.players)
+                ]
+            ),
+            self.serie_name,
+            self.season_name,
+            record.name,
+            index + 1,
+        )
+
+    def plan_players(
+        self,
+        prefer_languages: Sequence[Lang],
+        prefers: Sequence[str] = (),
+        bans: Iterable[str] = (),
+    ) -> list[list[str]]:
+        """The players to try for each episode, without building the episodes."""
+        return plan_languages(
+            (zip(record.lang_ids, record.players) for record in self.records),
+            prefer_languages,
+            PlayerPreferences(prefers, bans),
+            self.table.hostname,
+        )
+
+    @overload
+    def __getitem__(self, index: int) -> Episode: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Episode]: ...
+
+    def __getitem__(self, index: int | slice) -> Episode | list[Episode]:
+        if isinstance(index, slice):
+            return [self._episode(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("episode index out of range")
+        return self._episode(index)
+
+    def __iter__(self) -> Iterator[Episode]:
+        return (self._episode(index) for index in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return f"CompactSeason({self.serie_name!r}, {self.season_name!r}, {len(self)} episodes)"
+
+
+def save_seasons(seasons: Iterable[CompactSeason], path: Path | str) -> None:
+    """Write the seasons in a single JSON file, atomically."""
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(path.suffix + ".tmp")
+    temporary.write_text(
+        json.dumps(
+            {
+                "version": SNAPSHOT_VERSION,
+                "seasons": [season.to_dict() for season in seasons],
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ),
+        "utf-8",
+    )
+    temporary.replace(path)
+
+
+def load_seasons(
+    path: Path | str, table: PlayerTable | None = None
+) -> list[CompactSeason]:
+    """Read the seasons written by save_seasons, [] if the version is unknown."""
+    path = Path(path).expanduser()
+    # Only new objects that cannot be garbage are created, the collector would
+    # just walk them over and over
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        data = json.loads(path.read_text("utf-8"))
+        if data.get("version") != SNAPSHOT_VERSION:
+            logger.warning("Ignoring %s, unsupported version", path)
+            return []
+        return [CompactSeason.from_dict(season, table) for season in data["seasons"]]
+    finally:
+        if gc_enabled:
+            gc.enable()
@@ -0,0 +1,531 @@
+"""
+A resumable crawl of the whole site: catalogue -> season -> episode -> players.
+The stages are connected by bounded queues so a slow stage (usually the
+output) slows down the others instead of piling up results in memory.
+A journal records each season written, an interrupted crawl resume after the
+last one and the output is cut back to match it. A crawl that did not miss
+anything is marked as finished, the next one start from scratch.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Sequence
+from contextlib import aclosing
+from dataclasses import asdict, dataclass, field
+import json
+import logging
+from pathlib import Path
+import sqlite3
+from typing import Any, Protocol
+
+from .catalogue import Catalogue
+from .episode import Episode
+from .parse_pool import ParsePool
+from .season import Season
+from .top_level import AnimeSama
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CrawlRecord:
+    """An episode and its players, as written by the sinks."""
+
+    catalogue_url: str
+    serie_name: str
+    season_url: str
+    season_name: str
+    index: int
+    name: str
+    # lang_id -> players
+    languages: dict[str, list[str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_episode(
+        cls, catalogue: Catalogue, season: Season, episode: Episode
+    ) -> "CrawlRecord":
+        return cls(
+            catalogue_url=catalogue.url,
+            serie_name=catalogue.name,
+            season_url=season.url,
+            season_name=season.name,
+            index=episode.index,
+            name=episode.name,
+            languages={
+                lang_id: list(players) for lang_id, players in episode.languages.items()
+            },
+        )
+
+
+@dataclass
+class CrawlStats:
+    catalogues: int = 0
+    seasons: int = 0
+    episodes: int = 0
+    # Already done in a previous run
+    skipped_catalogues: int = 0
+    skipped_seasons: int = 0
+    # Will be tried again by the next run
+    failed_pages: int = 0
+    failed_catalogues: int = 0
+    failed_seasons: int = 0
+
+    @property
+    def complete(self) -> bool:
+        """True if nothing was left for the next run."""
+        return not (self.failed_pages or self.failed_catalogues or self.failed_seasons)
+
+
+class CrawlSink(Protocol):
+    """Where the records go. The records of a season are written together."""
+
+    def write(self, records: list[CrawlRecord]) -> None: ...
+
+    def checkpoint(self) -> int | None:
+        """Make what was written durable, return a position to restore later."""
+
+    def restore(self, position: int | None) -> None:
+        """Forget what was written after the last checkpoint of a previous run."""
+
+    def reset(self) -> None:
+        """Forget everything, for a new crawl."""
+
+    def close(self) -> None: ...
+
+
+class JsonLinesSink:
+    """One JSON object per episode, the position is the size of the file."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+
+    def write(self, records: list[CrawlRecord]) -> None:
+        self._file.write(
+            b"".join(
+                json.dumps(asdict(record), ensure_ascii=False).encode() + b"\n"
+                for record in records
+            )
+        )
+
+    def checkpoint(self) -> int:
+        self._file.flush()
+        return self._file.tell()
+
+    def restore(self, position: int | None) -> None:
+        self._file.truncate(position or 0)
+        self._file.seek(0, 2)
+
+    def reset(self) -> None:
+        self.restore(None)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SQLiteSink:
+    """
+    The episodes and their players in two tables. A season is replaced when
+    written again so nothing is duplicated, a checkpoint is a commit.
+    """
+
+    def __init__(self, path: Path | str, timeout: float = 5.0) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # timeout is how long to wait for another process writing the database
+        self.connection = sqlite3.connect(self.path, timeout=timeout)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS episodes (
+                season_url TEXT NOT NULL,
+                episode_index INTEGER NOT NULL,
+                catalogue_url TEXT NOT NULL,
+                serie_name TEXT NOT NULL,
+                season_name TEXT NOT NULL,
+                name TEXT NOT NULL,
+                PRIMARY KEY (season_url, episode_index)
+            );
+            CREATE TABLE IF NOT EXISTS players (
+                season_url TEXT NOT NULL,
+                episode_index INTEGER NOT NULL,
+                lang_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (season_url, episode_index, lang_id, position)
+            );
+            """
+        )
+
+    def write(self, records: list[CrawlRecord]) -> None:
+        for season_url in {record.season_url for record in records}:
+            self.connection.execute(
+                "DELETE FROM episodes WHERE season_url = ?", (season_url,)
+            )
+            self.connection.execute(
+                "DELETE FROM players WHERE season_url = ?", (season_url,)
+            )
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    record.season_url,
+                    record.index,
+                    record.catalogue_url,
+                    record.serie_name,
+                    record.season_name,
+                    record.name,
+                )
+                for record in records
+            ),
+        )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO players VALUES (?, ?, ?, ?, ?)",
+            (
+                (record.season_url, record.index, lang_id, position, url)
+                for record in records
+                for lang_id, players in record.languages.items()
+                for position, url in enumerate(players)
+            ),
+        )
+
+    def checkpoint(self) -> None:
+        self.connection.commit()
+
+    def restore(self, position: int | None) -> None:
+        # Uncommitted writes never reached the file
+        pass
+
+    def reset(self) -> None:
+        self.connection.execute("DELETE FROM episodes")
+        self.connection.execute("DELETE FROM players")
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def sink_for(path: Path | str) -> CrawlSink:
+    """A SQLite sink for .db, .sqlite and .sqlite3 files, JSON Lines otherwise."""
+    if Path(path).suffix in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteSink(path)
+    return JsonLinesSink(path)
+
+
+class CrawlJournal:
+    """
+    Append-only JSON Lines file of what is done, with the sink position after
+    each season. The seasons of a catalogue are forgotten once it is done, only
+    its URL is kept. The last entry of a complete crawl mark it as finished.
+    """
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path).expanduser() if path is not None else None
+        self.position: int | None = None
+        self.finished = False
+        self._catalogues: set[str] = set()
+        self._seasons: dict[str, set[str]] = {}
+
+        if self.path is not None and self.path.is_file():
+            self._load()
+
+    def _load(self) -> None:
+        assert self.path is not None
+        with open(self.path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last line of an interrupted write
+                    break
+                match entry:
+                    case ["season", catalogue_url, season_url, position]:
+                        self._seasons.setdefault(catalogue_url, set()).add(season_url)
+                        self.position = position
+                    case ["catalogue", catalogue_url]:
+                        self._catalogues.add(catalogue_url)
+                        self._seasons.pop(catalogue_url, None)
+                    case ["finished"]:
+                        self.finished = True
+
+    def _write(self, entry: list[Any]) -> None:
+        if self.path is None:
+            return
+        with open(self.path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(entry) + "\n")
+
+    @property
+    def resumed(self) -> bool:
+        """True if there is an unfinished crawl to resume."""
+        return bool(self._catalogues or self._seasons) and not self.finished
+
+    def is_catalogue_done(self, catalogue_url: str) -> bool:
+        return catalogue_url in self._catalogues
+
+    def is_season_done(self, catalogue_url: str, season_url: str) -> bool:
+        return season_url in self._seasons.get(catalogue_url, ())
+
+    def season_done(
+        self, catalogue_url: str, season_url: str, position: int | None
+    ) -> None:
+        self._seasons.setdefault(catalogue_url, set()).add(season_url)
+        self.position = position
+        self._write(["season", catalogue_url, season_url, position])
+
+    def catalogue_done(self, catalogue_url: str) -> None:
+        self._catalogues.add(catalogue_url)
+        self._seasons.pop(catalogue_url, None)
+        self._write(["catalogue", catalogue_url])
+
+    def finish(self) -> None:
+        self.finished = True
+        self._write(["finished"])
+
+    def clear(self) -> None:
+        self.position = None
+        self.finished = False
+        self._catalogues.clear()
+        self._seasons.clear()
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+@dataclass
+class _Seasons:
+    """Sent to the output before the seasons of a catalogue are queued."""
+
+    catalogue: Catalogue
+    count: int
+
+
+@dataclass
+class _Episodes:
+    catalogue: Catalogue
+    season: Season
+    episodes: list[Episode] | None  # None if the season failed
+
+
+class Crawler:
+    """
+    Crawl every catalogue of the site into a sink:
+    catalogues -> catalogue workers -> season workers -> writer.
+    Each queue hold at most queue_size items. With parse_processes, the
+    catalogues and seasons are parsed in a pool of processes of the crawler
+    (None for one process per core).
+    """
+
+    def __init__(
+        self,
+        anime_sama: AnimeSama,
+        sink: CrawlSink,
+        journal: CrawlJournal | None = None,
+        catalogue_workers: int = 4,
+        season_workers: int = 8,
+        queue_size: int = 32,
+        prefetch: int = 4,
+        full_probe: bool = False,
+        parse_processes: int | None = 0,
+    ) -> None:
+        self.anime_sama = anime_sama
+        self.sink = sink
+        self.journal = journal or CrawlJournal()
+        self.catalogue_workers = catalogue_workers
+        self.season_workers = season_workers
+        self.queue_size = queue_size
+        self.prefetch = prefetch
+        self.full_probe = full_probe
+        self.parse_pool = ParsePool(parse_processes)
+        self.stats = CrawlStats()
+
+    async def run(self, resume: bool = True) -> CrawlStats:
+        """
+        Crawl the site, continuing the unfinished journaled crawl if resume is
+        True. The results pages, catalogues and seasons that failed are left for
+        the next run, otherwise the crawl is marked as finished.
+        """
+        if resume and self.journal.resumed:
+            self.sink.restore(self.journal.position)
+            logger.info("Resuming the crawl from %s", self.journal.path)
+        else:
+            self.journal.clear()
+            self.sink.reset()
+
+        catalogues: asyncio.Queue[Catalogue] = asyncio.Queue(self.queue_size)
+        seasons: asyncio.Queue[tuple[Catalogue, Season]] = asyncio.Queue(
+            self.queue_size
+        )
+        output: asyncio.Queue[_Seasons | _Episodes] = asyncio.Queue(self.queue_size)
+
+        workers = [
+            asyncio.ensure_future(self._catalogue_worker(catalogues, seasons, output))
+            for _ in range(self.catalogue_workers)
+        ]
+        workers += [
+            asyncio.ensure_future(self._season_worker(seasons, output))
+            for _ in range(self.season_workers)
+        ]
+        workers.append(asyncio.ensure_future(self._writer(output)))
+
+        try:
+            await self._supervise(self._produce(catalogues), workers)
+            # Each stage is drained before the next one
+            for queue in (catalogues, seasons, output):
+                await self._supervise(queue.join(), workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.parse_pool.shutdown()
+
+        if self.stats.complete:
+            self.journal.finish()
+            logger.info("Crawl finished: %s", self.stats)
+        else:
+            logger.info("Crawl incomplete, resume it later: %s", self.stats)
+        return self.stats
+
+    @staticmethod
+    async def _supervise(
+        awaitable: Awaitable[None], workers: Sequence[asyncio.Future[None]]
+    ) -> None:
+        """
+        Wait for awaitable unless a worker stop first, which only happen when
+        it crashed: its exception is raised instead of waiting forever.
+        """
+        task = asyncio.ensure_future(awaitable)
+        try:
+            await asyncio.wait([task, *workers], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            task.cancel()
+        for worker in workers:
+            if worker.done():
+                worker.result()
+        task.result()
+
+    async def _produce(self, catalogues: asyncio.Queue[Catalogue]) -> None:
+        async with aclosing(
+            self.anime_sama.search_pages_iter("", self.prefetch)
+        ) as pages:
+            async for page in pages:
+                if page is None:
+                    self.stats.failed_pages += 1
+                    continue
+                for catalogue in page:
+                    if self.journal.is_catalogue_done(catalogue.url):
+                        self.stats.skipped_catalogues += 1
+                        continue
+                    # Its seasons get the pool too
+                    catalogue.parse_pool = self.parse_pool
+                    await catalogues.put(catalogue)
+
+    async def _catalogue_worker(
+        self,
+        catalogues: asyncio.Queue[Catalogue],
+        seasons: asyncio.Queue[tuple[Catalogue, Season]],
+        output: asyncio.Queue[_Seasons | _Episodes],
+    ) -> None:
+        while True:
+            catalogue = await catalogues.get()
+            try:
+                try:
+                    details = await catalogue.details()
+                except Exception as exception:
+                    logger.warning("Cannot crawl %s: %r", catalogue.url, exception)
+                    self.stats.failed_catalogues += 1
+                    continue
+                if not details.fetched:
+                    self.stats.failed_catalogues += 1
+                    continue
+
+                todo = [
+                    season
+                    for season in details.seasons
+                    if not self.journal.is_season_done(catalogue.url, season.url)
+                ]
+                self.stats.skipped_seasons += len(details.seasons) - len(todo)
+                await output.put(_Seasons(catalogue, len(todo)))
+                for season in todo:
+                    await seasons.put((catalogue, season))
+            finally:
+                catalogues.task_done()
+
+    async def _season_worker(
+        self,
+        seasons: asyncio.Queue[tuple[Catalogue, Season]],
+        output: asyncio.Queue[_Seasons | _Episodes],
+    ) -> None:
+        while True:
+            catalogue, season = await seasons.get()
+            try:
+                try:
+                    episodes: list[Episode] | None = await season.episodes(
+                        self.full_probe
+                    )
+                except Exception as exception:
+                    logger.warning("Cannot crawl %s: %r", season.url, exception)
+                    episodes = None
+                await output.put(_Episodes(catalogue, season, episodes))
+            finally:
+                seasons.task_done()
+
+    async def _writer(self, output: asyncio.Queue[_Seasons | _Episodes]) -> None:
+        # Seasons left to write for each catalogue being crawled
+        remaining: dict[str, int] = {}
+        failed: set[str] = set()
+
+        while True:
+            item = await output.get()
+            try:
+                catalogue_url = item.catalogue.url
+                if isinstance(item, _Seasons):
+                    remaining[catalogue_url] = (
+                        remaining.get(catalogue_url, 0) + item.count
+                    )
+                elif item.episodes is None:
+                    self.stats.failed_seasons += 1
+                    failed.add(catalogue_url)
+                    remaining[catalogue_url] -= 1
+                else:
+                    self.sink.write(
+                        [
+                            CrawlRecord.from_episode(item.catalogue, item.season, ep)
+                            for ep in item.episodes
+                        ]
+                    )
+                    position = self.sink.checkpoint()
+                    self.journal.season_done(catalogue_url, item.season.url, position)
+                    self.stats.seasons += 1
+                    self.stats.episodes += len(item.episodes)
+                    remaining[catalogue_url] -= 1
+
+                if remaining[catalogue_url] == 0:
+                    del remaining[catalogue_url]
+                    if catalogue_url in failed:
+                        # Its done seasons are journaled, the others are retried
+                        failed.discard(catalogue_url)
+                    else:
+                        self.journal.catalogue_done(catalogue_url)
+                        self.stats.catalogues += 1
+            finally:
+                output.task_done()
+
+
+async def crawl(
+    anime_sama: AnimeSama,
+    output: Path | str,
+    resume: bool = True,
+    **kwargs: Any,
+) -> CrawlStats:
+    """
+    Crawl the site into output (JSON Lines, or SQLite for .db/.sqlite files).
+    The journal is kept next to it as output.journal. The other arguments are
+    those of Crawler.
+    """
+    output = Path(output).expanduser()
+    sink = sink_for(output)
+    journal = CrawlJournal(output.with_name(output.name + ".journal"))
+    try:
+        return await Crawler(anime_sama, sink, journal, **kwargs).run(resume)
+    finally:
+        sink.close()
@@ -0,0 +1,413 @@
+"""
+A crawl shared by several processes, on one machine or on several ones using
+a shared directory. The work (the catalogue listing, each catalogue and each
+season) is kept in a SQLite queue where items are leased for a limited time:
+the items of a worker that died are handed out again once their lease expired,
+while a live worker renews the leases of the items it is working on.
+The results go in the same database with SQLiteSink, a season written twice
+simply replaces itself.
+"""
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from dataclasses import asdict, dataclass
+import json
+import logging
+import os
+from pathlib import Path
+import socket
+import sqlite3
+import time
+from typing import Any, TypeVar, cast
+import uuid
+
+from .catalogue import Catalogue
+from .catalogue_index import CatalogueRecord
+from .crawler import CrawlRecord, CrawlStats, SQLiteSink
+from .langs import Lang
+from .season import Season
+from .top_level import AnimeSama
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    kind: str
+    url: str
+    payload: dict[str, Any]
+    attempts: int
+    # Identify this lease, an expired lease cannot be completed anymore
+    lease_id: str
+
+
+class WorkQueue:
+    """
+    Work items identified by (kind, url), adding one twice does nothing.
+    Each item is pending, leased until a given time, done or failed (after
+    max_attempts unsuccessful leases).
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        lease_time: float = 600.0,
+        max_attempts: int = 3,
+        timeout: float = 30.0,
+    ) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+        # Transactions are explicit, a lease must be taken atomically
+        self.connection = sqlite3.connect(
+            self.path, timeout=timeout, isolation_level=None
+        )
+        try:
+            # Readers and the writer do not block each other
+            self.connection.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            # The busy timeout does not apply, another worker is setting it up
+            pass
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS work_items (
+                kind TEXT NOT NULL,
+                url TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_id TEXT,
+                leased_by TEXT,
+                lease_until REAL,
+                error TEXT,
+                PRIMARY KEY (kind, url)
+            )
+            """
+        )
+        # So lease() finds the next item without scanning and sorting the table
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS work_items_leased "
+            "ON work_items (status, lease_until)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS work_items_pending "
+            "ON work_items (status, kind = 'season')"
+        )
+
+    def add(self, kind: str, url: str, payload: dict[str, Any] | None = None) -> bool:
+        """Return False if the item was already known."""
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO work_items (kind, url, payload) VALUES (?, ?, ?)",
+            (kind, url, json.dumps(payload or {}, ensure_ascii=False)),
+        )
+        return cursor.rowcount == 1
+
+    def lease(self, worker: str) -> WorkItem | None:
+        """
+        Lease an item whose lease expired, or else a pending one, for lease_time
+        seconds. Seasons come last so the catalogues are quickly spread between
+        workers.
+        """
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = self._next_item(now)
+                if row is None:
+                    self.connection.execute("COMMIT")
+                    return None
+
+                kind, url, payload, attempts = row
+                if attempts < self.max_attempts:
+                    break
+                # Its last lease expired, the worker probably died on it
+                self._set_failed(kind, url, "lease expired")
+
+            lease_id = uuid.uuid4().hex
+            self.connection.execute(
+                """
+                UPDATE work_items SET status = 'leased', attempts = attempts + 1,
+                    lease_id = ?, leased_by = ?, lease_until = ?
+                WHERE kind = ? AND url = ?
+                """,
+                (lease_id, worker, now + self.lease_time, kind, url),
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        return WorkItem(kind, url, json.loads(payload), attempts + 1, lease_id)
+
+    def _next_item(self, now: float) -> tuple[str, str, str, int] | None:
+        row = self.connection.execute(
+            """
+            SELECT kind, url, payload, attempts FROM work_items
+            WHERE status = 'leased' AND lease_until < ?
+            LIMIT 1
+            """,
+            (now,),
+        ).fetchone()
+        if row is None:
+            row = self.connection.execute(
+                """
+                SELECT kind, url, payload, attempts FROM work_items
+                WHERE status = 'pending'
+                ORDER BY kind = 'season', rowid
+                LIMIT 1
+                """
+            ).fetchone()
+        return row
+
+    def complete(self, item: WorkItem) -> bool:
+        """Return False if the lease was lost, the item was then given to another."""
+        cursor = self.connection.execute(
+            """
+            UPDATE work_items SET status = 'done', lease_until = NULL
+            WHERE kind = ? AND url = ? AND lease_id = ?
+            """,
+            (item.kind, item.url, item.lease_id),
+        )
+        return cursor.rowcount == 1
+
+    def renew(self, item: WorkItem) -> bool:
+        """Extend the lease of an item for lease_time seconds, False if it was lost."""
+        cursor = self.connection.execute(
+            """
+            UPDATE work_items SET lease_until = ?
+            WHERE kind = ? AND url = ? AND lease_id = ? AND status = 'leased'
+            """,
+            (time.time() + self.lease_time, item.kind, item.url, item.lease_id),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, item: WorkItem, error: str) -> None:
+        """Give back an item that could not be done, it fails after max_attempts."""
+        if item.attempts >= self.max_attempts:
+            self._set_failed(item.kind, item.url, error, item.lease_id)
+            return
+        self.connection.execute(
+            """
+            UPDATE work_items SET status = 'pending', lease_until = NULL, error = ?
+            WHERE kind = ? AND url = ? AND lease_id = ?
+            """,
+            (error, item.kind, item.url, item.lease_id),
+        )
+
+    def _set_failed(
+        self, kind: str, url: str, error: str, lease_id: str | None = None
+    ) -> None:
+        logger.warning("Giving up on %s %s: %s", kind, url, error)
+        self.connection.execute(
+            """
+            UPDATE work_items SET status = 'failed', lease_until = NULL, error = ?
+            WHERE kind = ? AND url = ? AND (? IS NULL OR lease_id = ?)
+            """,
+            (error, kind, url, lease_id, lease_id),
+        )
+
+    def unfinished(self) -> int:
+        """The number of items pending or leased."""
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM work_items WHERE status IN ('pending', 'leased')"
+        ).fetchone()[0]
+
+    def counts(self) -> dict[tuple[str, str], int]:
+        """The number of items for each (kind, status)."""
+        return {
+            (kind, status): count
+            for kind, status, count in self.connection.execute(
+                "SELECT kind, status, COUNT(*) FROM work_items GROUP BY kind, status"
+            )
+        }
+
+    def requeue(
+        self, kinds: tuple[str, ...] = ("listing", "catalogue", "season")
+    ) -> None:
+        """Make the done and failed items of kinds pending again, to refresh them."""
+        self.connection.executemany(
+            """
+            UPDATE work_items SET status = 'pending', attempts = 0, error = NULL
+            WHERE kind = ? AND status IN ('done', 'failed')
+            """,
+            ((kind,) for kind in kinds),
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class DistributedCrawler:
+    """
+    A worker of a crawl shared through the database at path. Every worker
+    runs the same code and adds the listing of the site, which is kept once.
+    run() return once nothing is pending or leased anymore.
+    The database is only used from a dedicated thread, so waiting for a lock
+    held by another worker does not block the event loop.
+    """
+
+    def __init__(
+        self,
+        anime_sama: AnimeSama,
+        path: Path | str,
+        worker_id: str | None = None,
+        concurrency: int = 4,
+        lease_time: float = 600.0,
+        max_attempts: int = 3,
+        poll_interval: float = 1.0,
+        prefetch: int = 4,
+        full_probe: bool = False,
+    ) -> None:
+        self.anime_sama = anime_sama
+        self._database = ThreadPoolExecutor(1, thread_name_prefix="crawl-database")
+        # Created in that thread, sqlite3 connections stay in their thread
+        self.queue = self._database.submit(
+            WorkQueue, path, lease_time, max_attempts
+        ).result()
+        self.sink = self._database.submit(SQLiteSink, path, 30.0).result()
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.prefetch = prefetch
+        self.full_probe = full_probe
+        self.stats = CrawlStats()
+
+    async def _in_database(self, function: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._database, function, *args
+        )
+
+    async def run(self) -> CrawlStats:
+        try:
+            await self._in_database(self.queue.add, "listing", self.anime_sama.site_url)
+            await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+        finally:
+            await self._in_database(self.queue.close)
+            await self._in_database(self.sink.close)
+            self._database.shutdown()
+        logger.info("Worker %s finished: %s", self.worker_id, self.stats)
+        return self.stats
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._in_database(self.queue.lease, self.worker_id)
+            if item is None:
+                if not await self._in_database(self.queue.unfinished):
+                    return
+                # Other workers are busy, their items may be released or expire
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            keeping = asyncio.ensure_future(self._keep_lease(item))
+            try:
+                await self._process(item)
+            except Exception as exception:
+                logger.warning("Cannot crawl %s: %r", item.url, exception)
+                await self._in_database(self.queue.release, item, repr(exception))
+                if item.kind == "season":
+                    self.stats.failed_seasons += 1
+                else:
+                    self.stats.failed_catalogues += 1
+                continue
+            finally:
+                keeping.cancel()
+
+            if not await self._in_database(self.queue.complete, item):
+                logger.info("The lease of %s expired while crawling it", item.url)
+
+    async def _keep_lease(self, item: WorkItem) -> None:
+        # A long listing must not be handed out again while it runs
+        while True:
+            await asyncio.sleep(self.queue.lease_time / 3)
+            if not await self._in_database(self.queue.renew, item):
+                return
+
+    async def _process(self, item: WorkItem) -> None:
+        match item.kind:
+            case "listing":
+                await self._list_catalogues()
+            case "catalogue":
+                await self._crawl_catalogue(item)
+            case "season":
+                await self._crawl_season(item)
+            case _:
+                raise ValueError(f"Unknown work item kind {item.kind!r}")
+
+    async def _list_catalogues(self) -> None:
+        failed_pages = 0
+        async with aclosing(
+            self.anime_sama.search_pages_iter("", self.prefetch)
+        ) as pages:
+            async for catalogues in pages:
+                if catalogues is None:
+                    failed_pages += 1
+                    continue
+                for catalogue in catalogues:
+                    record = CatalogueRecord.from_catalogue(catalogue)
+                    await self._in_database(
+                        self.queue.add, "catalogue", catalogue.url, asdict(record)
+                    )
+
+        # Released to be listed again, the catalogues already added are kept
+        if failed_pages:
+            raise ConnectionError(f"Cannot get {failed_pages} results pages")
+
+    async def _crawl_catalogue(self, item: WorkItem) -> None:
+        catalogue = CatalogueRecord.from_dict(item.payload).to_catalogue(
+            self.anime_sama.client
+        )
+        details = await catalogue.details()
+        if not details.fetched:
+            raise ConnectionError(f"Cannot get {catalogue.url}")
+
+        def add_seasons() -> None:
+            for season in details.seasons:
+                self.queue.add(
+                    "season",
+                    season.url,
+                    {
+                        "catalogue_url": catalogue.url,
+                        "serie_name": catalogue.name,
+                        "name": season.name,
+                        "languages": sorted(catalogue.languages),
+                    },
+                )
+
+        await self._in_database(add_seasons)
+        self.stats.catalogues += 1
+
+    async def _crawl_season(self, item: WorkItem) -> None:
+        payload = item.payload
+        season = Season(
+            item.url,
+            name=payload["name"],
+            serie_name=payload["serie_name"],
+            client=self.anime_sama.client,
+            languages=cast(set[Lang], set(payload["languages"])),
+        )
+        catalogue = Catalogue(
+            payload["catalogue_url"],
+            name=payload["serie_name"],
+            client=self.anime_sama.client,
+        )
+        episodes = await season.episodes(self.full_probe)
+
+        records = [CrawlRecord.from_episode(catalogue, season, ep) for ep in episodes]
+
+        def write() -> None:
+            self.sink.write(records)
+            self.sink.checkpoint()
+
+        await self._in_database(write)
+        self.stats.seasons += 1
+        self.stats.episodes += len(episodes)
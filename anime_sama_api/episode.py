@@ -1,51 +1,108 @@
-from collections.abc import Generator, Sequence
+from collections.abc import Callable, Generator, Iterable, Sequence
 import re
 import logging
 from dataclasses import dataclass
+from operator import itemgetter
 from typing import Any
-from urllib.parse import urlparse
+from urllib.parse import urlsplit
 
 from .langs import flags, Lang, LangId, id2lang, lang2ids
 
 logger = logging.getLogger(__name__)
 
 
+# Hosts that moved, the links are fixed when the players are created
+HOST_REWRITES: dict[str, str] = {"vidmoly.to": "vidmoly.net"}
+
+
+def _rewrite_hostname(hostname: str) -> str | None:
+    """Apply HOST_REWRITES to hostname or one of its parent domains."""
+    labels = hostname.split(".")
+    for index in range(len(labels) - 1):
+        domain = ".".join(labels[index:])
+        if domain in HOST_REWRITES:
+            return hostname[: len(hostname) - len(domain)] + HOST_REWRITES[domain]
+    return None
+
+
+def _parse_player(url: str) -> tuple[str, str | None]:
+    """Return the fixed URL and its hostname."""
+    parsed = urlsplit(url)
+    hostname = parsed.hostname
+    new_hostname = _rewrite_hostname(hostname) if hostname else None
+    if hostname is None or new_hostname is None:
+        return url, hostname
+
+    netloc = parsed.netloc.lower().replace(hostname, new_hostname, 1)
+    return url.replace(parsed.netloc, netloc, 1), new_hostname
+
+
+class PlayerPreferences:
+    """Preferred and banned hostnames, compiled for O(1) lookups."""
+
+    def __init__(
+        self, prefer_players: Sequence[str] = (), ban_players: Iterable[str] = ()
+    ) -> None:
+        # Preferred players are sorted first, in the given order
+        self.ranks: dict[str, int] = {}
+        for index, hostname in enumerate(prefer_players):
+            self.ranks.setdefault(hostname, index - len(prefer_players))
+        self.bans = frozenset(ban_players)
+
+    def sort_and_filter(self, players: "Players") -> list[str]:
+        return self.order(players, players.hostname)
+
+    def order(
+        self, players: Iterable[str], hostname_of: Callable[[str], str | None]
+    ) -> list[str]:
+        """Remove the banned players and put the preferred ones first."""
+        kept = []
+        for player in players:
+            hostname = hostname_of(player)
+            if hostname is None:
+                kept.append((0, player))
+            elif hostname not in self.bans:
+                kept.append((self.ranks.get(hostname, 0), player))
+
+        # sorted is stable so the other players keep their order
+        kept.sort(key=itemgetter(0))
+        return [player for _, player in kept]
+
+
 class Players(list[str]):
     def __init__(self, *args: Sequence[Any], **kwargs: dict[Any, Any]):
         ret = super().__init__(*args, **kwargs)
         self.swapPlayers()  # seem to exist on all pages but that could be false, to be sure check script_videos.js
 
-        # Autofix old links
-        for index, _ in enumerate(self):
-            self[index] = self[index].replace("vidmoly.to", "vidmoly.net")
+        self._hostnames: dict[str, str | None] = {}
+        for index, player in enumerate(self):
+            self[index], self._hostnames[self[index]] = _parse_player(player)
 
         return ret
 
+    @classmethod
+    def _from_parsed(cls, players: Iterable[str]) -> "Players":
+        """Players already swapped and fixed, ie: read back from storage."""
+        new = cls.__new__(cls)
+        list.__init__(new, players)
+        new._hostnames = {}
+        return new
+
     def swapPlayers(self) -> None:
         if len(self) < 2:
             return
         self[0], self[1] = self[1], self[0]
 
+    def hostname(self, player: str) -> str | None:
+        """The hostname of player, parsed only once."""
+        if player not in self._hostnames:
+            self._hostnames[player] = urlsplit(player).hostname
+        return self._hostnames[player]
+
     def sort_and_filter(
         self, prefer_players: list[str], ban_players: list[str]
     ) -> list[str]:
-        def ban_filter(player: str) -> bool:
-            player_hostname = urlparse(player).hostname
-            if player_hostname is None:
-                return False
-            return player_hostname in ban_players
-
-        def key(player: str) -> int:
-            player_hostname = urlparse(player).hostname
-            if player_hostname is None:
-                return 0
-
-            try:
-                return prefer_players.index(player_hostname) - len(prefer_players)
-            except ValueError:
-                return 0
-
-        return sorted([player for player in self if not ban_filter(player)], key=key)
+        return PlayerPreferences(prefer_players, ban_players).sort_and_filter(self)
 
 
 class Languages(dict[LangId, Players]):
@@ -69,22 +126,85 @@ class Languages(dict[LangId, Players]):
         prefer_players: list[str],
         ban_players: list[str],
     ) -> Generator[str]:
+        preferences = PlayerPreferences(prefer_players, ban_players)
+        availables = self.availables
+
         for prefer_language in prefer_languages:
-            for players in self.availables.get(prefer_language, []):
+            for players in availables.get(prefer_language, []):
                 if players:
-                    yield from players.sort_and_filter(
-                        prefer_players=prefer_players, ban_players=ban_players
-                    )
+                    yield from preferences.sort_and_filter(players)
 
         for language in lang2ids:
-            for players in self.availables.get(language, []):
+            for players in availables.get(language, []):
                 if players:
                     logger.warning(
                         "Language preference not respected. Using %s", language
                     )
-                    yield from players.sort_and_filter(
-                        prefer_players=prefer_players, ban_players=ban_players
-                    )
+                    yield from preferences.sort_and_filter(players)
+
+
+def plan_languages(
+    episodes_languages: Iterable[Iterable[tuple[LangId, Sequence[str]]]],
+    prefer_languages: Sequence[Lang],
+    preferences: PlayerPreferences,
+    hostname_of: Callable[[str], str | None],
+) -> list[list[str]]:
+    """
+    The players to try for each episode, in the order of consume_player
+    without duplicates, computed in a single pass.
+    """
+    preferred = len(set(prefer_languages))
+    languages_order = list(dict.fromkeys([*prefer_languages, *lang2ids]))
+    rank = {
+        lang_id: rank
+        for rank, language in enumerate(languages_order)
+        for lang_id in lang2ids[language]
+    }
+
+    plans = []
+    fallbacks = 0
+    for languages in episodes_languages:
+        by_rank: list[tuple[int, Sequence[str]]] = sorted(
+            ((rank[lang_id], players) for lang_id, players in languages if players),
+            key=itemgetter(0),
+        )
+
+        plan = []
+        for _, players in by_rank:
+            plan.extend(preferences.order(players, hostname_of))
+        plans.append(list(dict.fromkeys(plan)))
+
+        if by_rank and by_rank[0][0] >= preferred:
+            fallbacks += 1
+
+    if fallbacks:
+        logger.warning("Language preference not respected for %s episode(s)", fallbacks)
+    return plans
+
+
+def plan_players(
+    episodes: Iterable["Episode"],
+    prefer_languages: Sequence[Lang],
+    prefers: Sequence[str] = (),
+    bans: Iterable[str] = (),
+) -> list[list[str]]:
+    """
+    The players to try for each episode, like consume_player but computed
+    once for all the episodes.
+    """
+    hostnames: dict[str, str | None] = {}
+
+    def hostname_of(player: str) -> str | None:
+        if player not in hostnames:
+            hostnames[player] = urlsplit(player).hostname
+        return hostnames[player]
+
+    return plan_languages(
+        (episode.languages.items() for episode in episodes),
+        prefer_languages,
+        PlayerPreferences(prefers, bans),
+        hostname_of,
+    )
 
 
 @dataclass(frozen=True)
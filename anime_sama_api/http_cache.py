@@ -0,0 +1,255 @@
+import asyncio
+from dataclasses import dataclass
+import json
+import logging
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+from httpx import AsyncBaseTransport, AsyncByteStream, Headers, Request, Response
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    url: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    stored_at: float
+
+    @property
+    def etag(self) -> str | None:
+        return Headers(self.headers).get("etag")
+
+    @property
+    def last_modified(self) -> str | None:
+        return Headers(self.headers).get("last-modified")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    evicted: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hits, {self.revalidated} revalidated (304), "
+            f"{self.misses} misses, {self.evicted} evicted"
+        )
+
+
+class HTTPCache:
+    """
+    Disk-backed store of response bodies with a size budget.
+    Least recently used entries are evicted first once the budget is exceeded.
+    Access times of reads are kept in memory and written in batches.
+    """
+
+    # Number of reads whose access time is kept before writing them
+    flush_every = 256
+
+    def __init__(self, directory: Path | str, max_bytes: int = 256 * 1024**2) -> None:
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+        self._accessed: dict[str, float] = {}
+        self._db = sqlite3.connect(
+            self.directory / "http_cache.sqlite3", check_same_thread=False
+        )
+        # A cache can lose its last writes on power loss, no sync on every commit
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "url TEXT PRIMARY KEY, status_code INTEGER, headers TEXT, body BLOB, "
+            "size INTEGER, stored_at REAL, accessed_at REAL)"
+        )
+        self._db.commit()
+        # Running total of the body sizes, kept up to date by set and _evict
+        (self._size,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+    def get(self, url: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status_code, headers, body, stored_at FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[url] = time.time()
+            if len(self._accessed) >= self.flush_every:
+                self._flush_accessed()
+                self._db.commit()
+
+        status_code, headers, body, stored_at = row
+        return CacheEntry(
+            url, status_code, [tuple(h) for h in json.loads(headers)], body, stored_at
+        )
+
+    def set(self, entry: CacheEntry) -> None:
+        if len(entry.body) > self.max_bytes:
+            return
+
+        with self._lock:
+            replaced = self._db.execute(
+                "SELECT size FROM entries WHERE url = ?", (entry.url,)
+            ).fetchone()
+            if replaced is not None:
+                self._size -= replaced[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.url,
+                    entry.status_code,
+                    json.dumps(entry.headers),
+                    entry.body,
+                    len(entry.body),
+                    entry.stored_at,
+                    time.time(),
+                ),
+            )
+            self._size += len(entry.body)
+            self._accessed.pop(entry.url, None)
+            self._evict()
+            self._db.commit()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as fresh after a successful revalidation."""
+        with self._lock:
+            now = time.time()
+            self._accessed.pop(url, None)
+            self._db.execute(
+                "UPDATE entries SET stored_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self._db.commit()
+
+    def _flush_accessed(self) -> None:
+        self._db.executemany(
+            "UPDATE entries SET accessed_at = ? WHERE url = ?",
+            ((accessed_at, url) for url, accessed_at in self._accessed.items()),
+        )
+        self._accessed.clear()
+
+    def _evict(self) -> None:
+        if self._size <= self.max_bytes:
+            return
+
+        self._flush_accessed()
+        for url, size in self._db.execute(
+            "SELECT url, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self.stats.evicted += 1
+            self._size -= size
+            if self._size <= self.max_bytes:
+                break
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._accessed.clear()
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+            self._size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_accessed()
+            self._db.commit()
+            self._db.close()
+
+
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding"}
+
+
+def _is_cacheable(request: Request) -> bool:
+    return request.method == "GET" and "range" not in request.headers
+
+
+class CachingTransport(AsyncBaseTransport):
+    """
+    Serve GET requests from an HTTPCache and revalidate stale entries with
+    conditional requests (If-None-Match / If-Modified-Since).
+    Entries younger than max_age seconds are served without any request.
+    The SQLite calls run in a thread to keep the event loop responsive.
+    """
+
+    def __init__(
+        self, transport: AsyncBaseTransport, cache: HTTPCache, max_age: float = 0
+    ) -> None:
+        self.transport = transport
+        self.cache = cache
+        self.max_age = max_age
+
+    @staticmethod
+    def _response_from(entry: CacheEntry, request: Request) -> Response:
+        return Response(
+            status_code=entry.status_code,
+            headers=entry.headers,
+            content=entry.body,
+            request=request,
+        )
+
+    async def handle_async_request(self, request: Request) -> Response:
+        if not _is_cacheable(request):
+            return await self.transport.handle_async_request(request)
+
+        url = str(request.url)
+        entry = await asyncio.to_thread(self.cache.get, url)
+
+        if entry is not None:
+            if time.time() - entry.stored_at < self.max_age:
+                self.cache.stats.hits += 1
+                return self._response_from(entry, request)
+
+            if entry.etag is not None:
+                request.headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                request.headers["If-Modified-Since"] = entry.last_modified
+
+        response = await self.transport.handle_async_request(request)
+
+        if entry is not None and response.status_code == 304:
+            await response.aclose()
+            self.cache.stats.revalidated += 1
+            await asyncio.to_thread(self.cache.touch, url)
+            return self._response_from(entry, request)
+
+        self.cache.stats.misses += 1
+        if response.status_code != 200 or "no-store" in response.headers.get(
+            "cache-control", ""
+        ):
+            return response
+
+        # Raw bytes are stored so the client still handles Content-Encoding
+        assert isinstance(response.stream, AsyncByteStream)
+        body = b"".join([chunk async for chunk in response.stream])
+        await response.aclose()
+
+        headers = [
+            (key, value)
+            for key, value in response.headers.multi_items()
+            if key.lower() not in HOP_BY_HOP_HEADERS
+        ]
+        entry = CacheEntry(url, response.status_code, headers, body, time.time())
+        await asyncio.to_thread(self.cache.set, entry)
+        logger.debug("Cached %s (%s)", url, self.cache.stats)
+        return self._response_from(entry, request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
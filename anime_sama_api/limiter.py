@@ -0,0 +1,199 @@
+import asyncio
+from dataclasses import dataclass
+import logging
+import time
+from typing import Protocol
+from weakref import WeakKeyDictionary
+
+from httpx import AsyncBaseTransport, Request, Response
+
+
+logger = logging.getLogger(__name__)
+
+
+class Limiter(Protocol):
+    async def acquire(self, host: str) -> None:
+        """Wait until a request to host is allowed."""
+
+    def release(
+        self, host: str, status_code: int | None, latency: float | None
+    ) -> None:
+        """
+        Report the outcome of a request. status_code is None on network error,
+        latency is None when the request was cancelled.
+        """
+
+
+@dataclass
+class _HostState:
+    rate: float
+    tokens: float
+    updated_at: float
+    paused_until: float = 0.0
+    latency: float | None = None
+    best_latency: float | None = None
+    slowed_down_at: float = 0.0
+
+
+class AdaptiveLimiter:
+    """
+    Token bucket plus a max in-flight cap for each host.
+    The rate is divided by 2 on 429/5xx responses, network errors or when the
+    latency rise above latency_factor times the best latency seen, then it
+    slowly recover by recovery_step requests/s on each successful response (AIMD).
+    Only 2xx responses count for the latency, and the best latency drifts toward
+    the current one by baseline_decay on each of them so an unusually fast
+    response does not stay the reference forever.
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: int = 10,
+        max_in_flight: int = 8,
+        min_rate: float = 0.2,
+        backoff: float = 0.5,
+        recovery_step: float = 0.1,
+        latency_factor: float = 3.0,
+        cooldown: float = 1.0,
+        baseline_decay: float = 0.05,
+    ) -> None:
+        self.max_rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.min_rate = min_rate
+        self.backoff = backoff
+        self.recovery_step = recovery_step
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.baseline_decay = baseline_decay
+        self.throttled = 0
+
+        self._hosts: dict[str, _HostState] = {}
+        self._semaphores: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+        ] = WeakKeyDictionary()
+
+    def _host(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.max_rate, self.burst, time.monotonic())
+            self._hosts[host] = state
+        return state
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        semaphore = semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_in_flight)
+            semaphores[host] = semaphore
+        return semaphore
+
+    def rate(self, host: str) -> float:
+        return self._host(host).rate
+
+    def _reserve(self, state: _HostState) -> float:
+        """Take a token and return how long to wait before it is usable."""
+        now = time.monotonic()
+        state.tokens = min(
+            self.burst, state.tokens + (now - state.updated_at) * state.rate
+        )
+        state.updated_at = now
+        state.tokens -= 1
+
+        wait = max(state.paused_until - now, 0.0)
+        if state.tokens < 0:
+            wait = max(wait, -state.tokens / state.rate)
+        return wait
+
+    async def acquire(self, host: str) -> None:
+        await self._semaphore(host).acquire()
+        try:
+            wait = self._reserve(self._host(host))
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._semaphore(host).release()
+            raise
+
+    def _slow_down(self, host: str, state: _HostState, reason: str) -> None:
+        now = time.monotonic()
+        if now - state.slowed_down_at < self.cooldown:
+            return
+
+        state.slowed_down_at = now
+        state.rate = max(state.rate * self.backoff, self.min_rate)
+        state.tokens = min(state.tokens, 0.0)
+        self.throttled += 1
+        logger.info("Slowing down %s to %.2f requests/s (%s)", host, state.rate, reason)
+
+    def release(
+        self, host: str, status_code: int | None, latency: float | None
+    ) -> None:
+        self._semaphore(host).release()
+        if latency is None:
+            return
+
+        state = self._host(host)
+
+        if status_code is None or status_code == 429 or status_code >= 500:
+            self._slow_down(host, state, f"status {status_code}")
+            return
+
+        if not 200 <= status_code < 300:
+            # 404s, redirects and 304s are often much faster than a real page
+            state.rate = min(state.rate + self.recovery_step, self.max_rate)
+            return
+
+        state.latency = (
+            latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+        )
+        if state.best_latency is None or state.latency < state.best_latency:
+            state.best_latency = state.latency
+        else:
+            state.best_latency += self.baseline_decay * (
+                state.latency - state.best_latency
+            )
+
+        if state.latency > self.latency_factor * state.best_latency:
+            self._slow_down(host, state, f"latency {state.latency:.2f}s")
+        else:
+            state.rate = min(state.rate + self.recovery_step, self.max_rate)
+
+    def pause(self, host: str, seconds: float) -> None:
+        """Stop sending requests to host for some time (ie: Retry-After)."""
+        state = self._host(host)
+        state.paused_until = max(state.paused_until, time.monotonic() + seconds)
+
+
+class RateLimitedTransport(AsyncBaseTransport):
+    def __init__(self, transport: AsyncBaseTransport, limiter: Limiter) -> None:
+        self.transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: Request) -> Response:
+        host = request.url.host
+        await self.limiter.acquire(host)
+
+        start = time.monotonic()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except asyncio.CancelledError:
+            self.limiter.release(host, None, None)
+            raise
+        except BaseException:
+            self.limiter.release(host, None, time.monotonic() - start)
+            raise
+
+        self.limiter.release(host, response.status_code, time.monotonic() - start)
+
+        retry_after = response.headers.get("retry-after", "")
+        if response.status_code == 429 and retry_after.isdigit():
+            pause = getattr(self.limiter, "pause", None)
+            if pause is not None:
+                pause(host, int(retry_after))
+
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,66 @@
+"""
+Run the parsers in a pool of processes, so the event loop keeps serving the
+network while big pages are parsed and a crawl can use every core.
+The pool is off by default: everything is then parsed inline.
+"""
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+import logging
+from typing import Any, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ParsePool:
+    """
+    processes is the number of processes, None for one per core and 0 to parse
+    inline. Pages smaller than min_size bytes are parsed inline anyway, sending
+    them to another process would cost more than parsing them.
+    """
+
+    def __init__(self, processes: int | None = 0, min_size: int = 32 * 1024) -> None:
+        self.processes = processes
+        self.min_size = min_size
+        self.offloaded = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    def configure(self, processes: int | None, min_size: int | None = None) -> None:
+        """Change the number of processes, the current pool is shut down."""
+        self.shutdown()
+        self.processes = processes
+        if min_size is not None:
+            self.min_size = min_size
+
+    @property
+    def enabled(self) -> bool:
+        return self.processes != 0
+
+    async def run(self, size: int, function: Callable[..., T], *args: Any) -> T:
+        """
+        Return function(*args), computed in the pool if size is at least
+        min_size. function, args and the result must be picklable.
+        """
+        if not self.enabled or size < self.min_size:
+            return function(*args)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.processes)
+            logger.debug("Parse pool started with %s processes", self.processes)
+
+        self.offloaded += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+default_parse_pool = ParsePool()
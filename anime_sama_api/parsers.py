@@ -0,0 +1,391 @@
+"""
+Scanners for the HTML of anime-sama, they extract exactly what the regex
+previously used did. Well formed pages are read in a single pass, the
+alternatives the regex would backtrack into are only explored (once) when
+a card is cut.
+"""
+
+from collections.abc import Generator
+import re
+from typing import NamedTuple
+
+
+# The first choice of _field_choices: after the next '>', the whole line if the
+# next one start with '<', else the line up to its last '<'
+_FIELD = re.compile(r">([^\n]*)(?:\n<|<)")
+# The first choice of _src_choices
+_SRC = re.compile(r'src="([^\n]+?)"')
+
+
+def _line_end(text: str, pos: int) -> int:
+    end = text.find("\n", pos)
+    return len(text) if end == -1 else end
+
+
+def strip_scripts(html: str) -> str:
+    """Remove every <script ... </script> block."""
+    parts = []
+    pos = 0
+    while True:
+        start = html.find("<script", pos)
+        if start == -1:
+            break
+        end = html.find("</script>", start + len("<script") + 1)
+        if end == -1:
+            break
+        parts.append(html[pos:start])
+        pos = end + len("</script>")
+    parts.append(html[pos:])
+    return "".join(parts)
+
+
+def _field_choices(text: str, pos: int) -> Generator[tuple[str, int]]:
+    """
+    Yield the possible (text, end) of the next field after pos, preferred first.
+    A field is the text following a '>' up to a '<' of the same line, or up to
+    the end of the line if the next line start with '<'.
+    The end is the position after the '<' ending the field.
+    """
+    search = pos + 1
+    while True:
+        tag_end = text.find(">", search)
+        if tag_end == -1:
+            return
+
+        start = tag_end + 1
+        end = _line_end(text, start)
+        if end + 1 < len(text) and text[end + 1] == "<":
+            yield text[start:end], end + 2
+
+        tag_start = text.rfind("<", start, end)
+        while tag_start != -1:
+            yield text[start:tag_start], tag_start + 1
+            tag_start = text.rfind("<", start, tag_start)
+
+        search = start
+
+
+def _read_fields(
+    text: str, pos: int, number_of_fields: int, failed: set[tuple[int, int]]
+) -> tuple[list[str], int] | None:
+    """
+    Read number_of_fields fields after pos, the first choice is almost always
+    the good one. Dead ends are remembered in failed so nothing is tried twice.
+    """
+    if number_of_fields == 0:
+        return [], pos
+    if (pos, number_of_fields) in failed:
+        return None
+
+    for value, end in _field_choices(text, pos):
+        rest = _read_fields(text, end, number_of_fields - 1, failed)
+        if rest is not None:
+            return [value] + rest[0], rest[1]
+
+    failed.add((pos, number_of_fields))
+    return None
+
+
+def _read_fields_greedy(
+    text: str, pos: int, number_of_fields: int
+) -> tuple[list[str], int] | None:
+    """
+    The first branch explored by _read_fields without the bookkeeping,
+    it succeed for every card that is followed by the rest of the page.
+    """
+    search = _FIELD.search
+    fields: list[str] = []
+    for _ in range(number_of_fields):
+        match = search(text, pos + 1)
+        if match is None:
+            return None
+        fields.append(match.group(1))
+        pos = match.end()
+    return fields, pos
+
+
+def _src_choices(text: str, pos: int) -> Generator[tuple[str, int]]:
+    """Yield the value and end of each src="..." attribute after pos."""
+    search = pos + 1
+    while True:
+        attribute = text.find('src="', search)
+        if attribute == -1:
+            return
+
+        start = attribute + len('src="')
+        end = text.find('"', start + 1, _line_end(text, start))
+        if end != -1:
+            yield text[start:end], end + 1
+
+        search = attribute + 1
+
+
+def _last_src(text: str) -> int:
+    """The position of the last src="..." attribute, -1 if there is none."""
+    attribute = text.rfind('src="')
+    while attribute != -1:
+        start = attribute + len('src="')
+        if text.find('"', start + 1, _line_end(text, start)) != -1:
+            return attribute
+        attribute = text.rfind('src="', 0, attribute)
+    return -1
+
+
+def _read_card(
+    text: str,
+    url_end: int,
+    number_of_fields: int,
+    failed: set[tuple[int, int]],
+    last_src: int,
+) -> tuple[tuple[str, ...], int] | None:
+    """
+    Read the image and the fields of a card whose URL end at url_end.
+    Links after the last image are rejected without searching the rest of the page.
+    """
+    if last_src < url_end + 2:
+        return None
+
+    image = _SRC.search(text, url_end + 2)
+    assert image is not None
+    fields = _read_fields_greedy(text, image.end(), number_of_fields)
+    if fields is not None:
+        return (image.group(1), *fields[0]), fields[1]
+
+    for image_url, pos in _src_choices(text, url_end + 1):
+        fields = _read_fields(text, pos, number_of_fields, failed)
+        if fields is not None:
+            return (image_url, *fields[0]), fields[1]
+    return None
+
+
+def iter_cards(
+    html: str, site_url: str, number_of_fields: int
+) -> Generator[tuple[str, ...]]:
+    """
+    Yield (url, image_url, *fields) for each card linking to a catalogue.
+    The fields are the texts of the elements following the image.
+    """
+    prefix = f'href="{site_url}catalogue/'
+    failed: set[tuple[int, int]] = set()
+    last_src = _last_src(html)
+    pos = 0
+    while True:
+        href = html.find(prefix, pos)
+        if href == -1:
+            return
+
+        url_start = href + len('href="')
+        # Like the old regex, the URL end at the last quote of the line
+        # from which a whole card can be read
+        card = None
+        url_end = html.rfind('"', href + len(prefix) + 1, _line_end(html, url_start))
+        while url_end != -1:
+            card = _read_card(html, url_end, number_of_fields, failed, last_src)
+            if card is not None:
+                break
+            url_end = html.rfind('"', href + len(prefix) + 1, url_end)
+
+        if card is None:
+            pos = href + 1
+            continue
+
+        fields, pos = card
+        yield (html[url_start:url_end], *fields)
+
+
+def text_after_label(html: str, label: str) -> str:
+    """
+    The text of the first element following label on the same line,
+    like the regex rf"{label}.+?>(.+?)<".
+    """
+    pos = html.find(label)
+    while pos != -1:
+        line_end = _line_end(html, pos)
+        tag_end = html.find(">", pos + len(label) + 1, line_end)
+        if tag_end != -1:
+            tag_start = html.find("<", tag_end + 2, line_end)
+            if tag_start != -1:
+                return html[tag_end + 1 : tag_start]
+        pos = html.find(label, pos + 1)
+    return ""
+
+
+def synopsis_of(html: str) -> str:
+    r"""
+    The text following Synopsis up to the last '<' of its line,
+    like the regex r"Synopsis[\W\w]+?>(.+)<".
+    """
+    pos = html.find("Synopsis")
+    if pos == -1:
+        return ""
+
+    tag_end = html.find(">", pos + len("Synopsis") + 1)
+    while tag_end != -1:
+        line_end = _line_end(html, tag_end)
+        tag_start = html.rfind("<", tag_end + 2, line_end)
+        if tag_start != -1:
+            return html[tag_end + 1 : tag_start]
+        # The other '>' of this line have no '<' after them either
+        tag_end = html.find(">", line_end)
+    return ""
+
+
+def has_mature_warning(html: str) -> bool:
+    r"""
+    If a yellow div is followed by "public averti",
+    like the regex r'<div class=".*?yellow.*?">[\W\w]+?public averti'.
+    """
+    warning = html.rfind("public averti")
+    div = html.find('<div class="')
+    while -1 < div < warning:
+        line_end = _line_end(html, div)
+        yellow = html.find("yellow", div + len('<div class="'), line_end)
+        if yellow != -1:
+            tag_end = html.find('">', yellow + len("yellow"), line_end)
+            if tag_end != -1 and tag_end + 2 < warning:
+                return True
+        div = html.find('<div class="', div + 1)
+    return False
+
+
+class ProgramCall(NamedTuple):
+    """
+    A call of the program naming the episodes, ie: creerListe(1, 12).
+    name is empty if the statement could not be parsed.
+    """
+
+    name: str
+    args: tuple[int | float | str, ...]
+    source: str
+
+
+def episode_program(html: str) -> str | None:
+    r"""
+    The body of the last function starting with resetListe(); up to the first
+    '}', like the regex r"resetListe\(\); *[\n\r]+\t*(.*?)}" with DOTALL.
+    """
+    program = None
+    pos = html.find("resetListe();")
+    while pos != -1:
+        start = pos + len("resetListe();")
+        while start < len(html) and html[start] == " ":
+            start += 1
+        if start < len(html) and html[start] in "\n\r":
+            while start < len(html) and html[start] in "\n\r":
+                start += 1
+            while start < len(html) and html[start] == "\t":
+                start += 1
+            end = html.find("}", start)
+            if end == -1:
+                break
+            program = html[start:end]
+            pos = html.find("resetListe();", end + 1)
+        else:
+            pos = html.find("resetListe();", pos + 1)
+    return program
+
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0"}
+
+
+def _read_string(program: str, pos: int) -> tuple[str, int] | None:
+    """Read the string literal starting at pos, return it and its end."""
+    quote = program[pos]
+    chars: list[str] = []
+    pos += 1
+    while pos < len(program):
+        char = program[pos]
+        if char == quote:
+            return "".join(chars), pos + 1
+        if char == "\n":
+            return None
+        if char == "\\" and pos + 1 < len(program):
+            pos += 1
+            char = _ESCAPES.get(program[pos], program[pos])
+        chars.append(char)
+        pos += 1
+    return None
+
+
+def _read_number(program: str, pos: int) -> tuple[int | float, int] | None:
+    end = pos + 1 if program[pos] in "+-" else pos
+    while end < len(program) and (program[end].isdigit() or program[end] == "."):
+        end += 1
+    text = program[pos:end]
+    try:
+        return (float(text) if "." in text else int(text)), end
+    except ValueError:
+        return None
+
+
+def _read_call(program: str, pos: int) -> tuple[ProgramCall, int] | None:
+    """Read name(arg, ...) starting at pos, return it and its end."""
+    start = end = pos
+    while end < len(program) and (program[end].isalnum() or program[end] in "_$"):
+        end += 1
+    name = program[start:end]
+    if not name or name[0].isdigit():
+        return None
+
+    pos = end
+    while pos < len(program) and program[pos] in " \t":
+        pos += 1
+    if pos >= len(program) or program[pos] != "(":
+        return None
+    pos += 1
+
+    args: list[int | float | str] = []
+    while True:
+        while pos < len(program) and program[pos] in " \t\r\n":
+            pos += 1
+        if pos >= len(program):
+            return None
+        if program[pos] == ")":
+            return ProgramCall(name, tuple(args), program[start : pos + 1]), pos + 1
+
+        value: tuple[int | float | str, int] | None
+        if program[pos] in "'\"":
+            value = _read_string(program, pos)
+        else:
+            value = _read_number(program, pos)
+        if value is None:
+            return None
+        args.append(value[0])
+        pos = value[1]
+
+        while pos < len(program) and program[pos] in " \t\r\n":
+            pos += 1
+        if pos < len(program) and program[pos] == ",":
+            pos += 1
+        elif pos >= len(program) or program[pos] != ")":
+            return None
+
+
+def parse_program(program: str) -> list[ProgramCall]:
+    """Read the calls of a program, comments are skipped."""
+    calls = []
+    pos = 0
+    while pos < len(program):
+        char = program[pos]
+        if char in " \t\r\n;":
+            pos += 1
+        elif program.startswith("//", pos):
+            pos = _line_end(program, pos)
+        elif program.startswith("/*", pos):
+            end = program.find("*/", pos + 2)
+            pos = len(program) if end == -1 else end + 2
+        else:
+            call = _read_call(program, pos)
+            if call is not None:
+                calls.append(call[0])
+                pos = call[1]
+                continue
+
+            # Skip the statement
+            end = _line_end(program, pos)
+            semicolon = program.find(";", pos, end)
+            if semicolon != -1:
+                end = semicolon
+            calls.append(ProgramCall("", (), program[pos:end].strip()))
+            pos = end
+    return calls
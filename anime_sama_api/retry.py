@@ -0,0 +1,104 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import logging
+import random
+import time
+
+from httpx import AsyncBaseTransport, Request, Response, TransportError
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How many times and for how long a request can be retried.
+    A different policy can be given for one request with
+    client.get(url, extensions={"retry_policy": RetryPolicy(...)}).
+    """
+
+    max_attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 30.0
+    # Total time (in seconds) that can be spent waiting between attempts
+    budget: float = 60.0
+    statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+    methods: frozenset[str] = frozenset({"GET", "HEAD", "OPTIONS"})
+
+    def delay(self, attempt: int) -> float:
+        # random is used to spread the retries of concurrent requests
+        return min(self.max_backoff, self.backoff * 2**attempt) * random.uniform(
+            0.8, 1.2
+        )
+
+
+def retry_after(response: Response) -> float | None:
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryTransport(AsyncBaseTransport):
+    """Retry idempotent requests on network errors and transient status codes."""
+
+    def __init__(
+        self, transport: AsyncBaseTransport, policy: RetryPolicy | None = None
+    ) -> None:
+        self.transport = transport
+        self.policy = policy or RetryPolicy()
+        self.retries = 0
+
+    async def handle_async_request(self, request: Request) -> Response:
+        policy: RetryPolicy = request.extensions.get("retry_policy", self.policy)
+        if request.method not in policy.methods:
+            return await self.transport.handle_async_request(request)
+
+        waited = 0.0
+        attempt = 0
+        while True:
+            try:
+                response = await self.transport.handle_async_request(request)
+            except TransportError as exception:
+                delay = policy.delay(attempt)
+                if attempt + 1 >= policy.max_attempts or waited + delay > policy.budget:
+                    raise
+                reason = repr(exception)
+            else:
+                if response.status_code not in policy.statuses:
+                    return response
+
+                delay = retry_after(response) or policy.delay(attempt)
+                if attempt + 1 >= policy.max_attempts or waited + delay > policy.budget:
+                    return response
+                await response.aclose()
+                reason = f"status {response.status_code}"
+
+            attempt += 1
+            self.retries += 1
+            logger.info(
+                "Retrying %s in %.1fs (%s, attempt %s/%s)",
+                request.url,
+                delay,
+                reason,
+                attempt + 1,
+                policy.max_attempts,
+            )
+            start = time.monotonic()
+            await asyncio.sleep(delay)
+            waited += time.monotonic() - start
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
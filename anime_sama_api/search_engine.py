@@ -0,0 +1,189 @@
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable
+import re
+import unicodedata
+
+from httpx import AsyncClient
+
+from .catalogue import Catalogue, Category
+from .catalogue_index import CatalogueRecord
+from .langs import Lang
+
+
+EXACT_SCORE = 3
+PREFIX_SCORE = 2
+FUZZY_SCORE = 1
+# Matching the main name is worth more than matching an alternative name
+NAME_BONUS = 0.5
+
+
+def normalize(text: str) -> str:
+    """Lowercase and remove accents."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"\w+", normalize(text))
+
+
+def _deletes(token: str) -> set[str]:
+    """All the variants of token with one character removed, and token itself."""
+    return {token} | {token[:i] + token[i + 1 :] for i in range(len(token))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1 :] == b[i + 1 :]
+    return a[i:] == b[i + 1 :]
+
+
+class CatalogueSearchEngine:
+    """
+    An in-memory inverted index over catalogue records.
+    Query tokens match catalogue names and alternative names exactly, by prefix
+    or with one typo (for tokens of fuzzy_min_length characters or more),
+    results can be filtered by genres, categories and languages.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[CatalogueRecord],
+        client: AsyncClient | None = None,
+        fuzzy_min_length: int = 4,
+    ) -> None:
+        self.fuzzy_min_length = fuzzy_min_length
+        self.records = list(records)
+        self.catalogues = [record.to_catalogue(client) for record in self.records]
+
+        self._postings: defaultdict[str, set[int]] = defaultdict(set)
+        self._name_postings: defaultdict[str, set[int]] = defaultdict(set)
+        self._facets: dict[str, defaultdict[str, set[int]]] = {
+            "genres": defaultdict(set),
+            "categories": defaultdict(set),
+            "languages": defaultdict(set),
+        }
+
+        for doc_id, record in enumerate(self.records):
+            for token in tokenize(record.name):
+                self._postings[token].add(doc_id)
+                self._name_postings[token].add(doc_id)
+            for alternative_name in record.alternative_names:
+                for token in tokenize(alternative_name):
+                    self._postings[token].add(doc_id)
+
+            for facet, values in (
+                ("genres", record.genres),
+                ("categories", record.categories),
+                ("languages", record.languages),
+            ):
+                for value in values:
+                    self._facets[facet][normalize(value)].add(doc_id)
+
+        self._vocabulary = sorted(self._postings)
+        self._deletes: defaultdict[str, list[str]] = defaultdict(list)
+        for token in self._vocabulary:
+            if len(token) >= self.fuzzy_min_length:
+                for variant in _deletes(token):
+                    self._deletes[variant].append(token)
+
+    def _matching_tokens(self, query_token: str) -> dict[str, int]:
+        """Return the indexed tokens matching query_token with their score."""
+        matches: dict[str, int] = {}
+
+        position = bisect_left(self._vocabulary, query_token)
+        while position < len(self._vocabulary) and self._vocabulary[
+            position
+        ].startswith(query_token):
+            token = self._vocabulary[position]
+            matches[token] = EXACT_SCORE if token == query_token else PREFIX_SCORE
+            position += 1
+
+        if len(query_token) >= self.fuzzy_min_length:
+            for variant in _deletes(query_token):
+                for token in self._deletes.get(variant, ()):
+                    if token not in matches and _within_one_edit(query_token, token):
+                        matches[token] = FUZZY_SCORE
+
+        return matches
+
+    def _facet_filter(self, facet: str, values: Iterable[str]) -> set[int] | None:
+        docs: set[int] | None = None
+        for value in values:
+            matching = self._facets[facet].get(normalize(value), set())
+            docs = matching if docs is None else docs & matching
+        return docs
+
+    def search(
+        self,
+        query: str = "",
+        genres: Iterable[str] = (),
+        categories: Iterable[Category] = (),
+        languages: Iterable[Lang] = (),
+        limit: int | None = None,
+    ) -> list[Catalogue]:
+        """
+        Return the catalogues matching every token of query and having all the
+        given genres, categories and languages, best matches first.
+        """
+        candidates: set[int] | None = None
+        for facet, values in (
+            ("genres", genres),
+            ("categories", categories),
+            ("languages", languages),
+        ):
+            docs = self._facet_filter(facet, values)
+            if docs is not None:
+                candidates = docs if candidates is None else candidates & docs
+
+        query_tokens = tokenize(query)
+        scores: dict[int, float] = {}
+        if not query_tokens:
+            doc_ids = range(len(self.records)) if candidates is None else candidates
+            scores = {doc_id: 0 for doc_id in doc_ids}
+
+        for position, query_token in enumerate(query_tokens):
+            token_scores: dict[int, float] = {}
+            for token, score in self._matching_tokens(query_token).items():
+                for doc_id in self._postings[token]:
+                    if candidates is not None and doc_id not in candidates:
+                        continue
+                    if doc_id in self._name_postings.get(token, ()):
+                        score_with_bonus = score + NAME_BONUS
+                    else:
+                        score_with_bonus = score
+                    token_scores[doc_id] = max(
+                        token_scores.get(doc_id, 0), score_with_bonus
+                    )
+
+            if position == 0:
+                scores = token_scores
+            else:
+                scores = {
+                    doc_id: scores[doc_id] + score
+                    for doc_id, score in token_scores.items()
+                    if doc_id in scores
+                }
+            if not scores:
+                return []
+
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.catalogues[doc_id] for doc_id in ranked]
+
+    def facet_values(self, facet: str) -> dict[str, int]:
+        """Return the values of a facet and how many catalogues have them."""
+        return {value: len(docs) for value, docs in self._facets[facet].items()}
+
+    def __len__(self) -> int:
+        return len(self.records)
@@ -1,22 +1,61 @@
-from ast import literal_eval
 from dataclasses import dataclass, replace
-from functools import reduce
+from functools import cached_property, reduce
+import logging
 import re
 import asyncio
 from typing import Any, cast, get_args
 
 from httpx import AsyncClient
 
-from .langs import LangId, lang2ids, flagid2lang
-from .episode import Episode, Players, Languages
-from .utils import remove_some_js_comments, zip_varlen, split_and_strip
+from .langs import Lang, LangId, lang2ids, flagid2lang
+from .compact import CompactSeason, PlayerTable
+from .episode import Episode, Players, Languages, plan_players
+from .parsers import episode_program, parse_program
+from .utils import remove_some_js_comments, zip_varlen
+from .session import get_default_client
+from .season_cache import (
+    EpisodesJsCache,
+    MissingPagesCache,
+    default_episodes_js_cache,
+    default_missing_pages,
+    filever_of,
+)
+from .singleflight import coalesced_get
+from .parse_pool import ParsePool, default_parse_pool
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProgramWarning:
+    """A call of the program naming the episodes that could not be run."""
+
+    url: str
+    source: str
+    message: str
 
 
 @dataclass
 class SeasonLangPage:
     lang_id: LangId
+    # URL of the page html come from
+    url: str = ""
     html: str = ""
     episodes_js: str = ""
+    filever_changed: bool = False
+    # True when html is the last one seen and was not downloaded again
+    remembered: bool = False
+    # Number of episodes the episodes.js had when html was seen
+    remembered_episodes: int = 0
+
+    @cached_property
+    def html_without_comments(self) -> str:
+        return remove_some_js_comments(self.html)
+
+    @cached_property
+    def episodes_js_without_comments(self) -> str:
+        return remove_some_js_comments(self.episodes_js, script=True)
 
 
 class Season:
@@ -26,6 +65,10 @@ class Season:
         name: str = "",
         serie_name: str = "",
         client: AsyncClient | None = None,
+        episodes_js_cache: EpisodesJsCache | None = None,
+        languages: set[Lang] | None = None,
+        missing_pages: MissingPagesCache | None = None,
+        parse_pool: ParsePool | None = None,
     ) -> None:
         self.url = url
         self.site_url = "/".join(url.split("/")[:3]) + "/"
@@ -33,39 +76,144 @@ class Season:
         self.name = name or url.split("/")[-2]
         self.serie_name = serie_name or url.split("/")[-3]
 
-        self.client = client or AsyncClient()
+        self.client = client or get_default_client()
+        self.episodes_js_cache = episodes_js_cache or default_episodes_js_cache
+        # Languages of the catalogue, if known only them are probed
+        self.languages = languages or set()
+        self.missing_pages = missing_pages or default_missing_pages
+        self.parse_pool = parse_pool or default_parse_pool
+        self.warnings: list[ProgramWarning] = []
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The client and the pool cannot be pickled and the caches are shared by
+        # every season
+        state = self.__dict__.copy()
+        for attribute in ("client", "episodes_js_cache", "missing_pages", "parse_pool"):
+            del state[attribute]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.client = get_default_client()
+        self.episodes_js_cache = default_episodes_js_cache
+        self.missing_pages = default_missing_pages
+        self.parse_pool = default_parse_pool
+
+    def _lang_ids_to_probe(self, full_probe: bool) -> list[LangId]:
+        lang_ids = get_args(LangId)
+        if full_probe:
+            return list(lang_ids)
+
+        possible: set[LangId] = {"vostfr"}  # Needed to find the VO
+        if self.languages:
+            for language in self.languages:
+                possible.update(lang2ids[language])
+        else:
+            possible.update(lang_ids)
 
-    async def get_all_pages(self) -> list[SeasonLangPage]:
-        async def process_page(lang_id: LangId) -> SeasonLangPage:
-            page_url = self.url + lang_id + "/"
-            response = await self.client.get(page_url)
+        return [
+            lang_id
+            for lang_id in lang_ids
+            if lang_id in possible
+            and not self.missing_pages.is_missing(self.url + lang_id + "/")
+        ]
 
+    async def _get_remembered_page(self, lang_id: LangId) -> SeasonLangPage | None:
+        """
+        Reuse the last HTML seen for this language, if it is recent enough, with
+        the last episodes.js seen (fetched directly if it is not cached anymore).
+        Return None if there is nothing remembered or it failed.
+        """
+        page_url = self.url + lang_id + "/"
+        episodes_js_url = self.episodes_js_cache.latest(page_url)
+        remembered = self.episodes_js_cache.page(page_url)
+        if episodes_js_url is None or remembered is None:
+            return None
+        html, number_of_episodes = remembered
+
+        episodes_js = self.episodes_js_cache.get(episodes_js_url)
+        if episodes_js is None:
+            response = await coalesced_get(self.client, episodes_js_url)
             if not response.is_success:
-                return SeasonLangPage(lang_id=lang_id)
+                return None
+            episodes_js = response.text
+            self.episodes_js_cache.set(episodes_js_url, episodes_js)
+
+        return SeasonLangPage(
+            lang_id=lang_id,
+            url=page_url,
+            html=html,
+            episodes_js=episodes_js,
+            remembered=True,
+            remembered_episodes=number_of_episodes,
+        )
 
-            html = response.text
-            match_url = re.search(r"episodes\.js\?filever=\d+", html)
+    async def _get_page(self, lang_id: LangId) -> SeasonLangPage:
+        page_url = self.url + lang_id + "/"
+        response = await coalesced_get(self.client, page_url)
 
-            if not match_url:
-                return SeasonLangPage(lang_id=lang_id)
+        if response.status_code == 404:
+            self.missing_pages.add(page_url)
+        if not response.is_success:
+            return SeasonLangPage(lang_id=lang_id)
+        self.missing_pages.discard(page_url)
+
+        html = response.text
+        match_url = re.search(r"episodes\.js\?filever=\d+", html)
+
+        if not match_url:
+            return SeasonLangPage(lang_id=lang_id)
+
+        episodes_js_url = page_url + match_url.group(0)
+        filever_changed = self.episodes_js_cache.record(page_url, episodes_js_url)
 
-            episodes_js = await self.client.get(page_url + match_url.group(0))
+        episodes_js = self.episodes_js_cache.get(episodes_js_url)
+        if episodes_js is None:
+            response = await coalesced_get(self.client, episodes_js_url)
 
-            if not episodes_js.is_success:
+            if not response.is_success:
                 return SeasonLangPage(lang_id=lang_id)
 
-            return SeasonLangPage(
-                lang_id=lang_id, html=html, episodes_js=episodes_js.text
-            )
+            episodes_js = response.text
+            self.episodes_js_cache.set(episodes_js_url, episodes_js)
 
-        pages = await asyncio.gather(
-            *(process_page(lang_id) for lang_id in get_args(LangId))
+        return SeasonLangPage(
+            lang_id=lang_id,
+            url=page_url,
+            html=html,
+            episodes_js=episodes_js,
+            filever_changed=filever_changed,
         )
-        pages_dict = {page.lang_id: page for page in pages}
+
+    async def get_all_pages(
+        self, full_probe: bool = False, refresh: bool = False
+    ) -> list[SeasonLangPage]:
+        """
+        Get the page of each language available for this season.
+        Only the languages of the catalogue that are not known to be missing are
+        probed, unless full_probe is True.
+        If the cache reuse pages (page_max_age > 0) and a language page was seen
+        recently, its HTML and episodes.js are reused unless refresh is True.
+        """
+        reuse = not refresh and self.episodes_js_cache.page_max_age > 0
+
+        async def process_page(lang_id: LangId) -> SeasonLangPage:
+            if reuse:
+                page = await self._get_remembered_page(lang_id)
+                if page is not None:
+                    return page
+            return await self._get_page(lang_id)
+
+        lang_ids = self._lang_ids_to_probe(full_probe)
+        self.missing_pages.probes_skipped += len(get_args(LangId)) - len(lang_ids)
+
+        pages = await asyncio.gather(*(process_page(lang_id) for lang_id in lang_ids))
+        pages_dict = {lang_id: SeasonLangPage(lang_id) for lang_id in get_args(LangId)}
+        pages_dict.update((page.lang_id, page) for page in pages)
         if pages_dict["vostfr"].html:
             flag_id_vo = re.findall(
                 r"src=\".+flag_(.+?)\.png\".*?[\n\t]*<p.*?>VO</p>",
-                remove_some_js_comments(pages_dict["vostfr"].html),
+                pages_dict["vostfr"].html_without_comments,
             )[0]
 
             for lang_id in lang2ids[flagid2lang[flag_id_vo]]:
@@ -79,7 +227,7 @@ class Season:
     # TODO: Refactor
     def _get_players_from(self, page: SeasonLangPage) -> list[Players]:
         players_list = re.findall(
-            r"eps(\d+) ?= ?\[([\W\w]+?)\]", remove_some_js_comments(page.episodes_js)
+            r"eps(\d+) ?= ?\[([\W\w]+?)\]", page.episodes_js_without_comments
         )
         players_list = sorted(players_list, key=lambda tuple: tuple[0])
         players_list_links = (
@@ -89,71 +237,60 @@ class Season:
 
         return [Players(players) for players in zip_varlen(*players_list_links)]
 
+    def _warn(self, page: SeasonLangPage, source: str, message: str) -> None:
+        self.warnings.append(
+            ProgramWarning(self.url + page.lang_id + "/", source, message)
+        )
+
     def _get_episodes_names(
         self, page: SeasonLangPage, number_of_episodes: int, number_of_episodes_max: int
     ) -> list[str]:
-        functions = re.findall(
-            r"resetListe\(\); *[\n\r]+\t*(.*?)}",
-            page.html,
-            re.DOTALL,
-        )[-1]
-        functions_list = split_and_strip(functions, (";", "\n"))[:-1]
-
         def padding(n: int) -> str:
             return " " * (len(str(number_of_episodes_max)) - len(str(n)))
 
         def episode_name_range(*args) -> list[str]:
             return [f"Episode {n}{padding(n)}" for n in range(*args)]
 
-        episodes_name: list[str] = []
-        for function in functions_list:
-            if function.startswith("//"):
-                continue
-
-            call_start = function.find("(")
-            function, args_sting = function[:call_start], function[call_start + 1 : -1]
-            if args_sting:
-                # Warning literal_eval: Can crash
-                args = literal_eval(node_or_string=args_sting + ",")
-            else:
-                args = ()
-
-            match function:
-                case "":
-                    continue
-                case "creerListe":
-                    if len(args) < 2:
-                        # Only seen on Dragon Ball GT (Film), Junji Ito Collection (Saison 1) and Orange (Film)
-                        # Surely a small oversight in anime-sama.fr
-                        # So it is undefined but do nothing is generaly the good reaction
-                        continue
-
-                    episodes_name += episode_name_range(int(args[0]), int(args[1]) + 1)
-                case "finirListe" | "finirListeOP":
-                    if not args:
-                        break
+        program = episode_program(page.html)
+        if program is None:
+            self._warn(page, "", "No program naming the episodes")
+            return episode_name_range(1, number_of_episodes + 1)
 
-                    episodes_name += episode_name_range(
-                        int(args[0]),
-                        int(args[0]) + number_of_episodes - len(episodes_name),
-                    )
-                    break
-                case "newSP":
-                    if not args:
-                        raise NotImplementedError(
-                            f"Error while parsing 'newSP'.\nPlease report this to the developer with URL: {self.url + page.lang_id}/"
+        episodes_name: list[str] = []
+        for name, args, source in parse_program(program):
+            try:
+                match name:
+                    case "":
+                        self._warn(page, source, "Cannot parse the call")
+                    case "creerListe":
+                        if len(args) < 2:
+                            # Only seen on Dragon Ball GT (Film), Junji Ito Collection (Saison 1) and Orange (Film)
+                            # Surely a small oversight in anime-sama.fr
+                            # So it is undefined but do nothing is generaly the good reaction
+                            continue
+
+                        episodes_name += episode_name_range(
+                            int(args[0]), int(args[1]) + 1
                         )
-                    episodes_name.append(f"Episode {args[0]}")
-                case "newSPF":
-                    if not args:
-                        raise NotImplementedError(
-                            f"Error while parsing 'newSPF'.\nPlease report this to the developer with URL: {self.url + page.lang_id}/"
+                    case "finirListe" | "finirListeOP":
+                        if not args:
+                            break
+
+                        episodes_name += episode_name_range(
+                            int(args[0]),
+                            int(args[0]) + number_of_episodes - len(episodes_name),
                         )
-                    episodes_name.append(args[0])
-                case name:
-                    raise NotImplementedError(
-                        f"Error cannot parse '{name}'.\nPlease report this to the developer with URL: {self.url + page.lang_id}/"
-                    )
+                        break
+                    case "newSP" | "newSPF" if not args:
+                        self._warn(page, source, f"'{name}' without argument")
+                    case "newSP":
+                        episodes_name.append(f"Episode {args[0]}")
+                    case "newSPF":
+                        episodes_name.append(str(args[0]))
+                    case _:
+                        self._warn(page, source, f"Unknown function '{name}'")
+            except ValueError:
+                self._warn(page, source, "Invalid arguments")
 
         return episodes_name
 
@@ -169,24 +306,93 @@ class Season:
         """
         page, names, players_list = new  # Unpack args. This is due to reduce
 
+        # Positions of each name in current, and how many of them are behind
+        positions: dict[str, list[int]] = {}
+        for pos, (name_current, _) in enumerate(current):
+            positions.setdefault(name_current, []).append(pos)
+        passed = dict.fromkeys(positions, 0)
+
         fusion = []
         curr_done = 0
         for name_new, players in zip(names, players_list):
-            for pos, (name_current, languages) in enumerate(current[curr_done:]):
-                if name_new == name_current:
-                    languages[page.lang_id] = players
-                    fusion.extend(current[curr_done : curr_done + pos + 1])
-                    curr_done += pos + 1
-                    break
+            # The first occurrence of name_new in current[curr_done:]
+            name_positions = positions.get(name_new, ())
+            index = passed.get(name_new, 0)
+            while index < len(name_positions) and name_positions[index] < curr_done:
+                index += 1
+
+            if index < len(name_positions):
+                pos = name_positions[index]
+                passed[name_new] = index + 1
+                current[pos][1][page.lang_id] = players
+                fusion.extend(current[curr_done : pos + 1])
+                curr_done = pos + 1
             else:
+                passed[name_new] = index
                 fusion.append((name_new, Languages({page.lang_id: players})))  # type: ignore
         fusion.extend(current[curr_done:])
         return fusion
 
-    async def episodes(self) -> list[Episode]:
-        pages = await self.get_all_pages()
+    async def episodes(
+        self, full_probe: bool = False, refresh: bool = False
+    ) -> list[Episode]:
+        pages = await self.get_all_pages(full_probe, refresh)
+
+        size = sum(len(page.html) + len(page.episodes_js) for page in pages)
+        episodes, numbers_of_episodes, warnings = await self.parse_pool.run(
+            size, self._parse_episodes, pages
+        )
+        if self.episodes_js_cache.page_max_age > 0:
+            # The VO copy of the vostfr page is remembered once, with its URL
+            downloaded = {
+                page.url: (page.html, number_of_episodes)
+                for page, number_of_episodes in zip(pages, numbers_of_episodes)
+                if page.url and not page.remembered
+            }
+            for page_url, (html, number_of_episodes) in downloaded.items():
+                self.episodes_js_cache.set_page(page_url, html, number_of_episodes)
+        for warning in warnings:
+            self.warnings.append(warning)
+            logger.warning(
+                "%s: %s in %r.\nPlease report this to the developer.",
+                warning.url,
+                warning.message,
+                warning.source,
+            )
+
+        if episodes is None:
+            # Episodes were added or removed, the remembered names are outdated
+            return await self.episodes(full_probe, refresh=True)
+        return episodes
 
+    def _parse_episodes(
+        self, pages: list[SeasonLangPage]
+    ) -> tuple[list[Episode] | None, list[int], list[ProgramWarning]]:
+        """
+        Return the episodes of the pages (None if the remembered pages are
+        outdated), the number of episodes of each page and the warnings raised
+        while naming them, which are left to the caller because this can run in
+        another process.
+        """
+        first_warning = len(self.warnings)
         players_list = [self._get_players_from(page) for page in pages]
+        try:
+            return (
+                self._episodes_from(pages, players_list),
+                [len(players) for players in players_list],
+                self.warnings[first_warning:],
+            )
+        finally:
+            del self.warnings[first_warning:]
+
+    def _episodes_from(
+        self, pages: list[SeasonLangPage], players_list: list[list[Players]]
+    ) -> list[Episode] | None:
+        if any(
+            page.remembered and len(players) != page.remembered_episodes
+            for page, players in zip(pages, players_list)
+        ):
+            return None
 
         number_of_episodes_max = max(
             len(episodes_page) for episodes_page in players_list
@@ -212,6 +418,39 @@ class Season:
             for index, (name, languages) in enumerate(episodes, start=1)
         ]
 
+    async def compact_episodes(
+        self,
+        full_probe: bool = False,
+        refresh: bool = False,
+        table: PlayerTable | None = None,
+    ) -> CompactSeason:
+        """Like episodes but stored in a (shared) PlayerTable, to keep many seasons."""
+        compact = CompactSeason.from_episodes(
+            await self.episodes(full_probe, refresh),
+            self.serie_name,
+            self.name,
+            table,
+        )
+        compact.url = self.url
+        for lang_id in get_args(LangId):
+            episodes_js_url = self.episodes_js_cache.latest(self.url + lang_id + "/")
+            filever = filever_of(episodes_js_url) if episodes_js_url else None
+            if filever is not None:
+                compact.filevers[lang_id] = filever
+        return compact
+
+    async def plan_players(
+        self,
+        prefer_languages: list[Lang],
+        prefers: list[str] | None = None,
+        bans: list[str] | None = None,
+        full_probe: bool = False,
+    ) -> list[tuple[Episode, list[str]]]:
+        """Each episode with the players to try for it, in order."""
+        episodes = await self.episodes(full_probe)
+        plans = plan_players(episodes, prefer_languages, prefers or (), bans or ())
+        return list(zip(episodes, plans))
+
     def __repr__(self) -> str:
         return f"Season({self.name!r}, {self.serie_name!r})"
 
@@ -0,0 +1,297 @@
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from hashlib import sha1
+import json
+import logging
+from pathlib import Path
+import re
+import time
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+
+def filever_of(episodes_js_url: str) -> int | None:
+    match_filever = re.search(r"filever=(\d+)", episodes_js_url)
+    return int(match_filever.group(1)) if match_filever else None
+
+
+class _Journal:
+    """
+    JSON Lines file that is only appended to. It is rewritten with the live
+    entries once most of its lines are outdated, so it stay proportional to them.
+    """
+
+    # Never compacted below this number of lines
+    min_lines = 1024
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lines = 0
+
+    def read(self) -> Iterator[Any]:
+        if not self.path.is_file():
+            return
+        with open(self.path, encoding="utf-8") as journal:
+            for line in journal:
+                self.lines += 1
+                yield json.loads(line)
+
+    def append(self, entry: list[Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(entry) + "\n")
+        self.lines += 1
+
+    def compact(self, entries: Iterable[list[Any]], live: int) -> None:
+        if self.lines > max(self.min_lines, 2 * live):
+            self.rewrite(entries)
+
+    def rewrite(self, entries: Iterable[list[Any]]) -> None:
+        temporary = self.path.with_suffix(".tmp")
+        with open(temporary, "w", encoding="utf-8") as journal:
+            self.lines = 0
+            for entry in entries:
+                journal.write(json.dumps(entry) + "\n")
+                self.lines += 1
+        temporary.replace(self.path)
+
+
+class EpisodesJsCache:
+    """
+    Cache of episodes.js contents keyed by their URL. The URL contains the
+    filever version stamp so a known URL is never downloaded twice.
+    It also remember the last episodes.js URL and HTML seen for each language
+    page, which allow to detect when a season has been updated and to skip the
+    HTML page when only the players are needed. A HTML page is only reused for
+    page_max_age seconds, after that it is downloaded again to check its filever.
+    Pages are not reused by default (page_max_age=0): until then new episodes
+    released without a new filever are not seen.
+    The HTML pages are kept in memory apart from the episodes.js, up to
+    max_page_bytes characters.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str | None = None,
+        max_entries: int = 4096,
+        page_max_age: float = 0,
+        max_page_bytes: int = 32 * 1024**2,
+    ) -> None:
+        self.max_entries = max_entries
+        self.page_max_age = page_max_age
+        self.max_page_bytes = max_page_bytes
+        self.hits = 0
+        self.misses = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self.filever_changes = 0
+
+        self._contents: OrderedDict[str, str] = OrderedDict()
+        self._page_contents: OrderedDict[str, str] = OrderedDict()
+        self._page_bytes = 0
+        self._latest: dict[str, str] = {}
+        # When each page HTML was seen and how many episodes its episodes.js had
+        self._pages: dict[str, tuple[float, int]] = {}
+        self.directory: Path | None = None
+        self._versions_journal: _Journal | None = None
+        self._pages_journal: _Journal | None = None
+        self.configure(directory)
+
+    def configure(self, directory: Path | str | None) -> None:
+        """Set (or unset with None) the directory used to persist the cache."""
+        self.directory = Path(directory).expanduser() if directory else None
+        self._versions_journal = self._pages_journal = None
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._versions_journal = _Journal(self.directory / "versions.jsonl")
+        for page_url, url in self._versions_journal.read():
+            self._latest[page_url] = url
+        self._pages_journal = _Journal(self.directory / "pages.jsonl")
+        for page_url, seen_at, episodes in self._pages_journal.read():
+            self._pages[page_url] = (seen_at, episodes)
+
+        # Written as a whole by the previous versions
+        versions_file = self.directory / "versions.json"
+        if versions_file.is_file():
+            self._latest = json.loads(versions_file.read_text("utf-8")) | self._latest
+            self._versions_journal.rewrite(map(list, self._latest.items()))
+            versions_file.unlink()
+
+    def _content_file(self, url: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{sha1(url.encode()).hexdigest()}.js"
+
+    def get(self, url: str) -> str | None:
+        content = self._contents.get(url)
+
+        if content is None and self.directory is not None:
+            file = self._content_file(url)
+            if file.is_file():
+                content = file.read_text("utf-8")
+                self._remember(url, content)
+
+        if content is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._contents.move_to_end(url)
+        return content
+
+    def set(self, url: str, content: str) -> None:
+        self._remember(url, content)
+        if self.directory is not None:
+            self._content_file(url).write_text(content, "utf-8")
+
+    def _remember(self, url: str, content: str) -> None:
+        self._contents[url] = content
+        self._contents.move_to_end(url)
+        while len(self._contents) > self.max_entries:
+            self._contents.popitem(last=False)
+
+    def _remember_page(self, page_url: str, html: str) -> None:
+        self._page_bytes -= len(self._page_contents.pop(page_url, ""))
+        if len(html) > self.max_page_bytes:
+            return
+        self._page_contents[page_url] = html
+        self._page_bytes += len(html)
+        while self._page_bytes > self.max_page_bytes:
+            self._page_bytes -= len(self._page_contents.popitem(last=False)[1])
+
+    def page(self, page_url: str) -> tuple[str, int] | None:
+        """
+        Return the last HTML seen for a language page and the number of episodes
+        its episodes.js had then, None if it was seen more than page_max_age ago.
+        """
+        seen_at, episodes = self._pages.get(page_url, (0.0, 0))
+        html = None
+        if time.time() - seen_at < self.page_max_age:
+            html = self._page_contents.get(page_url)
+            if html is None and self.directory is not None:
+                file = self._content_file(page_url)
+                if file.is_file():
+                    html = file.read_text("utf-8")
+                    self._remember_page(page_url, html)
+
+        if html is None:
+            self.page_misses += 1
+            return None
+
+        self.page_hits += 1
+        if page_url in self._page_contents:
+            self._page_contents.move_to_end(page_url)
+        return html, episodes
+
+    def set_page(self, page_url: str, html: str, episodes: int) -> None:
+        self._remember_page(page_url, html)
+        self._pages[page_url] = (time.time(), episodes)
+        if self._pages_journal is None:
+            return
+        self._content_file(page_url).write_text(html, "utf-8")
+        self._pages_journal.append([page_url, *self._pages[page_url]])
+        self._pages_journal.compact(
+            ([page_url, *page] for page_url, page in self._pages.items()),
+            len(self._pages),
+        )
+
+    def latest(self, page_url: str) -> str | None:
+        """Return the last episodes.js URL seen for a language page."""
+        return self._latest.get(page_url)
+
+    def record(self, page_url: str, url: str) -> bool:
+        """
+        Remember that page_url point to url.
+        Return True if a different filever was previously known for this page.
+        """
+        previous = self._latest.get(page_url)
+        if previous == url:
+            return False
+
+        self._latest[page_url] = url
+        if self._versions_journal is not None:
+            self._versions_journal.append([page_url, url])
+            self._versions_journal.compact(
+                map(list, self._latest.items()), len(self._latest)
+            )
+
+        if previous is None:
+            return False
+
+        self.filever_changes += 1
+        self._contents.pop(previous, None)
+        if self.directory is not None:
+            self._content_file(previous).unlink(missing_ok=True)
+        logger.info(
+            "%s has been updated (filever %s -> %s)",
+            page_url,
+            filever_of(previous),
+            filever_of(url),
+        )
+        return True
+
+
+default_episodes_js_cache = EpisodesJsCache()
+
+
+class MissingPagesCache:
+    """
+    Remember the language pages that returned a 404 so they are not probed again
+    before ttl seconds. Changes are appended to a JSON Lines file when a directory is set.
+    """
+
+    def __init__(
+        self, directory: Path | str | None = None, ttl: float = 7 * 24 * 3600
+    ) -> None:
+        self.ttl = ttl
+        self.probes_skipped = 0
+        self._missing: dict[str, float] = {}
+        self.directory: Path | None = None
+        self.configure(directory)
+
+    def configure(self, directory: Path | str | None) -> None:
+        """Set (or unset with None) the directory used to persist the cache."""
+        self.directory = Path(directory).expanduser() if directory else None
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not self._journal.is_file():
+            return
+        with open(self._journal, encoding="utf-8") as journal:
+            for line in journal:
+                url, missing_since = json.loads(line)
+                if missing_since is None:
+                    self._missing.pop(url, None)
+                else:
+                    self._missing[url] = missing_since
+
+    @property
+    def _journal(self) -> Path:
+        assert self.directory is not None
+        return self.directory / "missing_pages.jsonl"
+
+    def _write(self, url: str, missing_since: float | None) -> None:
+        if self.directory is None:
+            return
+        with open(self._journal, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps([url, missing_since]) + "\n")
+
+    def is_missing(self, page_url: str) -> bool:
+        missing_since = self._missing.get(page_url)
+        return missing_since is not None and time.time() - missing_since < self.ttl
+
+    def add(self, page_url: str) -> None:
+        if self.is_missing(page_url):
+            return
+        self._missing[page_url] = time.time()
+        self._write(page_url, self._missing[page_url])
+
+    def discard(self, page_url: str) -> None:
+        if self._missing.pop(page_url, None) is not None:
+            self._write(page_url, None)
+
+
+default_missing_pages = MissingPagesCache()
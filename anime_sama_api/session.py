@@ -0,0 +1,300 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from importlib.util import find_spec
+import logging
+from pathlib import Path
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from httpx import (
+    AsyncBaseTransport,
+    AsyncByteStream,
+    AsyncClient,
+    AsyncHTTPTransport,
+    Limits,
+    Request,
+    Response,
+    Timeout,
+)
+
+from .http_cache import CachingTransport, HTTPCache
+from .limiter import AdaptiveLimiter, Limiter, RateLimitedTransport
+from .retry import RetryPolicy, RetryTransport
+
+
+logger = logging.getLogger(__name__)
+
+Trace = Callable[[str, dict[str, Any]], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class SessionConfig:
+    max_connections: int | None = 100
+    max_keepalive_connections: int | None = 20
+    keepalive_expiry: float | None = 30.0
+    # None means no per-host limit, only max_connections applies
+    max_connections_per_host: int | None = 8
+    timeout: float | None = 15.0
+    connect_timeout: float | None = 10.0
+    # Need the h2 package (pip install 'httpx[http2]'), fallback on HTTP/1.1 otherwise
+    http2: bool = False
+    # Persistent HTTP cache, disabled when cache_dir is None
+    cache_dir: Path | str | None = None
+    cache_max_bytes: int = 256 * 1024**2
+    # Responses younger than this (in seconds) are served without revalidation
+    cache_max_age: float = 0
+    # Requests per second allowed for each host, adapted on errors and slowdowns.
+    # None disable rate limiting
+    rate_limit: float | None = None
+    rate_burst: int = 10
+    # Retry on network errors and 429/5xx with exponential backoff, 1 disable retries
+    retry_attempts: int = 3
+    retry_backoff: float = 0.5
+    retry_budget: float = 60.0
+
+    @property
+    def limits(self) -> Limits:
+        return Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeouts(self) -> Timeout:
+        return Timeout(self.timeout, connect=self.connect_timeout)
+
+
+@dataclass
+class SessionStats:
+    requests: int = 0
+    connections_opened: int = 0
+
+    @property
+    def connections_reused(self) -> int:
+        return max(self.requests - self.connections_opened, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        if not self.requests:
+            return 0.0
+        return self.connections_reused / self.requests
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, {self.connections_opened} connections opened, "
+            f"{self.connections_reused} reused ({self.reuse_ratio:.0%})"
+        )
+
+
+class _ReleasingStream(AsyncByteStream):
+    """Give back the per-host slot only once the body has been read and closed."""
+
+    def __init__(self, stream: AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class _CountingTrace:
+    """httpcore trace extension counting the connections opened in stats."""
+
+    def __init__(self, stats: SessionStats, previous: Trace | None) -> None:
+        self.stats = stats
+        self.previous = previous
+
+    async def __call__(self, event_name: str, info: dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.connections_opened += 1
+            logger.debug("New connection opened (%s)", self.stats)
+        if self.previous is not None:
+            await self.previous(event_name, info)
+
+
+@dataclass
+class _LoopState:
+    transport: AsyncHTTPTransport
+    host_semaphores: dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+
+class PooledTransport(AsyncBaseTransport):
+    """
+    A connection pool usable from any event loop. Each loop gets its own pool
+    because httpcore connections cannot be shared between loops.
+    """
+
+    def __init__(self, config: SessionConfig, stats: SessionStats) -> None:
+        self.config = config
+        self.stats = stats
+        self._states: WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState] = (
+            WeakKeyDictionary()
+        )
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = _LoopState(
+                AsyncHTTPTransport(
+                    limits=self.config.limits, http2=_http2_available(self.config)
+                )
+            )
+            self._states[loop] = state
+        return state
+
+    async def handle_async_request(self, request: Request) -> Response:
+        state = self._state()
+
+        semaphore = None
+        if self.config.max_connections_per_host is not None:
+            semaphore = state.host_semaphores.get(request.url.host)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.config.max_connections_per_host)
+                state.host_semaphores[request.url.host] = semaphore
+            await semaphore.acquire()
+
+        try:
+            self.stats.requests += 1
+            trace = request.extensions.get("trace")
+            # A retried request keeps its extensions, only wrap its trace once
+            if not (isinstance(trace, _CountingTrace) and trace.stats is self.stats):
+                request.extensions["trace"] = _CountingTrace(self.stats, trace)
+            response = await state.transport.handle_async_request(request)
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+
+        if semaphore is None:
+            return response
+
+        assert isinstance(response.stream, AsyncByteStream)
+        return Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, semaphore.release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.transport.aclose()
+
+
+def _http2_available(config: SessionConfig) -> bool:
+    if config.http2 and find_spec("h2") is None:
+        logger.warning(
+            "HTTP/2 was requested but the h2 package is not installed. "
+            "Falling back on HTTP/1.1, install it with: pip install 'httpx[http2]'"
+        )
+        return False
+    return config.http2
+
+
+class SessionManager:
+    """
+    Own the AsyncClient shared by every AnimeSama, Catalogue and Season object
+    created without an explicit client.
+    """
+
+    def __init__(
+        self, config: SessionConfig | None = None, limiter: Limiter | None = None
+    ) -> None:
+        self.config = config or SessionConfig()
+        self.stats = SessionStats()
+        self.cache: HTTPCache | None = None
+        self.limiter = limiter
+        self._client: AsyncClient | None = None
+
+    def _build_transport(self) -> AsyncBaseTransport:
+        transport: AsyncBaseTransport = PooledTransport(self.config, self.stats)
+
+        if self.limiter is None and self.config.rate_limit is not None:
+            self.limiter = AdaptiveLimiter(
+                rate=self.config.rate_limit,
+                burst=self.config.rate_burst,
+                max_in_flight=self.config.max_connections_per_host or 8,
+            )
+        if self.limiter is not None:
+            transport = RateLimitedTransport(transport, self.limiter)
+
+        if self.config.retry_attempts > 1:
+            transport = RetryTransport(
+                transport,
+                RetryPolicy(
+                    max_attempts=self.config.retry_attempts,
+                    backoff=self.config.retry_backoff,
+                    budget=self.config.retry_budget,
+                ),
+            )
+
+        if self.config.cache_dir is not None:
+            if self.cache is None:
+                self.cache = HTTPCache(
+                    self.config.cache_dir, self.config.cache_max_bytes
+                )
+            transport = CachingTransport(
+                transport, self.cache, self.config.cache_max_age
+            )
+
+        return transport
+
+    @property
+    def client(self) -> AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = AsyncClient(
+                transport=self._build_transport(), timeout=self.config.timeouts
+            )
+        return self._client
+
+    def configure(self, config: SessionConfig) -> None:
+        """
+        Change the configuration for the clients created from now on.
+        Should be call before creating any object that use the session, or
+        after closing it with aclose().
+        """
+        if self._client is not None and not self._client.is_closed:
+            raise RuntimeError("Close the session with aclose() before configuring it")
+        self.config = config
+        self._client = None
+        self._close_cache()
+
+    def _close_cache(self) -> None:
+        if self.cache is not None:
+            logger.debug("HTTP cache: %s", self.cache.stats)
+            self.cache.close()
+            self.cache = None
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._close_cache()
+        logger.debug("Session closed: %s", self.stats)
+
+    async def __aenter__(self) -> "SessionManager":
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        await self.aclose()
+
+
+default_session = SessionManager()
+
+
+def get_default_client() -> AsyncClient:
+    return default_session.client
@@ -0,0 +1,55 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+import logging
+from typing import Generic, TypeVar
+
+from httpx import AsyncClient, Response
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent calls sharing the same key: only the first one run,
+    the others wait for its result.
+    """
+
+    def __init__(self) -> None:
+        self.deduplicated = 0
+        self._in_flight: dict[Hashable, asyncio.Future[T]] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        future = self._in_flight.get(key)
+
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+
+            def done(_: asyncio.Future[T]) -> None:
+                self._in_flight.pop(key, None)
+                if not future.cancelled():
+                    future.exception()  # Mark as retrieved, callers get it anyway
+
+            future.add_done_callback(done)
+        else:
+            self.deduplicated += 1
+            logger.debug("Joined in-flight call for %s", key)
+
+        # Shield so a cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(future)
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+
+requests_flight: SingleFlight[Response] = SingleFlight()
+
+
+async def coalesced_get(client: AsyncClient, url: str) -> Response:
+    """GET url with client, sharing the response with identical concurrent GETs."""
+    return await requests_flight.do(
+        (asyncio.get_running_loop(), client, url), lambda: client.get(url)
+    )
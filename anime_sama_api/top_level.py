@@ -1,18 +1,23 @@
 import asyncio
-from collections.abc import AsyncIterator, Generator
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Generator
+from contextlib import aclosing
 from html import unescape
 from dataclasses import dataclass
 import logging
 import re
 from typing import Any, cast
 
-from httpx import AsyncClient
+from httpx import AsyncClient, Response
 
 from .episode import Episode
 from .season import Season
 from .langs import Lang, flags
 from .utils import filter_literal, is_Literal
+from .parsers import iter_cards, strip_scripts
 from .catalogue import Catalogue, Category
+from .session import get_default_client
+from .parse_pool import default_parse_pool
 
 
 logger = logging.getLogger(__name__)
@@ -35,10 +40,66 @@ class EpisodeRelease:
         return f"{self.serie_name} - {self.descriptive} {flags.get(self.language, '')}"
 
 
+def parse_catalogues(
+    html: str, site_url: str, client: AsyncClient | None = None
+) -> list[Catalogue]:
+    """
+    The catalogues of a results page. Without client, they use the default one
+    once needed, so the page can be parsed in another process.
+    """
+    catalogues = []
+    for card in iter_cards(strip_scripts(html), site_url, 5):
+        (
+            url,
+            image_url,
+            name,
+            alternative_names_str,
+            genres_str,
+            categories_str,
+            languages_str,
+        ) = (unescape(item) for item in card)
+
+        alternative_names = (
+            alternative_names_str.split(", ") if alternative_names_str else []
+        )
+        if " - " in genres_str:
+            genres = genres_str.split(" - ")
+        else:
+            genres = genres_str.split(", ") if genres_str else []
+        categories = categories_str.split(", ") if categories_str else []
+        languages = languages_str.split(", ") if languages_str else []
+
+        def not_in_literal(value: Any) -> None:
+            logger.warning(
+                f"Error while parsing '{value}'. \nPlease report this to the developer with URL: {url}"
+            )
+
+        categories_checked = cast(
+            set[Category], set(filter_literal(categories, Category, not_in_literal))
+        )
+        languages_checked = cast(
+            set[Lang], set(filter_literal(languages, Lang, not_in_literal))
+        )
+
+        catalogues.append(
+            Catalogue(
+                url=url,
+                name=name,
+                alternative_names=alternative_names,
+                genres=genres,
+                categories=categories_checked,
+                languages=languages_checked,
+                image_url=image_url,
+                client=client,
+            )
+        )
+    return catalogues
+
+
 class AnimeSama:
     def __init__(self, site_url: str, client: AsyncClient | None = None) -> None:
         self.site_url = site_url
-        self.client = client or AsyncClient()
+        self.client = client or get_default_client()
 
     async def _get_homepage_section(self, section_name: str, how_many: int = 1) -> str:
         homepage = await self.client.get(self.site_url)
@@ -55,68 +116,28 @@ class AnimeSama:
         return ""
 
     def _yield_catalogues_from(self, html: str) -> Generator[Catalogue]:
-        text_without_script = re.sub(r"<script[\W\w]+?</script>", "", html)
-        for match in re.finditer(
-            rf"href=\"({self.site_url}catalogue/.+)\"[\W\w]+?src=\"(.+?)\"[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<",
-            text_without_script,
-        ):
-            (
-                url,
-                image_url,
-                name,
-                alternative_names_str,
-                genres_str,
-                categories_str,
-                languages_str,
-            ) = (unescape(item) for item in match.groups())
-
-            alternative_names = (
-                alternative_names_str.split(", ") if alternative_names_str else []
-            )
-            if " - " in genres_str:
-                genres = genres_str.split(" - ")
-            else:
-                genres = genres_str.split(", ") if genres_str else []
-            categories = categories_str.split(", ") if categories_str else []
-            languages = languages_str.split(", ") if languages_str else []
-
-            def not_in_literal(value: Any) -> None:
-                logger.warning(
-                    f"Error while parsing '{value}'. \nPlease report this to the developer with URL: {url}"
-                )
+        yield from parse_catalogues(html, self.site_url, self.client)
 
-            categories_checked = cast(
-                set[Category], set(filter_literal(categories, Category, not_in_literal))
-            )
-            languages_checked = cast(
-                set[Lang], set(filter_literal(languages, Lang, not_in_literal))
-            )
-
-            yield Catalogue(
-                url=url,
-                name=name,
-                alternative_names=alternative_names,
-                genres=genres,
-                categories=categories_checked,
-                languages=languages_checked,
-                image_url=image_url,
-                client=self.client,
-            )
+    async def _catalogues_from(self, html: str) -> list[Catalogue]:
+        """Like _yield_catalogues_from, in the default parse pool if enabled."""
+        catalogues = await default_parse_pool.run(
+            len(html), parse_catalogues, html, self.site_url
+        )
+        for catalogue in catalogues:
+            catalogue.client = self.client
+        return catalogues
 
     def _yield_release_episodes_from(self, html: str) -> Generator[EpisodeRelease]:
-        for match in re.finditer(
-            rf"href=\"({self.site_url}catalogue/.+)\"[\W\w]+?src=\"(.+?)\"[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<",
-            html,
-        ):
+        for card in iter_cards(html, self.site_url, 4):
             (
                 season_url,
                 image_url,
                 serie_name,
-                categories,
+                categories_str,
                 language,
                 descriptive,
-            ) = match.groups()
-            categories = categories.split(", ") if categories else ["Anime"]
+            ) = card
+            categories = categories_str.split(", ") if categories_str else ["Anime"]
             language = language.strip() if language else "VOSTFR"
 
             def not_in_literal(value: Any) -> None:
@@ -139,66 +160,111 @@ class AnimeSama:
                 descriptive=descriptive,
             )
 
-    async def search(self, query: str) -> list[Catalogue]:
-        response = (
-            await self.client.get(f"{self.site_url}catalogue/?search={query}")
-        ).raise_for_status()
-
-        pages_regex = re.findall(r"page=(\d+)", response.text)
-
-        if not pages_regex:
-            return []
-
-        last_page = int(pages_regex[-1])
-
-        responses = [response] + await asyncio.gather(
-            *(
-                self.client.get(f"{self.site_url}catalogue/?search={query}&page={num}")
-                for num in range(2, last_page + 1)
-            )
-        )
-
-        catalogues = []
-        for response in responses:
-            if not response.is_success:
-                continue
-
-            catalogues += list(self._yield_catalogues_from(response.text))
-
-        return catalogues
-
-    async def search_iter(self, query: str) -> AsyncIterator[Catalogue]:
-        response = (
-            await self.client.get(f"{self.site_url}catalogue/?search={query}")
-        ).raise_for_status()
+    async def _search_pages(
+        self, query: str, prefetch: int
+    ) -> AsyncGenerator[str | None, None]:
+        """
+        Yield the HTML of each results page in order while keeping up to
+        prefetch pages downloading in advance. None is yielded in place of the
+        pages that could not be downloaded.
+        """
+        url = f"{self.site_url}catalogue/?search={query}"
+        response = (await self.client.get(url)).raise_for_status()
 
         pages_regex = re.findall(r"page=(\d+)", response.text)
 
         if not pages_regex:
-            raise StopAsyncIteration
+            return
 
         last_page = int(pages_regex[-1])
-
-        for catalogue in self._yield_catalogues_from(response.text):
-            yield catalogue
-
-        for number in range(2, last_page + 1):
-            response = await self.client.get(
-                f"{self.site_url}catalogue/?search={query}&page={number}"
-            )
-
-            if not response.is_success:
-                continue
-
-            for catalogue in self._yield_catalogues_from(response.text):
-                yield catalogue
-
-    async def catalogues_iter(self) -> AsyncIterator[Catalogue]:
-        async for catalogue in self.search_iter(""):
+        yield response.text
+
+        numbers = iter(range(2, last_page + 1))
+        in_flight: deque[asyncio.Future[Response]] = deque()
+        try:
+            while True:
+                while len(in_flight) < max(prefetch, 1):
+                    number = next(numbers, None)
+                    if number is None:
+                        break
+                    in_flight.append(
+                        asyncio.ensure_future(self.client.get(f"{url}&page={number}"))
+                    )
+
+                if not in_flight:
+                    return
+
+                response = await in_flight.popleft()
+                if response.is_success:
+                    yield response.text
+                else:
+                    logger.warning(
+                        "Cannot get %s (status %s)", response.url, response.status_code
+                    )
+                    yield None
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    async def search_pages_iter(
+        self, query: str, prefetch: int = 4
+    ) -> AsyncGenerator[list[Catalogue] | None, None]:
+        """
+        Yield the catalogues of each results page of query in the site order,
+        or None for a page that could not be downloaded so the caller know the
+        results are incomplete. Up to prefetch pages are downloaded in advance.
+        """
+        async with aclosing(self._search_pages(query, prefetch)) as pages:
+            async for html in pages:
+                yield None if html is None else await self._catalogues_from(html)
+
+    async def search(
+        self,
+        query: str,
+        prefetch: int = 8,
+        limit: int | None = None,
+        until: Callable[[Catalogue], bool] | None = None,
+    ) -> list[Catalogue]:
+        return [
+            catalogue
+            async for catalogue in self.search_iter(query, prefetch, limit, until)
+        ]
+
+    async def search_iter(
+        self,
+        query: str,
+        prefetch: int = 4,
+        limit: int | None = None,
+        until: Callable[[Catalogue], bool] | None = None,
+    ) -> AsyncIterator[Catalogue]:
+        """
+        Yield the catalogues matching query in the site order as soon as their
+        results page is parsed. Up to prefetch pages are downloaded in advance.
+        Stop after limit catalogues or after the first catalogue for which until
+        return True, remaining page downloads are then cancelled.
+        The pages that could not be downloaded are skipped with a warning.
+        """
+        if limit is not None and limit <= 0:
+            return
+
+        count = 0
+        async with aclosing(self.search_pages_iter(query, prefetch)) as pages:
+            async for catalogues in pages:
+                for catalogue in catalogues or ():
+                    yield catalogue
+
+                    count += 1
+                    if (limit is not None and count >= limit) or (
+                        until is not None and until(catalogue)
+                    ):
+                        return
+
+    async def catalogues_iter(self, prefetch: int = 4) -> AsyncIterator[Catalogue]:
+        async for catalogue in self.search_iter("", prefetch):
             yield catalogue
 
-    async def all_catalogues(self) -> list[Catalogue]:
-        return await self.search("")
+    async def all_catalogues(self, prefetch: int = 8) -> list[Catalogue]:
+        return await self.search("", prefetch)
 
     async def planning(self) -> list[list[Season]]:
         # Get from homepage, return value should be change
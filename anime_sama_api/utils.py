@@ -25,13 +25,84 @@ def split_and_strip(string: str, delimiters: Iterable[str] | str) -> list[str]:
 
     string_list = [string]
     for delimiter in delimiters:
-        string_list = sum((part.split(delimiter) for part in string_list), [])
+        string_list = [piece for part in string_list for piece in part.split(delimiter)]
     return [part.strip() for part in string_list]
 
 
-def remove_some_js_comments(string: str) -> str:
-    string = re.sub(r"\/\*[\W\w]*?\*\/", "", string)  # Remove /* ... */
-    return re.sub(r"<!--[\W\w]*?-->", "", string)  # Remove <!-- ... -->
+_COMMENT_ENDS = {"/*": "*/", "<!--": "-->"}
+_STRING_LITERAL = re.compile(
+    r"""'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"|`(?:[^`\\\n]|\\.)*`"""
+)
+
+
+def _in_string_literal(string: str, start: int, pos: int) -> re.Match[str] | None:
+    """Return the string literal containing pos, start must be outside of one."""
+    line_end = string.find("\n", pos)
+    if line_end == -1:
+        line_end = len(string)
+
+    literal = _STRING_LITERAL.search(string, start, line_end)
+    while literal is not None and literal.end() <= pos:
+        literal = _STRING_LITERAL.search(string, literal.end(), line_end)
+    if literal is not None and literal.start() < pos:
+        return literal
+    return None
+
+
+def remove_some_js_comments(string: str, script: bool = False) -> str:
+    """
+    Remove /* ... */ and <!-- ... --> comments in a single pass.
+    String literals are only recognized inside <script> blocks, or everywhere
+    if script is True (ie: for a .js file), as quotes in the text of a page
+    are mostly apostrophes. They are expected to end on the line they start.
+    """
+    parts = []
+    pos = 0  # Start of the text not yet copied
+    search = 0
+    in_script = script
+    script_start = 0
+    # Next position of each token, only searched again once passed
+    next_tokens: dict[str, int | None] = dict.fromkeys(
+        ("/*", "<!--", "<script", "</script>")
+    )
+    while True:
+        candidates = []
+        for token, position in next_tokens.items():
+            if token == "<script" and in_script:
+                continue
+            if token == "</script>" and (script or not in_script):
+                continue
+            if position is None or -1 < position < search:
+                position = next_tokens[token] = string.find(token, search)
+            if position != -1:
+                candidates.append((position, token))
+
+        if not candidates:
+            break
+        start, token = min(candidates)
+        search = start + len(token)
+
+        if in_script:
+            line_start = max(script_start, string.rfind("\n", 0, start) + 1, pos)
+            literal = _in_string_literal(string, line_start, start)
+            if literal is not None:
+                search = literal.end()
+                continue
+
+        if token in _COMMENT_ENDS:
+            end = string.find(_COMMENT_ENDS[token], search)
+            if end == -1:
+                continue
+            parts.append(string[pos:start])
+            pos = search = end + len(_COMMENT_ENDS[token])
+        elif token == "<script":
+            in_script = True
+            script_start = search
+        else:
+            in_script = script
+
+    parts.append(string[pos:])
+    return "".join(parts)
 
 
 # TODO: this callback_when_false is curse, should be remove
@@ -0,0 +1,95 @@
+"""
+Compare the regex previously used to extract catalogue cards with the scanner
+of anime_sama_api.parsers on search pages of growing size.
+
+    python benchmarks/bench_catalogue_parser.py
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from anime_sama_api.parsers import iter_cards, strip_scripts  # noqa: E402
+from tests.data.mock_site import SITE_URL, catalogue_card, search_page  # noqa: E402
+
+
+def regex_cards(html: str) -> list[tuple[str, ...]]:
+    text_without_script = re.sub(r"<script[\W\w]+?</script>", "", html)
+    return [
+        match.groups()
+        for match in re.finditer(
+            rf"href=\"({SITE_URL}catalogue/.+)\"[\W\w]+?src=\"(.+?)\"[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<",
+            text_without_script,
+        )
+    ]
+
+
+def scanner_cards(html: str) -> list[tuple[str, ...]]:
+    return list(iter_cards(strip_scripts(html), SITE_URL, 5))
+
+
+def timeit(function, html: str, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    print(f"{'cards':>6} {'size (KiB)':>10} {'regex (ms)':>11} {'scanner (ms)':>13}")
+    for number_of_cards in (48, 200, 1000, 5000):
+        cards = [
+            catalogue_card(f"anime-{i}", f"Anime {i}", f"Alt {i}")
+            for i in range(number_of_cards)
+        ]
+        html = search_page(cards, 1)
+        assert scanner_cards(html) == regex_cards(html)
+
+        print(
+            f"{number_of_cards:>6} {len(html) / 1024:>10.0f}"
+            f" {timeit(regex_cards, html) * 1000:>11.2f}"
+            f" {timeit(scanner_cards, html) * 1000:>13.2f}"
+        )
+
+    # A truncated page (ie: interrupted download) make the regex backtrack
+    # over the whole document for each of the last cards
+    print("\nTruncated page")
+    for number_of_cards in (48, 200, 1000):
+        cards = [
+            catalogue_card(f"anime-{i}", f"Anime {i}") for i in range(number_of_cards)
+        ]
+        html = search_page(cards, 1)
+        html = html[: html.rfind("<h1")]
+        assert scanner_cards(html) == regex_cards(html)
+
+        print(
+            f"{number_of_cards:>6} {len(html) / 1024:>10.0f}"
+            f" {timeit(regex_cards, html, 1) * 1000:>11.2f}"
+            f" {timeit(scanner_cards, html, 1) * 1000:>13.2f}"
+        )
+
+    # Links without image (ie: lazy loaded with srcset), the regex search the
+    # rest of the page for a src from each of them
+    print("\nLinks without image")
+    for number_of_cards in (250, 500, 1000):
+        cards = [
+            catalogue_card(f"anime-{i}", f"Anime {i}").replace(" src=", " srcset=")
+            for i in range(number_of_cards)
+        ]
+        html = search_page(cards, 1)
+        assert scanner_cards(html) == []
+
+        print(
+            f"{number_of_cards:>6} {len(html) / 1024:>10.0f}"
+            f" {timeit(regex_cards, html, 1) * 1000:>11.2f}"
+            f" {timeit(scanner_cards, html, 1) * 1000:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
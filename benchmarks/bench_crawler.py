@@ -0,0 +1,48 @@
+"""
+Crawl synthetic sites of growing size into JSON Lines and report the time and
+the peak of memory allocated, which should not grow with the site.
+
+    python benchmarks/bench_crawler.py
+"""
+
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from anime_sama_api.crawler import crawl  # noqa: E402
+from anime_sama_api.top_level import AnimeSama  # noqa: E402
+from tests.data.mock_site import SITE_URL, make_site  # noqa: E402
+
+SEASONS = 3
+EPISODES = 24
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    for number_of_series in (250, 500, 1000):
+        site = make_site(
+            number_of_series, per_page=48, seasons=SEASONS, episodes=EPISODES, hosts=2
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "site.jsonl"
+            tracemalloc.start()
+            start = time.perf_counter()
+            stats = asyncio.run(crawl(AnimeSama(SITE_URL, site.client()), output))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        print(
+            f"{number_of_series:5} catalogues, {stats.episodes:6} episodes: "
+            f"{elapsed:6.2f}s, peak {peak / 2**20:5.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
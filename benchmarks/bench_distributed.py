@@ -0,0 +1,63 @@
+"""
+Crawl a synthetic site answering with some latency with 1 to 4 worker
+processes sharing a work queue, and report the time taken.
+
+    python benchmarks/bench_distributed.py
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from anime_sama_api.distributed import DistributedCrawler  # noqa: E402
+from anime_sama_api.top_level import AnimeSama  # noqa: E402
+from tests.data.mock_site import SITE_URL, make_site  # noqa: E402
+
+SERIES = 60
+SEASONS = 3
+EPISODES = 12
+LATENCY = 0.02
+
+
+def worker(path: str) -> None:
+    logging.disable(logging.WARNING)
+    site = make_site(SERIES, per_page=12, seasons=SEASONS, episodes=EPISODES)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(LATENCY)
+        return site.handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    crawler = DistributedCrawler(
+        AnimeSama(SITE_URL, client), path, concurrency=2, poll_interval=0.05
+    )
+    asyncio.run(crawler.run())
+
+
+def main() -> None:
+    for number_of_workers in (1, 2, 4):
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / "crawl.db")
+            processes = [
+                multiprocessing.Process(target=worker, args=(path,))
+                for _ in range(number_of_workers)
+            ]
+            start = time.perf_counter()
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            elapsed = time.perf_counter() - start
+        print(f"{number_of_workers} workers: {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure with tracemalloc the memory kept per episode by a list of Episode
+and by a CompactSeason, on synthetic seasons shaped like the real ones
+(vj duplicating vostfr, a few hosts shared by every link).
+
+    python benchmarks/bench_episode_memory.py
+"""
+
+import gc
+import logging
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from anime_sama_api.compact import CompactSeason, PlayerTable  # noqa: E402
+from anime_sama_api.episode import Episode, Languages, Players  # noqa: E402
+
+
+def players(lang: str, number: int, hosts: int) -> Players:
+    # Built from a new string each time, like when episodes.js is parsed
+    return Players(
+        [
+            "".join(("https://", f"host{host}.com/embed-{lang}-{number:06}.html"))
+            for host in range(hosts)
+        ]
+    )
+
+
+def episodes(number_of_episodes: int) -> list[Episode]:
+    return [
+        Episode(
+            Languages(
+                vostfr=players("vo", number, 3),
+                vj=players("vo", number, 3),
+                vf=players("vf", number, 2),
+            ),
+            "serie",
+            "saison1",
+            f"Episode {number}",
+            number,
+        )
+        for number in range(1, number_of_episodes + 1)
+    ]
+
+
+def measure(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    print(f"{'episodes':>8} {'Episode (B/ep)':>15} {'CompactSeason (B/ep)':>21}")
+    for number_of_episodes in (1000, 10000, 100000):
+        _, episodes_size = measure(lambda: episodes(number_of_episodes))
+        _, compact_size = measure(
+            lambda: CompactSeason.from_episodes(
+                episodes(number_of_episodes), table=PlayerTable()
+            )
+        )
+        print(
+            f"{number_of_episodes:>8}"
+            f" {episodes_size / number_of_episodes:>15.0f}"
+            f" {compact_size / number_of_episodes:>21.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare the previous Season._extend_episodes with the current one on synthetic
+seasons where the languages are misaligned (missing, extra and renamed episodes).
+
+    python benchmarks/bench_extend_episodes.py
+"""
+
+from functools import reduce
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from anime_sama_api.episode import Languages, Players  # noqa: E402
+from anime_sama_api.season import Season, SeasonLangPage  # noqa: E402
+
+
+def previous_extend_episodes(current, new):
+    page, names, players_list = new
+
+    fusion = []
+    curr_done = 0
+    for name_new, players in zip(names, players_list):
+        for pos, (name_current, languages) in enumerate(current[curr_done:]):
+            if name_new == name_current:
+                languages[page.lang_id] = players
+                fusion.extend(current[curr_done : curr_done + pos + 1])
+                curr_done += pos + 1
+                break
+        else:
+            fusion.append((name_new, Languages({page.lang_id: players})))
+    fusion.extend(current[curr_done:])
+    return fusion
+
+
+def language_pages(number_of_episodes: int) -> list[tuple[SeasonLangPage, list[str]]]:
+    rng = random.Random(number_of_episodes)
+    pages = []
+    for lang_id in ("vostfr", "vf", "va", "vkr", "vcn", "vqc", "vf1", "vf2", "vj"):
+        names = [f"Episode {n}" for n in range(1, number_of_episodes + 1)]
+        # The dubs are late and have specials the others do not have
+        names = names[: rng.randint(number_of_episodes // 2, number_of_episodes)]
+        for _ in range(len(names) // 20):
+            names.insert(rng.randrange(len(names)), f"Special {rng.random()}")
+        pages.append((SeasonLangPage(lang_id), names))
+    return pages
+
+
+def timeit(extend, pages) -> float:
+    new = [(page, names, [Players([name]) for name in names]) for page, names in pages]
+    start = time.perf_counter()
+    reduce(extend, new, [])
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    print(f"{'episodes':>8} {'previous (ms)':>14} {'current (ms)':>13}")
+    for number_of_episodes in (100, 500, 1000, 2000, 5000):
+        pages = language_pages(number_of_episodes)
+        print(
+            f"{number_of_episodes:>8}"
+            f" {timeit(previous_extend_episodes, pages) * 1000:>14.1f}"
+            f" {timeit(Season._extend_episodes, pages) * 1000:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Read the episodes of seasons with big pages, parsed inline then in a parse
+pool, and report the time and the longest stall of the event loop.
+
+    python benchmarks/bench_parse_pool.py
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from anime_sama_api.parse_pool import default_parse_pool  # noqa: E402
+from anime_sama_api.season import Season  # noqa: E402
+from anime_sama_api.season_cache import EpisodesJsCache  # noqa: E402
+from tests.data.mock_site import SITE_URL, MockSite, make_site  # noqa: E402
+
+SEASONS = 24
+EPISODES = 1500
+
+
+async def crawl(site: MockSite) -> tuple[float, float]:
+    stall = 0.0
+    done = False
+
+    async def ticker() -> None:
+        nonlocal stall
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stall = max(stall, time.perf_counter() - start - 0.001)
+
+    client = site.client()
+    seasons = [
+        Season(
+            f"{SITE_URL}catalogue/serie-{number}/saison1/",
+            client=client,
+            episodes_js_cache=EpisodesJsCache(),
+            languages={"VOSTFR"},
+        )
+        for number in range(SEASONS)
+    ]
+    ticking = asyncio.ensure_future(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(season.episodes() for season in seasons))
+    elapsed = time.perf_counter() - start
+    done = True
+    await ticking
+    return elapsed, stall
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    site = make_site(SEASONS, per_page=48, seasons=1, episodes=EPISODES, hosts=4)
+    for processes in (0, os.cpu_count()):
+        default_parse_pool.configure(processes)
+        # Start the processes before timing
+        asyncio.run(crawl(site))
+        elapsed, stall = asyncio.run(crawl(site))
+        default_parse_pool.shutdown()
+        print(
+            f"{processes or 'inline':>6} processes: {elapsed:6.2f}s, "
+            f"longest event loop stall {stall * 1000:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
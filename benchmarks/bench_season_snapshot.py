@@ -0,0 +1,79 @@
+"""
+Time save_seasons and load_seasons on a snapshot of synthetic seasons.
+
+    python benchmarks/bench_season_snapshot.py
+"""
+
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from anime_sama_api.compact import (  # noqa: E402
+    CompactSeason,
+    PlayerTable,
+    load_seasons,
+    save_seasons,
+)
+from anime_sama_api.episode import Episode, Languages, Players  # noqa: E402
+
+
+def season(number: int, number_of_episodes: int) -> CompactSeason:
+    def players(lang: str, episode: int) -> Players:
+        return Players(
+            [
+                f"https://host{host}.com/embed-{number}-{lang}-{episode}.html"
+                for host in range(3)
+            ]
+        )
+
+    episodes = [
+        Episode(
+            Languages(
+                vostfr=players("vo", episode),
+                vj=players("vo", episode),
+                vf=players("vf", episode),
+            ),
+            f"serie-{number}",
+            "saison1",
+            f"Episode {episode}",
+            episode,
+        )
+        for episode in range(1, number_of_episodes + 1)
+    ]
+    compact = CompactSeason.from_episodes(episodes, table=PlayerTable())
+    compact.filevers = {"vostfr": 1, "vf": 1}
+    return compact
+
+
+def main() -> None:
+    logging.disable(logging.WARNING)
+    print(
+        f"{'seasons':>7} {'episodes':>8} {'size (MiB)':>10} {'save (ms)':>10} {'load (ms)':>10}"
+    )
+    for number_of_seasons, number_of_episodes in ((1000, 12), (3000, 24), (1000, 200)):
+        seasons = [
+            season(number, number_of_episodes) for number in range(number_of_seasons)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "seasons.json"
+
+            start = time.perf_counter()
+            save_seasons(seasons, path)
+            saved = time.perf_counter()
+            loaded = load_seasons(path, PlayerTable())
+            end = time.perf_counter()
+
+            assert len(loaded) == number_of_seasons
+            print(
+                f"{number_of_seasons:>7} {number_of_episodes:>8}"
+                f" {path.stat().st_size / 2**20:>10.1f}"
+                f" {(saved - start) * 1000:>10.0f} {(end - saved) * 1000:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+from collections import Counter
+
+import httpx
+
+
+SITE_URL = "https://anime-sama.fr/"
+
+
+def season_page(program: str, filever: int = 1, vo_flag: str = "jp") -> str:
+    return (
+        "<html>\n<body>\n"
+        '<a href="../vostfr/">\n'
+        f'<img class="flag" src="{SITE_URL}img/flag_{vo_flag}.png" alt="">\n'
+        '\t\t<p class="lang">VO</p>\n</a>\n'
+        "<script>\n"
+        "function chargerListe() {\n"
+        "\tresetListe();\n"
+        f"\t{program}\n"
+        "}\n"
+        "</script>\n"
+        f'<script src="episodes.js?filever={filever}"></script>\n'
+        "</body>\n</html>\n"
+    )
+
+
+def catalogue_card(
+    slug: str,
+    name: str,
+    alternative_names: str = "",
+    genres: str = "Action, Aventure",
+    categories: str = "Anime",
+    languages: str = "VOSTFR",
+) -> str:
+    return (
+        '<div class="shrink-0 m-3 catalog-card">\n'
+        f'    <a href="{SITE_URL}catalogue/{slug}/">\n'
+        f'        <img class="imageCarteHorizontale" src="https://cdn.anime-sama.fr/{slug}.jpg" alt="">\n'
+        "        <div>\n"
+        f'            <h1 class="text-white font-bold">{name}</h1>\n'
+        f'            <p class="text-white text-xs opacity-40 truncate">{alternative_names}</p>\n'
+        f'            <p class="text-white text-xs opacity-70 truncate">{genres}</p>\n'
+        f'            <p class="text-white text-xs opacity-70 truncate">{categories}</p>\n'
+        f'            <p class="text-white text-xs opacity-70 truncate">{languages}</p>\n'
+        "        </div>\n"
+        "    </a>\n"
+        "</div>\n"
+    )
+
+
+def search_page(cards: list[str], last_page: int) -> str:
+    pagination = "\n".join(
+        f'<a href="?search=&page={number}">{number}</a>'
+        for number in range(1, last_page + 1)
+    )
+    return (
+        "<html>\n<body>\n"
+        "<script>\nconsole.log('<a href=\"nope\">');\n</script>\n"
+        '<div id="list_catalog">\n'
+        f"{''.join(cards)}"
+        "</div>\n"
+        f'<div id="list_pagination">\n{pagination}\n</div>\n'
+        "</body>\n</html>\n"
+    )
+
+
+def add_search(site: "MockSite", query: str, pages: list[list[str]]) -> None:
+    """Add the results pages of a search, each page being a list of cards."""
+    url = f"{SITE_URL}catalogue/?search={query}"
+    for number, cards in enumerate(pages, start=1):
+        page = search_page(cards, len(pages))
+        site.pages[url if number == 1 else f"{url}&page={number}"] = page
+
+
+def catalogue_page(
+    seasons: list[tuple[str, str]],
+    advancement: str = "Aucune donnée.",
+    correspondence: str = "Aucune donnée.",
+    synopsis: str = "",
+    mature: bool = False,
+) -> str:
+    warning = (
+        '<div class="bg-yellow-500">\n<p>Contenu destiné à un public averti</p>\n</div>\n'
+        if mature
+        else ""
+    )
+    panels = "\n".join(f'\tpanneauAnime("{name}", "{link}");' for name, link in seasons)
+    return (
+        "<html>\n<body>\n"
+        f"{warning}"
+        "<h2>Synopsis</h2>\n"
+        f'<p class="text-sm">{synopsis}</p>\n'
+        f'<p class="text-sm">Avancement : <span class="font-bold">{advancement}</span></p>\n'
+        f'<p class="text-sm">Correspondance : <span class="font-bold">{correspondence}</span></p>\n'
+        f"<script>\n{panels}\n</script>\n"
+        "</body>\n</html>\n"
+    )
+
+
+def episodes_js(*players: list[str]) -> str:
+    return "\n".join(
+        f"var eps{number} = [{', '.join(repr(player) for player in episodes)}];"
+        for number, episodes in enumerate(players, start=1)
+    )
+
+
+class MockSite:
+    """
+    An in-memory anime-sama. Each GET on an unknown URL is a 404, the URLs in
+    errors answer with their status code.
+    """
+
+    def __init__(self, pages: dict[str, str] | None = None) -> None:
+        self.pages = pages or {}
+        self.errors: dict[str, int] = {}
+        self.requests: Counter[str] = Counter()
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        self.requests[url] += 1
+        if url in self.errors:
+            return httpx.Response(self.errors[url])
+        if url not in self.pages:
+            return httpx.Response(404)
+        return httpx.Response(200, text=self.pages[url])
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    def add_season(
+        self,
+        season_url: str,
+        lang_id: str,
+        program: str,
+        *players: list[str],
+        filever: int = 1,
+    ) -> None:
+        page_url = f"{season_url}{lang_id}/"
+        self.pages[page_url] = season_page(program, filever)
+        self.pages[f"{page_url}episodes.js?filever={filever}"] = episodes_js(*players)
+
+
+HOSTS = ("vidmoly.net", "sibnet.ru", "sendvid.com", "oneupload.to")
+
+
+def make_site(
+    number_of_series: int,
+    per_page: int = 2,
+    seasons: int | None = None,
+    episodes: int | None = None,
+    hosts: int = 1,
+    missing: str | None = None,
+    filever: int = 1,
+) -> MockSite:
+    """
+    A site of number_of_series catalogues, per_page on each results page.
+    serie-i has seasons seasons (i + 1 by default), its season j has episodes
+    episodes (j by default) with a player on each of the first hosts of HOSTS.
+    The season missing (ie: "serie-3/saison2") has no page.
+    """
+    site = MockSite()
+    add_search(
+        site,
+        "",
+        [
+            [
+                catalogue_card(f"serie-{i}", f"Serie {i}")
+                for i in range(page, min(page + per_page, number_of_series))
+            ]
+            for page in range(0, number_of_series, per_page)
+        ],
+    )
+    for i in range(number_of_series):
+        url = f"{SITE_URL}catalogue/serie-{i}/"
+        numbers = range(1, (i + 1 if seasons is None else seasons) + 1)
+        site.pages[url] = catalogue_page(
+            [(f"Saison {j}", f"saison{j}/vostfr") for j in numbers]
+        )
+        for j in numbers:
+            if f"serie-{i}/saison{j}" == missing:
+                continue
+            count = j if episodes is None else episodes
+            site.add_season(
+                f"{url}saison{j}/",
+                "vostfr",
+                f"creerListe(1, {count});",
+                *(
+                    [f"https://{host}/{i}-{j}-{k}" for k in range(count)]
+                    for host in HOSTS[:hosts]
+                ),
+                filever=filever,
+            )
+    return site
@@ -0,0 +1,121 @@
+"""
+A results page and a homepage section written after the markup of anime-sama,
+with links to the catalogue outside of the cards, a card in a script, lazy
+loaded images and empty fields.
+"""
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <title>Catalogue - Anime-Sama</title>
+    <link rel="canonical" href="https://anime-sama.fr/catalogue/">
+    <script src="https://anime-sama.fr/js/contenu/script_search.js?v=2"></script>
+</head>
+<body class="bg-black">
+    <nav id="navbar">
+        <a href="https://anime-sama.fr/"><img src="https://anime-sama.fr/img/logo.png" alt="Logo"></a>
+        <a href="https://anime-sama.fr/catalogue/">Catalogue</a>
+        <a href="https://anime-sama.fr/planning/" class="text-white">Planning</a>
+    </nav>
+    <form action="https://anime-sama.fr/catalogue/" method="get">
+        <input type="text" name="search" placeholder="Rechercher...">
+        <input type="checkbox" name="type[]" value="Anime" id="Anime"><label for="Anime">Anime</label>
+    </form>
+    <script>
+        var lastSeen = '<a href="https://anime-sama.fr/catalogue/hidden/"><img src="x.jpg"><h1>Hidden</h1>';
+    </script>
+    <div id="list_catalog" class="flex flex-wrap">
+        <div class="shrink-0 m-3 rounded border-2 border-gray-400 border-opacity-50 shadow-2xl shadow-black hover:shadow-zinc-900 hover:opacity-80 bg-black bg-opacity-40 transition-all duration-200 cursor-pointer">
+            <a href="https://anime-sama.fr/catalogue/one-piece/">
+                <img class="imageCarteHorizontale w-72 h-44 object-cover rounded-t-sm" src="https://cdn.statically.io/gh/Anime-Sama/IMG/img/contenu/one-piece.jpg" alt="One Piece">
+                <div>
+                    <h1 class="text-white font-bold uppercase text-md line-clamp-2">One Piece</h1>
+                    <p class="text-white text-xs opacity-40 truncate italic">Wan Pīsu, ワンピース</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">Action, Aventure, Comédie, Drame, Fantasy, Shonen</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">Anime, Scans</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">VOSTFR, VF</p>
+                </div>
+            </a>
+        </div>
+        <div class="shrink-0 m-3 rounded border-2 border-gray-400 border-opacity-50 shadow-2xl">
+            <a href="https://anime-sama.fr/catalogue/tom-et-jerry/" target="_self">
+                <img class="imageCarteHorizontale w-72 h-44 object-cover rounded-t-sm" loading="lazy" src="https://cdn.statically.io/gh/Anime-Sama/IMG/img/contenu/tom-et-jerry.jpg" alt="Tom &amp; Jerry">
+                <div>
+                    <h1 class="text-white font-bold uppercase text-md line-clamp-2">Tom &amp; Jerry</h1>
+                    <p class="text-white text-xs opacity-40 truncate italic">Tom &#039;n&#039; Jerry</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">Comédie, Enfants</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">Anime</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">VF</p>
+                </div>
+            </a>
+        </div>
+        <div class="shrink-0 m-3 rounded border-2">
+            <a href="https://anime-sama.fr/catalogue/blue-lock/">
+                <img class="imageCarteHorizontale w-72 h-44 object-cover rounded-t-sm" src="https://cdn.statically.io/gh/Anime-Sama/IMG/img/contenu/blue-lock.jpg" alt="Blue Lock">
+                <div>
+                    <h1 class="text-white font-bold uppercase text-md line-clamp-2">Blue Lock</h1>
+                    <p class="text-white text-xs opacity-40 truncate italic"></p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">Sport, Shonen</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">Anime, Scans</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">VOSTFR</p>
+                </div>
+            </a>
+        </div>
+        <div class="shrink-0 m-3 rounded border-2">
+            <a href="https://anime-sama.fr/catalogue/frieren/">
+                <img class="imageCarteHorizontale w-72 h-44 object-cover rounded-t-sm" data-src="https://cdn.statically.io/gh/Anime-Sama/IMG/img/contenu/frieren.jpg" src="https://anime-sama.fr/img/loading.gif" alt="">
+                <div>
+                    <h1 class="text-white font-bold uppercase text-md line-clamp-2">Frieren</h1>
+                    <p class="text-white text-xs opacity-40 truncate italic">Sousou no Frieren</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">Aventure, Fantasy, Drame</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">Anime</p>
+                    <p class="mt-0.5 text-gray-300 font-medium text-xs truncate">VOSTFR, VF</p>
+                </div>
+            </a>
+        </div>
+    </div>
+    <div id="list_pagination" class="flex justify-center">
+        <a href="https://anime-sama.fr/catalogue/?search=&amp;page=1" class="bg-blue-600">1</a>
+        <a href="https://anime-sama.fr/catalogue/?search=&amp;page=2">2</a>
+        <a href="https://anime-sama.fr/catalogue/?search=&amp;page=34">34</a>
+    </div>
+    <footer>
+        <a href="https://anime-sama.fr/catalogue/">Tout le catalogue</a>
+        <p>Anime-Sama ne stocke aucune vidéo.</p>
+    </footer>
+</body>
+</html>
+"""
+
+HOMEPAGE_SECTION = """<!-- Derniers ajouts animes -->
+<div class="flex overflow-x-auto" id="containerAjoutsAnimes">
+    <div class="shrink-0 m-3 rounded border-2 border-gray-400 border-opacity-50">
+        <a href="https://anime-sama.fr/catalogue/one-piece/saison11/vostfr/">
+            <img class="imageCarteHorizontale w-72 h-44 object-cover rounded-t-sm" src="https://cdn.statically.io/gh/Anime-Sama/IMG/img/contenu/one-piece.jpg" alt="One Piece">
+            <div>
+                <h1 class="text-white font-bold uppercase text-md line-clamp-2">One Piece</h1>
+                <button class="bg-gray-800 text-white text-xs">Anime</button>
+                <button class="bg-blue-600 text-white text-xs">VOSTFR</button>
+                <button class="bg-gray-800 text-white text-xs">Episode 1120</button>
+            </div>
+        </a>
+    </div>
+    <div class="shrink-0 m-3 rounded border-2 border-gray-400 border-opacity-50">
+        <a href="https://anime-sama.fr/catalogue/dan-da-dan/saison2/vf/">
+            <img class="imageCarteHorizontale w-72 h-44 object-cover rounded-t-sm" src="https://cdn.statically.io/gh/Anime-Sama/IMG/img/contenu/dan-da-dan.jpg" alt="">
+            <div>
+                <h1 class="text-white font-bold uppercase text-md line-clamp-2">Dandadan</h1>
+                <button class="bg-gray-800 text-white text-xs"></button>
+                <button class="bg-blue-600 text-white text-xs"> VF </button>
+                <button class="bg-gray-800 text-white text-xs">Saison 2 Episode 3</button>
+            </div>
+        </a>
+    </div>
+</div>
+<!-- Derniers ajouts scans -->
+<div class="flex overflow-x-auto" id="containerAjoutsScans">
+    <a href="https://anime-sama.fr/catalogue/one-piece/scan/vf/">
+        <img src="https://cdn.statically.io/gh/Anime-Sama/IMG/img/contenu/one-piece.jpg" alt="">
+        <h1>One Piece</h1>
+"""
@@ -1,6 +1,13 @@
+import asyncio
+from collections import Counter
+
+import httpx
 import pytest
 
+from anime_sama_api.catalogue import Catalogue, CatalogueDetails, fill_details
+
 from .data import catalogue_data, season_data
+from .data.mock_site import SITE_URL, MockSite, catalogue_page
 
 pytest_plugins = ("pytest_asyncio",)
 
@@ -32,3 +39,114 @@ async def test_correspondance():
         await catalogue_data.mha.correspondence()
         == "Saison 7 Épisode 21 -> Chapitre 399"
     )
+
+
+@pytest.mark.asyncio
+async def test_details():
+    url = f"{SITE_URL}catalogue/serie/"
+    site = MockSite(
+        {
+            url: catalogue_page(
+                [("Saison 1", "saison1/vostfr"), ("Film", "film/vf")],
+                advancement="Saison 2 en 2026",
+                correspondence="Episode 12 -> Chapitre 40",
+                synopsis="Une <b>longue</b> histoire.",
+                mature=True,
+            )
+        }
+    )
+    catalogue = Catalogue(url, client=site.client())
+
+    details = await catalogue.details()
+    assert details == CatalogueDetails(
+        advancement="Saison 2 en 2026",
+        correspondence="Episode 12 -> Chapitre 40",
+        synopsis="Une <b>longue</b> histoire.",
+        is_mature=True,
+        seasons=details.seasons,
+    )
+    assert [season.url for season in details.seasons] == [
+        url + "saison1/",
+        url + "film/",
+    ]
+    assert await catalogue.details() is details
+    assert await catalogue.synopsis() == "Une <b>longue</b> histoire."
+    assert site.requests[url] == 1
+
+    missing = Catalogue(f"{SITE_URL}catalogue/missing/", client=site.client())
+    assert await missing.details() == CatalogueDetails()
+
+    unavailable = Catalogue(
+        url,
+        client=httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda _: httpx.Response(503))
+        ),
+    )
+    assert not (await unavailable.details()).fetched
+    unavailable.client = site.client()
+    assert (await unavailable.details()).fetched
+
+
+@pytest.mark.asyncio
+async def test_fill_details():
+    in_flight = max_in_flight = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        name = request.url.path.split("/")[-2]
+        return httpx.Response(200, text=catalogue_page([], synopsis=name))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    catalogues = [
+        Catalogue(f"{SITE_URL}catalogue/serie-{i}/", client=client) for i in range(50)
+    ]
+
+    details = await fill_details(catalogues, concurrency=4)
+    assert [detail.synopsis for detail in details] == [f"serie-{i}" for i in range(50)]
+    assert max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_all_episodes():
+    url = f"{SITE_URL}catalogue/serie/"
+    seasons = [(f"Saison {i}", f"saison{i}/vostfr") for i in range(1, 7)]
+    site = MockSite({url: catalogue_page(seasons)})
+    for i in range(1, 7):
+        site.add_season(
+            f"{url}saison{i}/",
+            "vostfr",
+            f"creerListe(1, {i});",
+            [f"https://vidmoly.net/{i}-{episode}" for episode in range(i)],
+        )
+
+    # Seasons being resolved, a season probe its languages concurrently
+    in_flight: Counter[str] = Counter()
+    max_in_flight = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal max_in_flight
+        season = request.url.path.split("/")[3]
+        in_flight[season] += 1
+        max_in_flight = max(max_in_flight, len(+in_flight))
+        await asyncio.sleep(0.001)
+        in_flight[season] -= 1
+        return site.handler(request)
+
+    catalogue = Catalogue(
+        url, client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    results = [pair async for pair in catalogue.all_episodes(concurrency=1)]
+
+    assert sorted(season.name for season, _ in results) == [name for name, _ in seasons]
+    for season, episodes in results:
+        assert len(episodes) == int(season.name.split()[-1])
+        assert episodes[0].languages["vostfr"][0].startswith("https://vidmoly.net/")
+    assert max_in_flight == 1
+
+    results = [pair async for pair in catalogue.all_episodes(concurrency=3)]
+    assert len(results) == 6
+    assert max_in_flight == 3
@@ -0,0 +1,112 @@
+import pytest
+
+from anime_sama_api.catalogue_index import CatalogueIndex
+from anime_sama_api.top_level import AnimeSama
+
+from .data.mock_site import SITE_URL, MockSite, add_search, catalogue_card
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def cards(page: int, suffix: str = "") -> list[str]:
+    return [
+        catalogue_card(f"serie-{page}-{i}", f"Serie {page}-{i}{suffix}", "Alt, Other")
+        for i in range(3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_refresh_and_reload(tmp_path):
+    site = MockSite()
+    add_search(site, "", [cards(page) for page in range(5)])
+    index = CatalogueIndex(tmp_path / "index.json")
+
+    assert await index.refresh(AnimeSama(SITE_URL, site.client())) == 15
+    assert len(index) == 15
+
+    reloaded = CatalogueIndex(tmp_path / "index.json")
+    assert list(reloaded) == list(index)
+    catalogue = reloaded.catalogues()[0]
+    assert catalogue.name == "Serie 0-0"
+    assert catalogue.alternative_names == ["Alt", "Other"]
+    assert catalogue.languages == {"VOSTFR"}
+
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_stops_early(tmp_path):
+    site = MockSite()
+    add_search(site, "", [cards(page) for page in range(5)])
+    index = CatalogueIndex(tmp_path / "index.json")
+    await index.refresh(AnimeSama(SITE_URL, site.client()))
+
+    # A new catalogue and a renamed one on the first page
+    site.pages.clear()
+    site.requests.clear()
+    first_page = (
+        [catalogue_card("new", "New")] + cards(0, " (renamed)")[:1] + cards(0)[1:]
+    )
+    add_search(site, "", [first_page] + [cards(page) for page in range(1, 5)])
+
+    assert await index.refresh(AnimeSama(SITE_URL, site.client()), prefetch=1) == 2
+    assert sum(site.requests.values()) == 2
+    assert len(index) == 16
+    assert [record.name for record in index][:2] == ["New", "Serie 0-0 (renamed)"]
+
+    # A full refresh remove the catalogues that disappeared
+    site.pages.clear()
+    add_search(site, "", [cards(0)])
+    await index.refresh(AnimeSama(SITE_URL, site.client()), full=True)
+    assert len(index) == 3
+
+
+@pytest.mark.asyncio
+async def test_full_refresh_with_failed_page(tmp_path):
+    site = MockSite()
+    add_search(site, "", [cards(page) for page in range(3)])
+    index = CatalogueIndex(tmp_path / "index.json")
+    await index.refresh(AnimeSama(SITE_URL, site.client()), full=True)
+    fully_refreshed_at = index.fully_refreshed_at
+
+    # The catalogues of an unavailable page are not removed
+    site.errors[f"{SITE_URL}catalogue/?search=&page=2"] = 503
+    await index.refresh(AnimeSama(SITE_URL, site.client()), full=True)
+    assert len(index) == 9
+    assert index.fully_refreshed_at == fully_refreshed_at
+
+    # Nor anything else while a page is missing
+    add_search(site, "", [cards(0), cards(1)])
+    await index.refresh(AnimeSama(SITE_URL, site.client()), full=True)
+    assert len(index) == 9
+
+    site.errors.clear()
+    await index.refresh(AnimeSama(SITE_URL, site.client()), full=True)
+    assert len(index) == 6
+    assert index.fully_refreshed_at > fully_refreshed_at
+
+
+@pytest.mark.asyncio
+async def test_refresh_if_stale(tmp_path):
+    site = MockSite()
+    add_search(site, "", [cards(page) for page in range(5)])
+    anime_sama = AnimeSama(SITE_URL, site.client())
+    index = CatalogueIndex(tmp_path / "index.json")
+
+    assert await index.refresh_if_stale(anime_sama) == 15
+    assert index.fully_refreshed_at > 0
+
+    # Recent enough, nothing is downloaded
+    site.requests.clear()
+    assert await index.refresh_if_stale(anime_sama) == 0
+    assert not site.requests
+
+    # Only the first pages until nothing changes
+    await index.refresh_if_stale(anime_sama, max_age=0)
+    assert 0 < sum(site.requests.values()) < 5
+
+    # A removed catalogue disappears with a full refresh
+    add_search(site, "", [cards(page) for page in range(4)])
+    site.requests.clear()
+    await CatalogueIndex(tmp_path / "index.json").refresh_if_stale(
+        anime_sama, full_max_age=0
+    )
+    assert len(CatalogueIndex(tmp_path / "index.json")) == 12
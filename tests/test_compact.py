@@ -0,0 +1,113 @@
+from urllib.parse import urlsplit
+
+import pytest
+
+from anime_sama_api.compact import (
+    CompactSeason,
+    PlayerTable,
+    load_seasons,
+    save_seasons,
+)
+from anime_sama_api.episode import Episode, Languages, Players, plan_players
+
+
+def make_episodes() -> list[Episode]:
+    return [
+        Episode(
+            Languages(
+                vostfr=Players([f"https://a.com/{n}", f"https://vidmoly.to/{n}"]),
+                vj=Players([f"https://a.com/{n}", f"https://vidmoly.to/{n}"]),
+                vf=Players([f"https://b.com/{n}"]),
+            ),
+            "serie",
+            "saison1",
+            f"Episode {n}",
+            n,
+        )
+        for n in range(1, 4)
+    ]
+
+
+def test_round_trip():
+    episodes = make_episodes()
+    table = PlayerTable()
+    compact = CompactSeason.from_episodes(episodes, table=table)
+
+    assert len(compact) == 3
+    assert list(compact) == episodes
+    assert compact[-1] == episodes[-1]
+    assert compact[1:] == episodes[1:]
+    # The players are not swapped nor rewritten again
+    assert compact[0].languages["vostfr"] == [
+        "https://vidmoly.net/1",
+        "https://a.com/1",
+    ]
+    assert compact.serie_name == "serie"
+    assert compact.season_name == "saison1"
+    with pytest.raises(IndexError):
+        compact[3]
+
+
+def test_sharing():
+    table = PlayerTable()
+    first = CompactSeason.from_episodes(make_episodes(), table=table)
+    second = CompactSeason.from_episodes(make_episodes(), table=table)
+
+    record = first.records[0]
+    assert record.players[0] is record.players[1]  # vostfr and vj
+    assert record.lang_ids is second.records[2].lang_ids
+    assert table.hostname("https://vidmoly.net/1") is table.hostname(
+        "https://vidmoly.net/2"
+    )
+
+
+def test_hostnames_are_kept_by_host():
+    table = PlayerTable()
+    urls = [
+        "https://vidmoly.net/1",
+        "https://User@WWW.Sibnet.ru:443/shell.php?videoid=1",
+        "https://a.com?x=1",
+        "//b.com/embed",
+        "not a link",
+    ]
+    for url in urls:
+        assert table.hostname(url) == urlsplit(url).hostname
+
+    for number in range(100):
+        table.hostname(f"https://vidmoly.net/{number}")
+    assert len(table._hostnames) == len(urls)
+
+
+def test_plan_players():
+    episodes = make_episodes()
+    compact = CompactSeason.from_episodes(episodes, table=PlayerTable())
+
+    assert compact.plan_players(["VF"], ["vidmoly.net"]) == plan_players(
+        episodes, ["VF"], ["vidmoly.net"]
+    )
+    assert compact.plan_players(["VOSTFR"], bans=["a.com"])[0] == [
+        "https://vidmoly.net/1",
+        "https://b.com/1",
+    ]
+
+
+def test_snapshot(tmp_path):
+    episodes = make_episodes()
+    compact = CompactSeason.from_episodes(episodes, table=PlayerTable())
+    compact.url = "https://anime-sama.fr/catalogue/serie/saison1/"
+    compact.filevers = {"vostfr": 3, "vf": 1}
+
+    save_seasons([compact, CompactSeason("empty")], tmp_path / "seasons.json")
+    loaded, empty = load_seasons(tmp_path / "seasons.json", PlayerTable())
+
+    # The players are not swapped nor rewritten again
+    assert list(loaded) == episodes
+    assert loaded.url == compact.url
+    assert loaded.filevers == {"vostfr": 3, "vf": 1}
+    assert loaded.records[0].players[0] is loaded.records[0].players[1]
+    assert empty.serie_name == "empty" and len(empty) == 0
+
+    data = compact.to_dict()
+    data["version"] = 0
+    with pytest.raises(ValueError):
+        CompactSeason.from_dict(data)
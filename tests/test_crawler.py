@@ -0,0 +1,169 @@
+import json
+import sqlite3
+
+import pytest
+
+from anime_sama_api.crawler import (
+    CrawlJournal,
+    Crawler,
+    CrawlSink,
+    JsonLinesSink,
+    crawl,
+)
+from anime_sama_api.parse_pool import default_parse_pool
+from anime_sama_api.season_cache import EpisodesJsCache, MissingPagesCache
+from anime_sama_api.top_level import AnimeSama
+
+from .data.mock_site import SITE_URL, make_site
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def use_fresh_caches(monkeypatch) -> None:
+    # The seasons use the default caches, they must not leak between crawls
+    monkeypatch.setattr(
+        "anime_sama_api.season.default_episodes_js_cache", EpisodesJsCache()
+    )
+    monkeypatch.setattr(
+        "anime_sama_api.season.default_missing_pages", MissingPagesCache()
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    use_fresh_caches(monkeypatch)
+
+
+def read_jsonl(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text("utf-8").splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_crawl_jsonl(tmp_path):
+    site = make_site(4)
+    output = tmp_path / "site.jsonl"
+
+    stats = await crawl(
+        AnimeSama(SITE_URL, site.client()), output, catalogue_workers=2, queue_size=1
+    )
+
+    records = read_jsonl(output)
+    assert (stats.catalogues, stats.seasons, stats.episodes) == (4, 10, 20)
+    assert len(records) == 20
+    assert {
+        (record["season_url"], record["name"], record["languages"]["vostfr"][0])
+        for record in records
+    } == {
+        (
+            f"{SITE_URL}catalogue/serie-{i}/saison{j}/",
+            f"Episode {k + 1}",
+            f"https://vidmoly.net/{i}-{j}-{k}",
+        )
+        for i in range(4)
+        for j in range(1, i + 2)
+        for k in range(j)
+    }
+
+
+@pytest.mark.asyncio
+async def test_crawl_resume(tmp_path, monkeypatch):
+    output = tmp_path / "site.jsonl"
+    site = make_site(4, missing="serie-3/saison2")
+
+    stats = await crawl(AnimeSama(SITE_URL, site.client()), output)
+    assert (stats.catalogues, stats.seasons, stats.failed_seasons) == (3, 9, 1)
+    journal = CrawlJournal(tmp_path / "site.jsonl.journal")
+    assert journal.is_catalogue_done(f"{SITE_URL}catalogue/serie-2/")
+    assert not journal.is_catalogue_done(f"{SITE_URL}catalogue/serie-3/")
+
+    # Written after the last checkpoint by a crawl that was interrupted
+    with open(output, "a", encoding="utf-8") as file:
+        file.write('{"catalogue_url": "cut')
+
+    use_fresh_caches(monkeypatch)
+    site = make_site(4)
+    stats = await crawl(AnimeSama(SITE_URL, site.client()), output)
+    assert (stats.catalogues, stats.seasons, stats.episodes) == (1, 1, 2)
+    assert (stats.skipped_catalogues, stats.skipped_seasons) == (3, 3)
+    assert site.requests[f"{SITE_URL}catalogue/serie-2/"] == 0
+    assert site.requests[f"{SITE_URL}catalogue/serie-3/saison1/vostfr/"] == 0
+
+    records = read_jsonl(output)
+    assert len(records) == 20
+    assert len({(record["season_url"], record["index"]) for record in records}) == 20
+
+    assert CrawlJournal(tmp_path / "site.jsonl.journal").finished
+
+    # A finished crawl is not resumed
+    stats = await crawl(AnimeSama(SITE_URL, site.client()), output)
+    assert (stats.seasons, stats.skipped_catalogues) == (10, 0)
+    assert len(read_jsonl(output)) == 20
+
+
+@pytest.mark.asyncio
+async def test_crawl_with_failed_page(tmp_path):
+    output = tmp_path / "site.jsonl"
+    site = make_site(6)
+    site.errors[f"{SITE_URL}catalogue/?search=&page=2"] = 503
+
+    stats = await crawl(AnimeSama(SITE_URL, site.client()), output)
+    assert (stats.catalogues, stats.failed_pages) == (4, 1)
+    assert not stats.complete
+    assert not CrawlJournal(tmp_path / "site.jsonl.journal").finished
+
+    site.errors.clear()
+    stats = await crawl(AnimeSama(SITE_URL, site.client()), output)
+    assert (stats.catalogues, stats.skipped_catalogues) == (2, 4)
+    assert stats.complete
+    assert len(read_jsonl(output)) == sum(j for i in range(6) for j in range(i + 2))
+
+
+@pytest.mark.asyncio
+async def test_crawl_sqlite(tmp_path):
+    output = tmp_path / "site.db"
+    await crawl(AnimeSama(SITE_URL, make_site(3).client()), output)
+    # A season written again replace the previous rows
+    await crawl(AnimeSama(SITE_URL, make_site(3).client()), output)
+
+    with sqlite3.connect(output) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM episodes").fetchone() == (10,)
+        assert connection.execute(
+            "SELECT url FROM players JOIN episodes USING (season_url, episode_index)"
+            " WHERE serie_name = 'Serie 2' AND name = 'Episode 3'"
+            " AND lang_id = 'vostfr'"
+        ).fetchall() == [("https://vidmoly.net/2-3-2",)]
+
+
+class BrokenSink(JsonLinesSink):
+    def write(self, records):
+        raise OSError("No space left on device")
+
+
+@pytest.mark.asyncio
+async def test_crawl_crashed_worker(tmp_path):
+    sink: CrawlSink = BrokenSink(tmp_path / "site.jsonl")
+    crawler = Crawler(AnimeSama(SITE_URL, make_site(6).client()), sink, queue_size=1)
+
+    with pytest.raises(OSError):
+        await crawler.run()
+    assert crawler.stats.seasons == 0
+
+
+@pytest.mark.asyncio
+async def test_crawl_parse_pool(tmp_path):
+    output = tmp_path / "site.jsonl"
+    sink = JsonLinesSink(output)
+    crawler = Crawler(
+        AnimeSama(SITE_URL, make_site(4).client()), sink, parse_processes=2
+    )
+    crawler.parse_pool.min_size = 0
+    offloaded = default_parse_pool.offloaded
+
+    stats = await crawler.run()
+    sink.close()
+    assert stats.episodes == 20
+    assert len(read_jsonl(output)) == 20
+    # Everything parsed in the pool of the crawler, the default one is untouched
+    assert crawler.parse_pool.offloaded == 14
+    assert default_parse_pool.offloaded == offloaded
+    assert not default_parse_pool.enabled
@@ -0,0 +1,196 @@
+import asyncio
+import multiprocessing
+import sqlite3
+import time
+
+import httpx
+import pytest
+
+from anime_sama_api.distributed import DistributedCrawler, WorkQueue
+from anime_sama_api.top_level import AnimeSama
+
+from .data.mock_site import SITE_URL, make_site
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def test_work_queue_leases(tmp_path):
+    queue = WorkQueue(tmp_path / "crawl.db", lease_time=60, max_attempts=2)
+    assert queue.add("season", "https://a/")
+    assert not queue.add("season", "https://a/")
+    assert queue.add("catalogue", "https://b/", {"name": "B"})
+
+    # Catalogues before seasons
+    item = queue.lease("worker-1")
+    assert (item.kind, item.url, item.payload, item.attempts) == (
+        "catalogue",
+        "https://b/",
+        {"name": "B"},
+        1,
+    )
+    season = queue.lease("worker-1")
+    assert season.url == "https://a/"
+    assert queue.lease("worker-2") is None
+    assert queue.unfinished() == 2
+
+    queue.release(season, "timeout")
+    season = queue.lease("worker-2")
+    assert season.attempts == 2
+    queue.release(season, "timeout")
+    assert queue.lease("worker-2") is None
+
+    assert queue.complete(item)
+    assert queue.counts() == {("catalogue", "done"): 1, ("season", "failed"): 1}
+    assert queue.unfinished() == 0
+
+    queue.requeue()
+    assert queue.unfinished() == 2
+
+
+def test_work_queue_expired_lease(tmp_path):
+    queue = WorkQueue(tmp_path / "crawl.db", lease_time=0.05)
+    queue.add("season", "https://a/")
+    dead = queue.lease("dead")
+    assert queue.lease("alive") is None
+
+    time.sleep(0.1)
+    alive = queue.lease("alive")
+    assert alive.url == dead.url
+    # The dead worker came back too late
+    assert not queue.renew(dead)
+    assert not queue.complete(dead)
+
+    assert queue.renew(alive)
+    time.sleep(0.03)
+    assert queue.renew(alive)
+    time.sleep(0.03)
+    assert queue.lease("other") is None
+    assert queue.complete(alive)
+    assert not queue.renew(alive)
+
+
+def crawl_worker(path: str, worker_id: str) -> None:
+    anime_sama = AnimeSama(SITE_URL, make_site(6).client())
+    crawler = DistributedCrawler(
+        anime_sama, path, worker_id, concurrency=2, lease_time=1.0, poll_interval=0.05
+    )
+    asyncio.run(crawler.run())
+
+
+def test_distributed_crawl(tmp_path):
+    path = tmp_path / "crawl.db"
+
+    # A worker that died while listing the site
+    queue = WorkQueue(path, lease_time=0.5)
+    queue.add("listing", SITE_URL)
+    assert queue.lease("dead").kind == "listing"
+
+    processes = [
+        multiprocessing.Process(target=crawl_worker, args=(str(path), f"worker-{i}"))
+        for i in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    assert queue.counts() == {
+        ("listing", "done"): 1,
+        ("catalogue", "done"): 6,
+        ("season", "done"): 21,
+    }
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM episodes").fetchone() == (56,)
+        assert connection.execute(
+            "SELECT attempts FROM work_items WHERE kind = 'listing'"
+        ).fetchone() == (2,)
+
+
+@pytest.mark.asyncio
+async def test_distributed_crawl_is_idempotent(tmp_path):
+    path = tmp_path / "crawl.db"
+    for _ in range(2):
+        stats = await DistributedCrawler(
+            AnimeSama(SITE_URL, make_site(4).client()), path, poll_interval=0.01
+        ).run()
+        WorkQueue(path).requeue()
+
+    assert stats.seasons == 10
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM episodes").fetchone() == (20,)
+        assert connection.execute("SELECT COUNT(*) FROM players").fetchone() == (40,)
+
+
+@pytest.mark.asyncio
+async def test_listing_with_failed_page_is_retried(tmp_path):
+    path = tmp_path / "crawl.db"
+    site = make_site(4)
+    page_2 = f"{SITE_URL}catalogue/?search=&page=2"
+    site.errors[page_2] = 503
+    stats = await DistributedCrawler(
+        AnimeSama(SITE_URL, site.client()), path, poll_interval=0.01
+    ).run()
+    assert stats.catalogues == 2
+    assert site.requests[page_2] == 3
+    assert WorkQueue(path).counts()[("listing", "failed")] == 1
+
+    site.errors.clear()
+    WorkQueue(path).requeue()
+    stats = await DistributedCrawler(
+        AnimeSama(SITE_URL, site.client()), path, poll_interval=0.01
+    ).run()
+    assert stats.catalogues == 4
+    assert WorkQueue(path).counts()[("listing", "done")] == 1
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_during_a_long_listing(tmp_path):
+    path = tmp_path / "crawl.db"
+    site = make_site(4)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if "search=" in str(request.url):
+            await asyncio.sleep(0.3)
+        return site.handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    stats = await DistributedCrawler(
+        AnimeSama(SITE_URL, client), path, lease_time=0.2, poll_interval=0.01
+    ).run()
+
+    # The idle workers did not take the listing over once its first lease ended
+    assert stats.catalogues == 4
+    with sqlite3.connect(path) as connection:
+        assert connection.execute(
+            "SELECT attempts FROM work_items WHERE kind = 'listing'"
+        ).fetchone() == (1,)
+
+
+@pytest.mark.asyncio
+async def test_locked_database_does_not_block_the_loop(tmp_path):
+    path = tmp_path / "crawl.db"
+    crawler = DistributedCrawler(
+        AnimeSama(SITE_URL, make_site(2).client()), path, poll_interval=0.01
+    )
+
+    # Another worker holds the write lock for a while
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    asyncio.get_running_loop().call_later(0.3, other.execute, "COMMIT")
+
+    ticks = 0
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.ensure_future(ticker())
+    stats = await crawler.run()
+    ticking.cancel()
+    other.close()
+
+    assert stats.seasons == 3
+    assert ticks >= 10
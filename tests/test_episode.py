@@ -0,0 +1,91 @@
+import random
+
+from anime_sama_api.episode import (
+    Episode,
+    Languages,
+    PlayerPreferences,
+    Players,
+    plan_players,
+)
+
+
+def test_players_host_rewrites():
+    players = Players(
+        [
+            "https://sibnet.ru/1",
+            "https://vidmoly.to/embed-1.html",
+            "https://www.vidmoly.to/embed-2.html",
+            "not a link",
+        ]
+    )
+
+    # The first two players are swapped
+    assert players == [
+        "https://vidmoly.net/embed-1.html",
+        "https://sibnet.ru/1",
+        "https://www.vidmoly.net/embed-2.html",
+        "not a link",
+    ]
+    assert players.hostname(players[0]) == "vidmoly.net"
+    assert players.hostname(players[2]) == "www.vidmoly.net"
+    assert players.hostname("not a link") is None
+
+
+def test_sort_and_filter():
+    players = Players(
+        [
+            "https://b.com/1",
+            "https://a.com/1",
+            "https://c.com/1",
+            "https://d.com/1",
+            "relative/link",
+        ]
+    )
+
+    assert players.sort_and_filter(["c.com", "a.com", "c.com"], ["d.com"]) == [
+        "https://c.com/1",
+        "https://a.com/1",
+        "https://b.com/1",
+        "relative/link",
+    ]
+    assert PlayerPreferences().sort_and_filter(players) == list(players)
+
+
+def test_consume_player():
+    languages = Languages(
+        vostfr=Players(["https://a.com/vostfr", "https://b.com/vostfr"]),
+        vf=Players(["https://a.com/vf", "https://b.com/vf"]),
+    )
+
+    players = list(languages.consume_player(["VF"], ["a.com"], ["b.com"]))
+    assert players[0] == "https://a.com/vf"
+    assert "https://a.com/vostfr" in players
+    assert not any("b.com" in player for player in players)
+
+
+def test_plan_players():
+    rng = random.Random(42)
+    hosts = ["a.com", "b.com", "c.com", "d.com"]
+    episodes = [
+        Episode(
+            Languages(
+                {
+                    lang_id: Players(
+                        [
+                            f"https://{rng.choice(hosts)}/{lang_id}/{number}"
+                            for number in range(rng.randint(0, 3))
+                        ]
+                    )
+                    for lang_id in rng.sample(["vostfr", "vf", "vf1", "vj", "va"], 3)
+                }
+            )
+        )
+        for _ in range(200)
+    ]
+
+    plans = plan_players(episodes, ["VF", "VOSTFR"], ["c.com", "a.com"], ["d.com"])
+    for episode, plan in zip(episodes, plans):
+        expected = episode.consume_player(
+            ["VF", "VOSTFR"], ["c.com", "a.com"], ["d.com"]
+        )
+        assert plan == list(dict.fromkeys(expected))
@@ -0,0 +1,101 @@
+import httpx
+import pytest
+
+from anime_sama_api.http_cache import CacheEntry, CachingTransport, HTTPCache
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def etag_server(requests: list[httpx.Request]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, text="<html>page</html>")
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_revalidation(tmp_path):
+    requests: list[httpx.Request] = []
+    cache = HTTPCache(tmp_path)
+    client = httpx.AsyncClient(transport=CachingTransport(etag_server(requests), cache))
+
+    first = await client.get("https://anime-sama.fr/catalogue/one-piece/")
+    second = await client.get("https://anime-sama.fr/catalogue/one-piece/")
+
+    assert first.text == second.text == "<html>page</html>"
+    assert second.status_code == 200
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert cache.stats.misses == 1
+    assert cache.stats.revalidated == 1
+
+
+@pytest.mark.asyncio
+async def test_persistent_and_fresh_hits(tmp_path):
+    requests: list[httpx.Request] = []
+    client = httpx.AsyncClient(
+        transport=CachingTransport(etag_server(requests), HTTPCache(tmp_path))
+    )
+    await client.get("https://anime-sama.fr/catalogue/one-piece/")
+
+    # Simulate a new process
+    cache = HTTPCache(tmp_path)
+    client = httpx.AsyncClient(
+        transport=CachingTransport(etag_server(requests), cache, max_age=60)
+    )
+    response = await client.get("https://anime-sama.fr/catalogue/one-piece/")
+
+    assert response.text == "<html>page</html>"
+    assert len(requests) == 1
+    assert cache.stats.hits == 1
+
+
+def test_lru_eviction(tmp_path):
+    cache = HTTPCache(tmp_path, max_bytes=25)
+    for name in ("a", "b", "c"):
+        cache.set(CacheEntry(name, 200, [], b"0123456789", 0))
+        if name == "b":
+            assert cache.get("a") is not None  # "a" become more recent than "b"
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.size <= 25
+    assert cache.stats.evicted == 1
+
+
+def test_size_is_tracked(tmp_path):
+    cache = HTTPCache(tmp_path)
+    cache.set(CacheEntry("a", 200, [], b"0123456789", 0))
+    cache.set(CacheEntry("b", 200, [], b"01234", 0))
+    cache.set(CacheEntry("a", 200, [], b"012", 0))
+    assert cache.size == 8
+    cache.close()
+
+    cache = HTTPCache(tmp_path)
+    assert cache.size == 8
+    cache.clear()
+    assert cache.size == 0
+
+
+def test_reads_do_not_write(tmp_path):
+    cache = HTTPCache(tmp_path, max_bytes=25)
+    cache.set(CacheEntry("a", 200, [], b"0123456789", 0))
+    changes = cache._db.total_changes
+
+    for _ in range(10):
+        assert cache.get("a") is not None
+    assert cache._db.total_changes == changes
+
+    # The access times are written before they are needed
+    cache.set(CacheEntry("b", 200, [], b"0123456789", 0))
+    assert cache.get("a") is not None
+    cache.set(CacheEntry("c", 200, [], b"0123456789", 0))
+    assert cache.get("b") is None
+    cache.close()
+
+    cache = HTTPCache(tmp_path)
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+import pytest
+
+from anime_sama_api.limiter import AdaptiveLimiter, RateLimitedTransport
+
+pytest_plugins = ("pytest_asyncio",)
+
+HOST = "anime-sama.fr"
+
+
+def client_for(limiter: AdaptiveLimiter, statuses: list[int]) -> httpx.AsyncClient:
+    async def handler(_: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)
+        return httpx.Response(statuses.pop(0) if statuses else 200)
+
+    return httpx.AsyncClient(
+        transport=RateLimitedTransport(httpx.MockTransport(handler), limiter)
+    )
+
+
+@pytest.mark.asyncio
+async def test_backoff_and_recovery():
+    limiter = AdaptiveLimiter(rate=100, burst=100, cooldown=0, recovery_step=10)
+    client = client_for(limiter, [429, 503])
+
+    await client.get(f"https://{HOST}/")
+    assert limiter.rate(HOST) == 50
+    await client.get(f"https://{HOST}/")
+    assert limiter.rate(HOST) == 25
+    assert limiter.throttled == 2
+
+    for _ in range(10):
+        await client.get(f"https://{HOST}/")
+    assert limiter.rate(HOST) == 100
+
+
+@pytest.mark.asyncio
+async def test_latency_baseline():
+    async def respond(status_code: int, latency: float) -> None:
+        await limiter.acquire(HOST)
+        limiter.release(HOST, status_code, latency)
+
+    limiter = AdaptiveLimiter(rate=1000, burst=1000, cooldown=0, recovery_step=100)
+    # Fast 404s between normal pages do not become the reference
+    for _ in range(20):
+        await respond(404, 0.01)
+        await respond(200, 0.1)
+    assert limiter.throttled == 0
+
+    # A single fast page only slows down for a while
+    limiter = AdaptiveLimiter(rate=1000, burst=1000, cooldown=0, recovery_step=100)
+    await respond(200, 0.01)
+    for _ in range(100):
+        await respond(200, 0.1)
+    assert limiter.throttled > 0
+    assert limiter.rate(HOST) == 1000
+
+    # A real slowdown is still detected
+    throttled = limiter.throttled
+    for _ in range(5):
+        await respond(200, 1.0)
+    assert limiter.throttled > throttled
+
+
+@pytest.mark.asyncio
+async def test_token_bucket():
+    limiter = AdaptiveLimiter(rate=50, burst=1)
+    client = client_for(limiter, [])
+
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(*(client.get(f"https://{HOST}/") for _ in range(6)))
+
+    # The first request use the burst, the 5 others wait 1/50s each
+    assert asyncio.get_running_loop().time() - start >= 5 / 50
+
+
+@pytest.mark.asyncio
+async def test_max_in_flight():
+    limiter = AdaptiveLimiter(rate=1000, burst=1000, max_in_flight=2)
+    in_flight = max_in_flight = 0
+
+    async def handler(_: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200)
+
+    client = httpx.AsyncClient(
+        transport=RateLimitedTransport(httpx.MockTransport(handler), limiter)
+    )
+    await asyncio.gather(*(client.get(f"https://{HOST}/") for _ in range(8)))
+
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_after():
+    limiter = AdaptiveLimiter(rate=1000, burst=1000)
+
+    def handler(_: httpx.Request) -> httpx.Response:
+        return httpx.Response(429, headers={"Retry-After": "1"})
+
+    client = httpx.AsyncClient(
+        transport=RateLimitedTransport(httpx.MockTransport(handler), limiter)
+    )
+    await client.get(f"https://{HOST}/")
+
+    assert limiter._reserve(limiter._host(HOST)) > 0.5
@@ -0,0 +1,114 @@
+import os
+import pickle
+
+import pytest
+
+from anime_sama_api.catalogue import Catalogue
+from anime_sama_api.parse_pool import ParsePool, default_parse_pool
+from anime_sama_api.season import Season
+from anime_sama_api.season_cache import (
+    EpisodesJsCache,
+    MissingPagesCache,
+    default_episodes_js_cache,
+)
+from anime_sama_api.session import get_default_client
+from anime_sama_api.top_level import AnimeSama
+
+from .data.mock_site import SITE_URL, MockSite, make_site
+
+pytest_plugins = ("pytest_asyncio",)
+
+SERIE_URL = f"{SITE_URL}catalogue/serie-0/"
+
+
+def make_site_with_warnings() -> MockSite:
+    site = make_site(1, seasons=1)
+    site.add_season(
+        f"{SERIE_URL}saison1/",
+        "vostfr",
+        'creerListe(1, 2); inconnu(1); newSPF("Film");',
+        ["https://vidmoly.net/1", "https://vidmoly.net/2", "https://vidmoly.net/3"],
+    )
+    return site
+
+
+@pytest.fixture
+def pool():
+    default_parse_pool.configure(2, min_size=0)
+    yield default_parse_pool
+    default_parse_pool.configure(0, min_size=32 * 1024)
+
+
+def worker_pid() -> int:
+    return os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_inline_below_min_size():
+    pool = ParsePool(processes=2, min_size=10)
+    assert await pool.run(9, worker_pid) == os.getpid()
+    assert pool.offloaded == 0
+    assert await pool.run(10, worker_pid) != os.getpid()
+    assert pool.offloaded == 1
+    pool.shutdown()
+
+    assert await ParsePool().run(10**9, worker_pid) == os.getpid()
+
+
+def test_pickle_without_client():
+    site = make_site_with_warnings()
+    season = Season(
+        f"{SERIE_URL}saison1/",
+        client=site.client(),
+        episodes_js_cache=EpisodesJsCache(),
+        missing_pages=MissingPagesCache(),
+    )
+    copy = pickle.loads(pickle.dumps(season))
+    assert (copy.url, copy.name, copy.serie_name) == (
+        season.url,
+        season.name,
+        season.serie_name,
+    )
+    assert copy.client is get_default_client()
+    assert copy.episodes_js_cache is default_episodes_js_cache
+
+    catalogue = Catalogue(SERIE_URL, name="Serie", client=site.client())
+    catalogue._page = "<html>"
+    copy = pickle.loads(pickle.dumps(catalogue))
+    assert copy.name == "Serie"
+    assert copy._page is None
+    assert copy.client is get_default_client()
+
+
+@pytest.mark.asyncio
+async def test_parse_in_pool(pool, monkeypatch):
+    monkeypatch.setattr(
+        "anime_sama_api.season.default_missing_pages", MissingPagesCache()
+    )
+    site = make_site_with_warnings()
+    client = site.client()
+
+    (catalogue,) = await AnimeSama(SITE_URL, client).search("")
+    assert catalogue.client is client
+    (season,) = await catalogue.seasons()
+    assert season.client is client
+    season.episodes_js_cache = EpisodesJsCache()
+    episodes = await season.episodes()
+    assert pool.offloaded == 3
+
+    pool.configure(0)
+    inline_season = Season(
+        season.url,
+        name=season.name,
+        serie_name=season.serie_name,
+        client=client,
+        episodes_js_cache=EpisodesJsCache(),
+    )
+    assert await inline_season.episodes() == episodes
+    assert [episode.name for episode in episodes] == ["Episode 1", "Episode 2", "Film"]
+
+    # The warnings come back from the process, once
+    assert season.warnings == inline_season.warnings
+    assert {warning.message for warning in season.warnings} == {
+        "Unknown function 'inconnu'"
+    }
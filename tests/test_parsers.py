@@ -0,0 +1,200 @@
+import random
+import re
+
+from anime_sama_api.parsers import (
+    ProgramCall,
+    episode_program,
+    has_mature_warning,
+    iter_cards,
+    parse_program,
+    strip_scripts,
+    synopsis_of,
+    text_after_label,
+)
+
+from .data.mock_site import SITE_URL, catalogue_card, search_page
+from .data.site_pages import HOMEPAGE_SECTION, SEARCH_PAGE
+
+
+# The regex used before the scanners, kept as reference
+def regex_catalogue_cards(html: str, site_url: str) -> list[tuple[str, ...]]:
+    text_without_script = re.sub(r"<script[\W\w]+?</script>", "", html)
+    return [
+        match.groups()
+        for match in re.finditer(
+            rf"href=\"({site_url}catalogue/.+)\"[\W\w]+?src=\"(.+?)\"[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<",
+            text_without_script,
+        )
+    ]
+
+
+def regex_release_cards(html: str, site_url: str) -> list[tuple[str, ...]]:
+    return [
+        match.groups()
+        for match in re.finditer(
+            rf"href=\"({site_url}catalogue/.+)\"[\W\w]+?src=\"(.+?)\"[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<[\W\w]+?>(.*)\n?<",
+            html,
+        )
+    ]
+
+
+def scanner_catalogue_cards(html: str, site_url: str) -> list[tuple[str, ...]]:
+    return list(iter_cards(strip_scripts(html), site_url, 5))
+
+
+def assert_equivalent(html: str) -> None:
+    assert scanner_catalogue_cards(html, SITE_URL) == regex_catalogue_cards(
+        html, SITE_URL
+    )
+    assert list(iter_cards(html, SITE_URL, 4)) == regex_release_cards(html, SITE_URL)
+
+
+def test_search_page():
+    html = search_page(
+        [
+            catalogue_card("one-piece", "One Piece", "ワンピース", "Action, Aventure"),
+            catalogue_card("mha", "My Hero Academia", "", "", "Anime, Scans", "VF"),
+            catalogue_card("escape", "Tom &amp; Jerry", "Tom &#39;n&#39; Jerry"),
+        ],
+        3,
+    )
+    assert scanner_catalogue_cards(html, SITE_URL)[0] == (
+        f"{SITE_URL}catalogue/one-piece/",
+        "https://cdn.anime-sama.fr/one-piece.jpg",
+        "One Piece",
+        "ワンピース",
+        "Action, Aventure",
+        "Anime",
+        "VOSTFR",
+    )
+    assert_equivalent(html)
+
+
+def test_quirks():
+    assert_equivalent(
+        # Attributes after the href, text directly followed by a tag on the next line
+        f'<a href="{SITE_URL}catalogue/a/" class="x">\n<img src="i.jpg">\n'
+        "<h1>Name\n<p>Alt</p>\r\n<p>G1 - G2</p><p>Anime</p>\n<p></p>\n"
+    )
+    assert_equivalent(
+        # Script hiding a card, unterminated src and truncated last card
+        f'<script>"href="{SITE_URL}catalogue/hidden/"</script>\n'
+        f'<a href="{SITE_URL}catalogue/b/">\n<img src="\nsrc="b.jpg">\n'
+        "<h1>B</h1>\n<p>x</p>\n<p>y</p>\n<p>z</p>\n<p>w</p>\n"
+        f'<a href="{SITE_URL}catalogue/c/">\n<img src="c.jpg">\n<h1>C</h1>\n'
+    )
+    assert_equivalent(f'<a href="{SITE_URL}catalogue/">\n<script>')
+
+
+def test_site_pages():
+    cards = scanner_catalogue_cards(SEARCH_PAGE, SITE_URL)
+    assert [card[2] for card in cards] == [
+        "One Piece",
+        "Tom &amp; Jerry",
+        "Blue Lock",
+        "Frieren",
+    ]
+    assert cards[2][3:] == ("", "Sport, Shonen", "Anime, Scans", "VOSTFR")
+    assert cards[0][:2] == (
+        f"{SITE_URL}catalogue/one-piece/",
+        "https://cdn.statically.io/gh/Anime-Sama/IMG/img/contenu/one-piece.jpg",
+    )
+    # The image of a lazy loaded card is in data-src
+    assert cards[3][1].endswith("frieren.jpg")
+    assert_equivalent(SEARCH_PAGE)
+    assert [card[-1] for card in iter_cards(HOMEPAGE_SECTION, SITE_URL, 4)] == [
+        "Episode 1120",
+        "Saison 2 Episode 3",
+    ]
+    assert_equivalent(HOMEPAGE_SECTION)
+
+
+def test_links_without_image():
+    cards = [
+        catalogue_card(f"anime-{i}", f"Anime {i}").replace(" src=", " srcset=")
+        for i in range(3)
+    ]
+    assert_equivalent(search_page(cards, 1))
+    assert_equivalent(search_page(cards + [catalogue_card("last", "Last")], 1))
+
+
+def test_random_pages():
+    fragments = [
+        f'<a href="{SITE_URL}catalogue/serie/">',
+        f'href="{SITE_URL}catalogue/x" id="y"',
+        '<img src="img.jpg" alt="">',
+        'src="',
+        "<script>",
+        "</script>",
+        "<h1>Name</h1>",
+        "<p>Action, Aventure</p>",
+        "<p></p>",
+        "text",
+        "<",
+        ">",
+        '"',
+        "\n",
+        "\n",
+        "\n\t",
+        "\r\n",
+    ]
+    rng = random.Random(42)
+    for _ in range(3000):
+        html = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 40)))
+        assert_equivalent(html)
+
+
+def test_random_catalogue_pages():
+    fragments = [
+        "Avancement",
+        "Synopsis",
+        '<div class="',
+        "yellow",
+        '">',
+        "public averti",
+        "text",
+        "<",
+        ">",
+        "\n",
+    ]
+    rng = random.Random(42)
+    for _ in range(3000):
+        html = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 30)))
+
+        advancement = re.findall(r"Avancement.+?>(.+?)<", html)
+        assert text_after_label(html, "Avancement") == (
+            advancement[0] if advancement else ""
+        )
+        synopsis = re.findall(r"Synopsis[\W\w]+?>(.+)<", html)
+        assert synopsis_of(html) == (synopsis[0] if synopsis else "")
+        assert has_mature_warning(html) == bool(
+            re.search(r'<div class=".*?yellow.*?">[\W\w]+?public averti', html)
+        )
+
+
+def test_episode_program():
+    fragments = ["resetListe();", " ", "\n", "\r", "\t", "}", "creerListe(1, 2);"]
+    rng = random.Random(42)
+    for _ in range(3000):
+        html = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 20)))
+        programs = re.findall(r"resetListe\(\); *[\n\r]+\t*(.*?)}", html, re.DOTALL)
+        assert episode_program(html) == (programs[-1] if programs else None)
+
+
+def test_parse_program():
+    program = (
+        "creerListe(1, 12);\n"
+        "\t// newSP(3);\n"
+        '\tnewSPF("Film; partie 1");newSP(12.5)\n'
+        "\t/* finirListe(1); */ newSP('5\\'bis', -2,);\n"
+        "\tresetListe;\n"
+        "\tfinirListe(13)"
+    )
+    assert parse_program(program) == [
+        ProgramCall("creerListe", (1, 12), "creerListe(1, 12)"),
+        ProgramCall("newSPF", ("Film; partie 1",), 'newSPF("Film; partie 1")'),
+        ProgramCall("newSP", (12.5,), "newSP(12.5)"),
+        ProgramCall("newSP", ("5'bis", -2), "newSP('5\\'bis', -2,)"),
+        ProgramCall("", (), "resetListe"),
+        ProgramCall("finirListe", (13,), "finirListe(13)"),
+    ]
@@ -0,0 +1,86 @@
+import httpx
+import pytest
+
+from anime_sama_api.catalogue import Catalogue
+from anime_sama_api.retry import RetryPolicy, RetryTransport, retry_after
+
+pytest_plugins = ("pytest_asyncio",)
+
+URL = "https://anime-sama.fr/catalogue/serie/"
+FAST = RetryPolicy(backoff=0.001)
+
+
+def transport_for(responses: list[httpx.Response | Exception]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_retry_transient_errors():
+    transport = RetryTransport(
+        transport_for(
+            [httpx.ConnectError("boom"), httpx.Response(502), httpx.Response(200)]
+        ),
+        FAST,
+    )
+    response = await httpx.AsyncClient(transport=transport).get(URL)
+
+    assert response.status_code == 200
+    assert transport.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_budget():
+    transport = RetryTransport(
+        transport_for([httpx.Response(503)] * 3 + [httpx.Response(200)]), FAST
+    )
+    response = await httpx.AsyncClient(transport=transport).get(URL)
+    assert response.status_code == 503
+
+    transport = RetryTransport(
+        transport_for([httpx.Response(503, headers={"Retry-After": "120"})]), FAST
+    )
+    response = await httpx.AsyncClient(transport=transport).get(URL)
+    assert response.status_code == 503
+    assert transport.retries == 0
+
+
+@pytest.mark.asyncio
+async def test_no_retry_for_post_and_404():
+    transport = RetryTransport(transport_for([httpx.Response(502)]), FAST)
+    client = httpx.AsyncClient(transport=transport)
+    assert (await client.post(URL)).status_code == 502
+
+    transport = RetryTransport(transport_for([httpx.Response(404)]), FAST)
+    client = httpx.AsyncClient(transport=transport)
+    assert (await client.get(URL)).status_code == 404
+    assert transport.retries == 0
+
+
+def test_retry_after():
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "5"})) == 5
+    assert (
+        retry_after(
+            httpx.Response(
+                429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+            )
+        )
+        == 0
+    )
+    assert retry_after(httpx.Response(429)) is None
+
+
+@pytest.mark.asyncio
+async def test_failed_page_is_not_cached():
+    client = httpx.AsyncClient(
+        transport=transport_for([httpx.Response(502), httpx.Response(200, text="ok")])
+    )
+    catalogue = Catalogue(URL, client=client)
+
+    assert await catalogue.page() == ""
+    assert await catalogue.page() == "ok"
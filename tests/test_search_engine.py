@@ -0,0 +1,97 @@
+import time
+
+from anime_sama_api.catalogue_index import CatalogueRecord
+from anime_sama_api.search_engine import CatalogueSearchEngine, tokenize
+
+URL = "https://anime-sama.fr/catalogue/"
+
+records = [
+    CatalogueRecord(
+        f"{URL}one-piece/",
+        "One Piece",
+        ("ワンピース",),
+        ("Action", "Aventure", "Comédie"),
+        ("Anime", "Scans"),
+        ("VF", "VOSTFR"),
+    ),
+    CatalogueRecord(
+        f"{URL}my-hero-academia/",
+        "My Hero Academia",
+        ("Boku no Hero Academia", "MHA"),
+        ("Action", "Super-pouvoirs"),
+        ("Anime", "Scans"),
+        ("VF", "VOSTFR"),
+    ),
+    CatalogueRecord(
+        f"{URL}pokemon/",
+        "Pokémon",
+        ("Pocket Monsters",),
+        ("Aventure",),
+        ("Anime",),
+        ("VF",),
+    ),
+    CatalogueRecord(
+        f"{URL}one-punch-man/",
+        "One Punch Man",
+        (),
+        ("Action", "Comédie"),
+        ("Anime",),
+        ("VOSTFR",),
+    ),
+]
+engine = CatalogueSearchEngine(records)
+
+
+def names(catalogues) -> list[str]:
+    return [catalogue.name for catalogue in catalogues]
+
+
+def test_tokenize():
+    assert tokenize("Pokémon: L'Été!") == ["pokemon", "l", "ete"]
+
+
+def test_exact_prefix_and_accents():
+    assert names(engine.search("one")) == ["One Piece", "One Punch Man"]
+    assert names(engine.search("one pi")) == ["One Piece"]
+    assert names(engine.search("POKEMON")) == ["Pokémon"]
+    assert names(engine.search("mha")) == ["My Hero Academia"]
+    assert names(engine.search("boku hero")) == ["My Hero Academia"]
+    assert engine.search("naruto") == []
+
+
+def test_fuzzy():
+    assert names(engine.search("pokemno")) == []  # transposition is two edits
+    assert names(engine.search("pokmon")) == ["Pokémon"]
+    assert names(engine.search("academai")) == []
+    assert names(engine.search("acadmia")) == ["My Hero Academia"]
+    # Exact matches come before fuzzy ones
+    assert names(engine.search("piece")) == ["One Piece"]
+
+
+def test_facets():
+    assert names(engine.search(genres=["comedie"])) == ["One Piece", "One Punch Man"]
+    assert names(engine.search("one", languages=["VF"])) == ["One Piece"]
+    assert names(engine.search(categories=["Scans"], genres=["Action"])) == [
+        "One Piece",
+        "My Hero Academia",
+    ]
+    assert engine.facet_values("languages") == {"vf": 3, "vostfr": 3}
+    assert names(engine.search(limit=2)) == ["One Piece", "My Hero Academia"]
+
+
+def test_same_catalogue_objects():
+    assert engine.search("one piece")[0] is engine.search("piece")[0]
+    assert engine.search("one piece")[0].url == f"{URL}one-piece/"
+
+
+def test_query_latency():
+    big_engine = CatalogueSearchEngine(
+        CatalogueRecord(f"{URL}serie-{i}/", f"Serie {i} {word}", (f"Alt {i}",))
+        for i in range(5000)
+        for word in ("piece", "hero", "punch", "pokemon")[i % 4 : i % 4 + 1]
+    )
+
+    start = time.perf_counter()
+    for _ in range(100):
+        big_engine.search("pokem", limit=10)
+    assert (time.perf_counter() - start) / 100 < 0.01
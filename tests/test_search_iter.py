@@ -0,0 +1,113 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from anime_sama_api.top_level import AnimeSama
+
+from .data.mock_site import SITE_URL, MockSite, make_site
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def make_results(number_of_pages: int) -> MockSite:
+    """3 catalogues, without seasons, on each results page."""
+    return make_site(3 * number_of_pages, per_page=3, seasons=0)
+
+
+def slow_client(site: MockSite, stats: dict[str, int]) -> httpx.AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        await asyncio.sleep(random.uniform(0, 0.01))
+        stats["in_flight"] -= 1
+        return site.handler(request)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_search_iter_keeps_order_and_bound():
+    site = make_results(10)
+    stats = {"in_flight": 0, "max_in_flight": 0}
+    anime_sama = AnimeSama(SITE_URL, slow_client(site, stats))
+
+    names = [c.name async for c in anime_sama.search_iter("", prefetch=3)]
+
+    assert names == [f"Serie {i}" for i in range(30)]
+    assert stats["max_in_flight"] == 3
+    assert await anime_sama.search("", prefetch=1) == await anime_sama.all_catalogues()
+
+
+@pytest.mark.asyncio
+async def test_search_iter_stop_early():
+    site = make_results(10)
+    anime_sama = AnimeSama(SITE_URL, site.client())
+
+    iterator = anime_sama.catalogues_iter(prefetch=2)
+    async for catalogue in iterator:
+        if catalogue.name == "Serie 3":
+            break
+    await iterator.aclose()
+
+    assert sum(site.requests.values()) <= 4
+
+
+@pytest.mark.asyncio
+async def test_search_pages_iter():
+    anime_sama = AnimeSama(SITE_URL, make_results(3).client())
+
+    pages = [
+        [c.name for c in catalogues]
+        async for catalogues in anime_sama.search_pages_iter("", prefetch=2)
+    ]
+    assert pages == [[f"Serie {3 * page + i}" for i in range(3)] for page in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_failed_page_is_reported():
+    site = make_results(3)
+    site.errors[f"{SITE_URL}catalogue/?search=&page=2"] = 503
+    anime_sama = AnimeSama(SITE_URL, site.client())
+
+    pages = [
+        catalogues and len(catalogues)
+        async for catalogues in anime_sama.search_pages_iter("")
+    ]
+    assert pages == [3, None, 3]
+    assert len(await anime_sama.all_catalogues()) == 6
+
+
+@pytest.mark.asyncio
+async def test_search_without_results():
+    site = MockSite({f"{SITE_URL}catalogue/?search=nothing": "<html></html>"})
+    anime_sama = AnimeSama(SITE_URL, site.client())
+
+    assert await anime_sama.search("nothing") == []
+    assert [c async for c in anime_sama.search_iter("nothing")] == []
+
+
+@pytest.mark.asyncio
+async def test_search_limit_and_until():
+    site = make_results(10)
+    anime_sama = AnimeSama(SITE_URL, site.client())
+
+    results = await anime_sama.search("", prefetch=2, limit=4)
+    assert [c.name for c in results] == [
+        "Serie 0",
+        "Serie 1",
+        "Serie 2",
+        "Serie 3",
+    ]
+    assert sum(site.requests.values()) <= 4
+
+    site.requests.clear()
+    results = await anime_sama.search(
+        "", prefetch=1, until=lambda catalogue: catalogue.name == "Serie 7"
+    )
+    assert results[-1].name == "Serie 7"
+    assert len(results) == 8
+    assert sum(site.requests.values()) <= 4
+
+    assert await anime_sama.search("", limit=0) == []
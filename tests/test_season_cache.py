@@ -0,0 +1,235 @@
+import json
+
+import pytest
+
+from anime_sama_api.season import Season
+from anime_sama_api.season_cache import EpisodesJsCache, MissingPagesCache
+
+from .data.mock_site import SITE_URL, MockSite, make_site
+
+pytest_plugins = ("pytest_asyncio",)
+
+SEASON_URL = f"{SITE_URL}catalogue/serie-0/saison1/"
+JS_URL = f"{SEASON_URL}vostfr/episodes.js?filever="
+
+
+def make_single_season(filever: int) -> MockSite:
+    """A site of serie-0 with a season of 2 episodes on 2 hosts."""
+    return make_site(1, seasons=1, episodes=2, hosts=2, filever=filever)
+
+
+@pytest.mark.asyncio
+async def test_known_filever_is_not_downloaded(tmp_path):
+    cache = EpisodesJsCache(tmp_path)
+    site = make_single_season(filever=1)
+    season = Season(SEASON_URL, client=site.client(), episodes_js_cache=cache)
+
+    episodes = await season.episodes(refresh=True)
+    assert await season.episodes(refresh=True) == episodes
+    assert site.requests[JS_URL + "1"] == 1
+
+    # The cache survive a restart
+    season = Season(
+        SEASON_URL, client=site.client(), episodes_js_cache=EpisodesJsCache(tmp_path)
+    )
+    assert await season.episodes(refresh=True) == episodes
+    assert site.requests[JS_URL + "1"] == 1
+
+
+@pytest.mark.asyncio
+async def test_filever_change_is_reported(tmp_path):
+    cache = EpisodesJsCache(tmp_path)
+    season = Season(
+        SEASON_URL, client=make_single_season(1).client(), episodes_js_cache=cache
+    )
+    pages = {page.lang_id: page for page in await season.get_all_pages()}
+    assert not pages["vostfr"].filever_changed
+
+    season.client = make_single_season(2).client()
+    pages = {page.lang_id: page for page in await season.get_all_pages(refresh=True)}
+    assert pages["vostfr"].filever_changed
+    assert cache.filever_changes == 1
+    assert cache.latest(f"{SEASON_URL}vostfr/") == JS_URL + "2"
+    assert cache.get(JS_URL + "1") is None
+
+
+@pytest.mark.asyncio
+async def test_only_catalogue_languages_are_probed():
+    site = make_single_season(filever=1)
+    season = Season(
+        SEASON_URL,
+        client=site.client(),
+        episodes_js_cache=EpisodesJsCache(),
+        languages={"VOSTFR"},
+        missing_pages=MissingPagesCache(),
+    )
+    await season.episodes()
+
+    assert set(site.requests) == {f"{SEASON_URL}vostfr/", JS_URL + "1"}
+
+
+@pytest.mark.asyncio
+async def test_missing_pages_are_remembered(tmp_path):
+    site = make_single_season(filever=1)
+    season = Season(
+        SEASON_URL,
+        client=site.client(),
+        episodes_js_cache=EpisodesJsCache(page_max_age=3600),
+        missing_pages=MissingPagesCache(tmp_path),
+    )
+    episodes = await season.episodes()
+    assert sum(site.requests.values()) == 10  # 9 languages + episodes.js
+
+    # Persisted for the next run
+    season.missing_pages = MissingPagesCache(tmp_path)
+    assert await season.episodes() == episodes
+    assert sum(site.requests.values()) == 10
+    assert season.missing_pages.probes_skipped == 8
+
+    # Opt-in full probe
+    assert await season.episodes(full_probe=True) == episodes
+    assert sum(site.requests.values()) == 18
+
+
+def make_season(site: MockSite, cache: EpisodesJsCache) -> Season:
+    return Season(
+        SEASON_URL,
+        client=site.client(),
+        episodes_js_cache=cache,
+        languages={"VOSTFR"},
+        missing_pages=MissingPagesCache(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_remembered_pages_are_reused():
+    site = make_single_season(filever=1)
+    season = make_season(site, EpisodesJsCache(page_max_age=3600))
+    episodes = await season.episodes()
+    assert site.requests == {f"{SEASON_URL}vostfr/": 1, JS_URL + "1": 1}
+
+    assert await season.episodes() == episodes
+    assert await season.episodes() == episodes
+    assert site.requests == {f"{SEASON_URL}vostfr/": 1, JS_URL + "1": 1}
+
+    await season.episodes(refresh=True)
+    assert site.requests == {f"{SEASON_URL}vostfr/": 2, JS_URL + "1": 1}
+
+
+@pytest.mark.asyncio
+async def test_pages_are_not_reused_by_default():
+    site = make_single_season(filever=1)
+    season = make_season(site, EpisodesJsCache())
+    await season.episodes()
+
+    # The HTML is downloaded again and a new filever would be noticed
+    await season.episodes()
+    assert site.requests == {f"{SEASON_URL}vostfr/": 2, JS_URL + "1": 1}
+
+
+@pytest.mark.asyncio
+async def test_remembered_directory(tmp_path):
+    site = make_single_season(filever=1)
+    await make_season(site, EpisodesJsCache(tmp_path, page_max_age=3600)).episodes()
+
+    await make_season(site, EpisodesJsCache(tmp_path, page_max_age=3600)).episodes()
+    assert site.requests == {f"{SEASON_URL}vostfr/": 1, JS_URL + "1": 1}
+
+    await make_season(site, EpisodesJsCache(tmp_path)).episodes()
+    assert site.requests == {f"{SEASON_URL}vostfr/": 2, JS_URL + "1": 1}
+
+
+@pytest.mark.asyncio
+async def test_remembered_names_are_refreshed():
+    site = make_single_season(filever=1)
+    # Nothing kept, the episodes.js is downloaded each time
+    season = make_season(site, EpisodesJsCache(max_entries=0, page_max_age=3600))
+    await season.episodes()
+
+    # A third episode is released without changing the filever
+    site.add_season(
+        SEASON_URL,
+        "vostfr",
+        "creerListe(1, 3);",
+        ["https://vidmoly.net/1", "https://vidmoly.net/2", "https://vidmoly.net/3"],
+    )
+    episodes = await season.episodes()
+
+    assert [episode.name for episode in episodes] == [
+        "Episode 1",
+        "Episode 2",
+        "Episode 3",
+    ]
+    assert site.requests[f"{SEASON_URL}vostfr/"] == 2
+
+
+@pytest.mark.asyncio
+async def test_names_not_matching_players_are_not_refreshed():
+    site = MockSite()
+    # Seen on some seasons: the program names less episodes than there are
+    site.add_season(
+        SEASON_URL,
+        "vostfr",
+        "creerListe(1, 1);",
+        ["https://vidmoly.net/1", "https://vidmoly.net/2"],
+    )
+    season = make_season(site, EpisodesJsCache(page_max_age=3600))
+    for _ in range(3):
+        await season.episodes()
+
+    assert site.requests[f"{SEASON_URL}vostfr/"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_when_remembered_url_fails():
+    cache = EpisodesJsCache(max_entries=0, page_max_age=3600)
+    season = make_season(make_single_season(1), cache)
+    await season.episodes()
+
+    site = make_single_season(2)
+    season.client = site.client()
+    await season.episodes()
+
+    assert site.requests == {
+        JS_URL + "1": 1,
+        f"{SEASON_URL}vostfr/": 1,
+        JS_URL + "2": 1,
+    }
+    assert cache.filever_changes == 1
+
+
+def test_pages_are_bounded_apart_from_episodes_js():
+    cache = EpisodesJsCache(max_entries=1, page_max_age=3600, max_page_bytes=10)
+    cache.set(JS_URL + "1", "eps1 = [];")
+    cache.set_page("a", "0123456", 1)
+    cache.set_page("b", "0123456", 1)
+    cache.set_page("c", "0" * 11, 1)
+
+    assert cache.page("a") is None
+    assert cache.page("b") == ("0123456", 1)
+    assert cache.page("c") is None
+    assert cache.get(JS_URL + "1") == "eps1 = [];"
+    assert (cache.page_hits, cache.page_misses) == (1, 2)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_journals_are_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr("anime_sama_api.season_cache._Journal.min_lines", 4)
+    cache = EpisodesJsCache(tmp_path, page_max_age=3600)
+    for filever in range(10):
+        cache.record("a", JS_URL + str(filever))
+        cache.set_page("a", "<html>", filever)
+    assert len((tmp_path / "versions.jsonl").read_text().splitlines()) <= 4
+    assert len((tmp_path / "pages.jsonl").read_text().splitlines()) <= 4
+
+    cache = EpisodesJsCache(tmp_path, page_max_age=3600)
+    assert cache.latest("a") == JS_URL + "9"
+    assert cache.page("a") == ("<html>", 9)
+
+
+def test_versions_of_previous_format_are_loaded(tmp_path):
+    (tmp_path / "versions.json").write_text(json.dumps({"a": JS_URL + "1"}))
+    cache = EpisodesJsCache(tmp_path)
+    assert cache.latest("a") == JS_URL + "1"
+    assert not (tmp_path / "versions.json").exists()
+    assert EpisodesJsCache(tmp_path).latest("a") == JS_URL + "1"
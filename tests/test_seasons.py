@@ -1,6 +1,13 @@
+from functools import reduce
+import random
+
 import pytest
 
+from anime_sama_api.episode import Languages, Players
+from anime_sama_api.season import ProgramWarning, Season, SeasonLangPage
+
 from .data import episode_data, season_data
+from .data.mock_site import SITE_URL, season_page
 
 pytest_plugins = ("pytest_asyncio",)
 
@@ -10,3 +17,84 @@ async def test_episodes():
     assert episode_data.one_piece_season1 == await season_data.one_piece[0].episodes()
     assert episode_data.gumball_season1 == await season_data.gumball[0].episodes()
     assert episode_data.mha_season1 == await season_data.mha[0].episodes()
+
+
+# The merge used before the name indexes, kept as reference
+def reference_extend_episodes(current, new):
+    page, names, players_list = new
+
+    fusion = []
+    curr_done = 0
+    for name_new, players in zip(names, players_list):
+        for pos, (name_current, languages) in enumerate(current[curr_done:]):
+            if name_new == name_current:
+                languages[page.lang_id] = players
+                fusion.extend(current[curr_done : curr_done + pos + 1])
+                curr_done += pos + 1
+                break
+        else:
+            fusion.append((name_new, Languages({page.lang_id: players})))
+    fusion.extend(current[curr_done:])
+    return fusion
+
+
+def test_extend_episodes():
+    rng = random.Random(42)
+    lang_ids = ["vostfr", "vf", "va", "vj"]
+    for _ in range(500):
+        # Few distinct names so there are duplicates and misalignments
+        pages = [
+            (
+                SeasonLangPage(lang_id),
+                [f"Episode {rng.randint(1, 8)}" for _ in range(rng.randint(0, 12))],
+            )
+            for lang_id in lang_ids[: rng.randint(1, 4)]
+        ]
+
+        def merge(extend):
+            episodes = reduce(
+                extend,
+                (
+                    (
+                        page,
+                        names,
+                        [Players([f"{page.lang_id}/{name}"]) for name in names],
+                    )
+                    for page, names in pages
+                ),
+                [],
+            )
+            return [(name, dict(languages)) for name, languages in episodes]
+
+        assert merge(Season._extend_episodes) == merge(reference_extend_episodes)
+
+
+def test_episodes_names():
+    season = Season(f"{SITE_URL}catalogue/serie/saison1/")
+    page = SeasonLangPage(
+        "vostfr",
+        html=season_page(
+            'creerListe(1, 2); newSPF("Film"); newSP(); inconnu(1); finirListe(3);'
+        ),
+    )
+
+    assert season._get_episodes_names(page, 5, 5) == [
+        "Episode 1",
+        "Episode 2",
+        "Film",
+        "Episode 3",
+        "Episode 4",
+    ]
+    assert [(warning.source, warning.message) for warning in season.warnings] == [
+        ("newSP()", "'newSP' without argument"),
+        ("inconnu(1)", "Unknown function 'inconnu'"),
+    ]
+
+    season.warnings.clear()
+    assert season._get_episodes_names(SeasonLangPage("vf", html="<html>"), 2, 10) == [
+        "Episode 1 ",
+        "Episode 2 ",
+    ]
+    assert season.warnings == [
+        ProgramWarning(season.url + "vf/", "", "No program naming the episodes")
+    ]
@@ -0,0 +1,119 @@
+import asyncio
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import httpx
+import pytest
+
+from anime_sama_api.catalogue import Catalogue
+from anime_sama_api.season import Season
+from anime_sama_api.session import (
+    PooledTransport,
+    SessionConfig,
+    SessionManager,
+    SessionStats,
+    default_session,
+)
+from anime_sama_api.top_level import AnimeSama
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self) -> None:
+        Handler.in_flight += 1
+        Handler.max_in_flight = max(Handler.max_in_flight, Handler.in_flight)
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        Handler.in_flight -= 1
+
+    def log_message(self, *_) -> None:
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url() -> Generator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+
+
+def test_objects_share_default_client():
+    catalogue = Catalogue("https://anime-sama.fr/catalogue/one-piece/")
+    season = Season("https://anime-sama.fr/catalogue/one-piece/saison1/")
+    anime_sama = AnimeSama("https://anime-sama.fr/")
+
+    assert catalogue.client is season.client is anime_sama.client
+    assert catalogue.client is default_session.client
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(server_url):
+    async with SessionManager(SessionConfig(max_connections_per_host=1)) as session:
+        for _ in range(5):
+            response = await session.client.get(server_url)
+            assert response.text == "ok"
+
+        assert session.stats.requests == 5
+        assert session.stats.connections_opened == 1
+        assert session.stats.connections_reused == 4
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit(server_url):
+    Handler.max_in_flight = 0
+    async with SessionManager(SessionConfig(max_connections_per_host=2)) as session:
+        await asyncio.gather(*(session.client.get(server_url) for _ in range(10)))
+
+        assert session.stats.requests == 10
+        assert session.stats.connections_opened <= 2
+        assert Handler.max_in_flight <= 2
+
+
+@pytest.mark.asyncio
+async def test_retried_request_counted_once(server_url):
+    config = SessionConfig(max_keepalive_connections=0)
+    stats = SessionStats()
+    transport = PooledTransport(config, stats)
+    request = httpx.Request("GET", server_url)
+
+    # The same Request is sent again, like RetryTransport does
+    for _ in range(3):
+        response = await transport.handle_async_request(request)
+        await response.aread()
+        await response.aclose()
+    await transport.aclose()
+
+    assert stats.requests == 3
+    assert stats.connections_opened == 3
+
+
+@pytest.mark.asyncio
+async def test_configure_needs_closed_client(server_url, tmp_path):
+    session = SessionManager(SessionConfig(cache_dir=tmp_path))
+    client = session.client
+    await client.get(server_url)
+
+    # The connection pool of the open client would leak
+    with pytest.raises(RuntimeError):
+        session.configure(SessionConfig())
+
+    cache = session.cache
+    assert cache is not None
+    await session.aclose()
+    assert client.is_closed
+    assert session.cache is None
+    # The batched access times were written when closing
+    assert not cache._accessed
+    session.configure(SessionConfig())
+    assert session.client is not client
+    await session.aclose()
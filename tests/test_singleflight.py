@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from anime_sama_api.catalogue import Catalogue
+from anime_sama_api.season import Season
+from anime_sama_api.season_cache import EpisodesJsCache
+from anime_sama_api.singleflight import SingleFlight, requests_flight
+
+from .data.mock_site import SITE_URL, MockSite, catalogue_page
+
+pytest_plugins = ("pytest_asyncio",)
+
+CATALOGUE_URL = f"{SITE_URL}catalogue/serie/"
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    flight: SingleFlight[int] = SingleFlight()
+    calls = 0
+
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    assert await asyncio.gather(*(flight.do("key", work) for _ in range(5))) == [42] * 5
+    assert calls == 1
+    assert flight.deduplicated == 4
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_catalogue_page_is_fetched_once():
+    site = MockSite(
+        {CATALOGUE_URL: catalogue_page([("Saison 1", "saison1/vostfr")], synopsis="Hi")}
+    )
+    catalogue = Catalogue(CATALOGUE_URL, client=site.client())
+    deduplicated = requests_flight.deduplicated
+
+    seasons, synopsis, _, mature = await asyncio.gather(
+        catalogue.seasons(),
+        catalogue.synopsis(),
+        catalogue.advancement(),
+        catalogue.is_mature(),
+    )
+
+    assert [season.name for season in seasons] == ["Saison 1"]
+    assert synopsis == "Hi"
+    assert not mature
+    assert site.requests[CATALOGUE_URL] == 1
+    assert requests_flight.deduplicated - deduplicated == 3
+
+
+@pytest.mark.asyncio
+async def test_season_pages_are_fetched_once():
+    season_url = CATALOGUE_URL + "saison1/"
+    site = MockSite()
+    site.add_season(
+        season_url, "vostfr", "creerListe(1, 1);", ["https://vidmoly.net/1"]
+    )
+    client = site.client()
+
+    await asyncio.gather(
+        *(
+            Season(
+                season_url, client=client, episodes_js_cache=EpisodesJsCache()
+            ).episodes()
+            for _ in range(3)
+        )
+    )
+
+    assert set(site.requests.values()) == {1}
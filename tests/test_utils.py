@@ -18,3 +18,23 @@ def test_remove_some_js_comments():
         "<p>Hello</p>"
     )
     assert remove_some_js_comments("<!-- <p>Hello</p> -->\nNew"), "\nNew"
+
+
+def test_remove_some_js_comments_strings():
+    assert remove_some_js_comments("a /* b */ c <!-- d --> e") == "a  c  e"
+    # Unclosed comments are kept
+    assert remove_some_js_comments("a /* b <!-- c --> d") == "a /* b  d"
+
+    html = "<p>l'anime /* a */</p><script>x = '/* b */'; /* c */</script>"
+    assert (
+        remove_some_js_comments(html)
+        == "<p>l'anime </p><script>x = '/* b */'; </script>"
+    )
+
+    js = "var eps1 = [\n'https://host/*/1', /* 'https://old/1', */\n'https://x/2'];"
+    assert (
+        remove_some_js_comments(js, script=True)
+        == "var eps1 = [\n'https://host/*/1', \n'https://x/2'];"
+    )
+    # Without script=True the quotes are not string literals
+    assert remove_some_js_comments(js) == "var eps1 = [\n'https://host\n'https://x/2'];"